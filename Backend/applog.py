@@ -0,0 +1,140 @@
+"""Logging setup: records are queued on the calling thread and written by a background thread.
+
+Handlers on the request path only filter the record, stamp it with the
+request id and put it on a queue; a QueueListener thread formats it as one
+JSON object per line (or plain text) and writes it. Environment:
+
+    LOG_LEVEL    root level, default INFO
+    LOG_LEVELS   per-logger levels, e.g. "sql=WARNING,auth=DEBUG,werkzeug=WARNING"
+    LOG_SAMPLE   keep this fraction of a logger's records below WARNING,
+                 e.g. "auth=0.01"; a record's own extra={'sample': 0.1} overrides it
+    LOG_FORMAT   "json" (default) or "text"
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Set per request by server.py; records logged outside a request carry None
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s'
+# LogRecord attributes that are not user-supplied extras
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_handler = None
+_listener = None
+
+
+def parse_settings(value):
+    """'a=1,b=2' -> {'a': '1', 'b': '2'}"""
+    settings = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, setting = item.partition('=')
+        settings[name.strip()] = setting.strip()
+    return settings
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and drop unsampled records.
+
+    Runs on the logging thread, before the record is queued, so the request id
+    is read where the contextvar is set and dropped records cost nothing more.
+    """
+
+    def __init__(self, sample_rates):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            rate = getattr(record, 'sample', None)
+            if rate is None:
+                rate = self.sample_rates.get(record.name)
+            if rate is not None and random.random() >= rate:
+                return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key != 'sample':
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers message formatting to the listener thread."""
+
+    def prepare(self, record):
+        # Render the traceback now: exc_info holds frames that can't outlive the call
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _start_listener():
+    global _listener
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    if os.getenv('LOG_FORMAT', 'json') == 'text':
+        formatter = logging.Formatter(TEXT_FORMAT)
+    else:
+        formatter = JsonFormatter()
+    output.setFormatter(formatter)
+    _handler.queue = records
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork(); give the child its own
+    if _handler is not None:
+        _start_listener()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging():
+    """Route all logging through the background writer; safe to call more than once."""
+    global _handler
+    if _handler is not None:
+        return
+    root = logging.getLogger()
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    for name, level in parse_settings(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level.upper())
+    sample_rates = {name: float(rate) for name, rate in parse_settings(os.getenv('LOG_SAMPLE')).items()}
+
+    _handler = BackgroundQueueHandler(None)
+    _handler.addFilter(RequestContextFilter(sample_rates))
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    _start_listener()
+    atexit.register(stop_logging)
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,338 @@
+"""ASGI entry point that serves the dashboard reads with an async MySQL driver.
+
+The government and finance dashboard routes below run as coroutines on an
+aiomysql pool, so one worker keeps many of them waiting on the database at
+once instead of blocking a thread per request. Every other request, CORS
+preflight included, is passed to the Flask app in server.py through
+asgiref's WSGI adapter and runs on its thread pool as before.
+
+The ported routes get the same request handling as Flask's hooks in
+server.py: an X-Request-ID (the caller's, or a new one) tags their log
+records and response, and their latency, status, statement count and
+database time are recorded in server.request_metrics under the endpoint
+name of the Flask view they replace, so /api/admin/metrics covers them.
+
+Run from Backend/:  uvicorn asgi:app --workers 4
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import re
+from time import monotonic
+from urllib.parse import parse_qsl
+
+import aiomysql
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+
+import applog
+import server
+from jsonprovider import dumps_bytes
+from server import KeysetPage, InvalidPageRequest, InvalidYear, db_config, stats_cache, TOUR_ROWS, DONATION_ROWS
+
+ASYNC_DB_POOL_MIN = int(os.getenv('ASYNC_DB_POOL_MIN', 1))
+# Same number of connections per worker as the sync pool may open
+ASYNC_DB_POOL_SIZE = server.DB_POOL_SIZE + server.DB_POOL_MAX_OVERFLOW
+
+logger = logging.getLogger('asgi')
+wsgi_app = WsgiToAsgi(server.app)
+# Maps a ported path to the endpoint name of the Flask view, for metrics labels
+url_adapter = server.app.url_map.bind('')
+# [statements, seconds] spent in the database by the current request
+request_db_time = contextvars.ContextVar('request_db_time', default=None)
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_pool():
+    """Return the worker's aiomysql pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await aiomysql.create_pool(
+                    host=db_config['host'],
+                    port=db_config['port'],
+                    user=db_config['user'],
+                    password=db_config['password'],
+                    db=db_config['database'],
+                    minsize=ASYNC_DB_POOL_MIN,
+                    maxsize=ASYNC_DB_POOL_SIZE,
+                    pool_recycle=int(server.DB_POOL_RECYCLE),
+                    autocommit=True,
+                )
+    return _pool
+
+
+async def run_query(sql, params, cursor_class):
+    pool = await get_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor(cursor_class) as cursor:
+            start = monotonic()
+            try:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+            finally:
+                totals = request_db_time.get()
+                if totals is not None:
+                    totals[0] += 1
+                    totals[1] += monotonic() - start
+
+
+async def fetch_all(sql, params=None):
+    return await run_query(sql, params, aiomysql.DictCursor)
+
+
+async def fetch_rows(sql, params=None):
+    """Result tuples from a plain cursor, for mapping with a server.RowMapper."""
+    return await run_query(sql, params, aiomysql.Cursor)
+
+
+async def fetch_one(sql, params=None):
+    rows = await fetch_all(sql, params)
+    return rows[0] if rows else None
+
+
+async def finance_officer_park(user_id):
+    officer = await fetch_one("SELECT park_name FROM finance_officers WHERE id = %s", (user_id,))
+    return officer['park_name'] if officer else None
+
+
+def year_arg(args):
+    """?year= as an int, or None like request.args.get('year', type=int)."""
+    try:
+        return int(args['year'])
+    except (KeyError, ValueError):
+        return None
+
+
+# Ported routes; each returns (status, payload) like the Flask view it replaces
+
+
+async def government_stats(args, user_id):
+    async def compute():
+        # Independent totals, so they run concurrently on separate connections
+        rows = await asyncio.gather(*(fetch_one(sql) for sql in server.GOVERNMENT_STATS_SQL))
+        totals = {}
+        for row in rows:
+            totals.update(row)
+        return server.government_stats_cards(totals)
+
+    return 200, {"stats": await stats_cache.get_async('government_stats', compute)}
+
+
+async def government_tour_bookings(args, user_id):
+    condition, params = server.year_range('date', year_arg(args))
+    # params is always a list, so aiomysql %-formats the query: %% keeps DATE_FORMAT's %b
+    bookings = await fetch_all(f"""
+        SELECT
+            DATE_FORMAT(date, '%%b') as month,
+            COUNT(*) as bookings,
+            SUM(amount) as revenue
+        FROM tours
+        WHERE {condition}
+        GROUP BY YEAR(date), MONTH(date)
+        ORDER BY YEAR(date), MONTH(date)
+    """, params)
+    for booking in bookings:
+        booking['revenue'] = float(booking['revenue']) if booking['revenue'] else 0
+    return 200, bookings
+
+
+async def government_donations(args, user_id):
+    condition, params = server.year_range('created_at', year_arg(args))
+    donations = await fetch_all(f"""
+        SELECT
+            DATE_FORMAT(created_at, '%%b') as month,
+            COUNT(*) as count,
+            SUM(amount) as amount
+        FROM donations
+        WHERE {condition}
+        GROUP BY YEAR(created_at), MONTH(created_at)
+        ORDER BY YEAR(created_at), MONTH(created_at)
+    """, params)
+    for donation in donations:
+        donation['amount'] = float(donation['amount']) if donation['amount'] else 0
+    return 200, donations
+
+
+async def park_income(args, user_id, park_name):
+    year = year_arg(args)
+    totals = await fetch_one("""
+        SELECT SUM(donations) as total_donations, SUM(tours) as total_tours
+        FROM park_financial_summary
+        WHERE park_name = %s AND (%s IS NULL OR period_year = %s)
+    """, (park_name, year, year))
+    return 200, server.park_income_data(totals)
+
+
+async def park_expenses(args, user_id, park_name):
+    year = year_arg(args)
+    totals = await fetch_one("""
+        SELECT SUM(fund_requests) as total_fund_requests,
+               SUM(extra_funds) as total_extra_funds,
+               SUM(emergency) as total_emergency
+        FROM park_financial_summary
+        WHERE park_name = %s AND (%s IS NULL OR period_year = %s)
+    """, (park_name, year, year))
+    return 200, server.park_expense_data(totals)
+
+
+async def finance_tours(args, user_id):
+    page = KeysetPage.from_request(args=args)
+    park_name = await finance_officer_park(user_id)
+    if not park_name:
+        return 404, {"error": "Finance officer or park not found"}
+
+    condition, condition_params = page.where()
+    order_limit, limit_params = page.order_limit()
+    rows = await fetch_rows(f"""
+        SELECT {TOUR_ROWS.select_list}
+        FROM tours
+        WHERE park_name = %s AND {condition}
+        {order_limit}
+    """, (park_name, *condition_params, *limit_params))
+    tours, next_cursor = page.paginate(rows, TOUR_ROWS)
+    return 200, page.response(tours, next_cursor)
+
+
+async def finance_donations(args, user_id):
+    page = KeysetPage.from_request(args=args)
+    park_name = await finance_officer_park(user_id)
+    if not park_name:
+        return 404, {"error": "Finance officer or park not found"}
+
+    condition, condition_params = page.where()
+    order_limit, limit_params = page.order_limit()
+    rows = await fetch_rows(f"""
+        SELECT {DONATION_ROWS.select_list}
+        FROM donations
+        WHERE park_name = %s AND {condition}
+        {order_limit}
+    """, (park_name, *condition_params, *limit_params))
+    donations, next_cursor = page.paginate(rows, DONATION_ROWS)
+    return 200, page.response(donations, next_cursor)
+
+
+ASYNC_ROUTES = [
+    (re.compile(r'^/api/government/stats$'), government_stats),
+    (re.compile(r'^/api/government/tour-bookings$'), government_tour_bookings),
+    (re.compile(r'^/api/government/donations$'), government_donations),
+    (re.compile(r'^/api/government/park-income/(?P<park_name>[^/]+)$'), park_income),
+    (re.compile(r'^/api/government/park-expenses/(?P<park_name>[^/]+)$'), park_expenses),
+    (re.compile(r'^/api/finance/tours$'), finance_tours),
+    (re.compile(r'^/api/finance/donations$'), finance_donations),
+]
+
+
+def match_route(scope):
+    if scope['type'] != 'http' or scope['method'] != 'GET':
+        return None, None
+    for pattern, handler in ASYNC_ROUTES:
+        match = pattern.match(scope['path'])
+        if match:
+            return handler, match.groupdict()
+    return None, None
+
+
+def authenticate(headers):
+    """Return (user_id, None), or (None, (status, payload)) like token_required."""
+    token = headers.get('authorization')
+    if not token:
+        return None, (401, {'error': 'Token is missing'})
+    try:
+        return server.decode_token(token.split()[1])['user_id'], None
+    except jwt.ExpiredSignatureError:
+        return None, (401, {'error': 'Token has expired'})
+    except Exception as e:
+        return None, (401, {'error': f'Invalid token: {str(e)}'})
+
+
+async def send_json(send, status, payload, origin=None, request_id=None):
+    body = dumps_bytes(payload)
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if request_id:
+        headers.append((b'x-request-id', request_id.encode()))
+    if origin in server.CORS_ORIGINS:
+        headers += [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def endpoint_name(scope):
+    try:
+        endpoint, _ = url_adapter.match(scope['path'], method=scope['method'])
+        return endpoint
+    except Exception:
+        return 'unmatched'
+
+
+async def handle(scope, send, handler, path_params):
+    started = monotonic()
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+    origin = headers.get('origin')
+    # Same rules as server.assign_request_id
+    request_id = headers.get('x-request-id', '')
+    if not server.REQUEST_ID_PATTERN.match(request_id):
+        request_id = os.urandom(8).hex()
+    request_id_token = applog.request_id_var.set(request_id)
+    db_time = [0, 0.0]
+    db_time_token = request_db_time.set(db_time)
+    try:
+        status, payload = await respond(scope, headers, args, handler, path_params)
+        await send_json(send, status, payload, origin=origin, request_id=request_id)
+        server.request_metrics.observe(
+            endpoint_name(scope), scope['method'], status, monotonic() - started, db_time[0], db_time[1]
+        )
+    finally:
+        request_db_time.reset(db_time_token)
+        applog.request_id_var.reset(request_id_token)
+
+
+async def respond(scope, headers, args, handler, path_params):
+    """(status, payload) for a ported route, with token_required's and the error handlers' answers."""
+    user_id, error = authenticate(headers)
+    if error:
+        return error
+    try:
+        return await handler(args, user_id, **path_params)
+    except (InvalidPageRequest, InvalidYear) as e:
+        return 400, {"error": str(e)}
+    except (aiomysql.OperationalError, OSError) as e:
+        logger.error("Database unavailable: %s", e)
+        return 503, {"error": "Database connection failed"}
+    except Exception:
+        logger.exception("Error serving %s", scope['path'])
+        return 500, {"error": "Failed to fetch data"}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await get_pool()
+            except Exception as e:
+                # Keep serving; the pool is created on the first request instead
+                logger.warning("Could not open the async database pool: %s", e)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _pool is not None:
+                _pool.close()
+                await _pool.wait_closed()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    handler, path_params = match_route(scope)
+    if handler is None:
+        await wsgi_app(scope, receive, send)
+        return
+    await handle(scope, send, handler, path_params)
@@ -0,0 +1,107 @@
+"""Content-addressed file store for uploaded documents.
+
+A file is stored once under its SHA-256 digest at <root>/<aa>/<bb>/<digest>,
+so identical uploads share one copy and a digest always names the same bytes.
+Shared by server.py and the Python migrations, which is why it lives outside
+the app module.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+ATTACHMENT_FOLDER = os.getenv(
+    'ATTACHMENT_FOLDER',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'attachments')
+)
+CHUNK_SIZE = 1024 * 1024
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadTooLarge(ValueError):
+    """Raised by save_stream when a stream is longer than its max_size."""
+
+
+class ContentStore:
+    def __init__(self, root, chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def path(self, digest):
+        if not DIGEST_PATTERN.match(digest or ''):
+            raise ValueError("Invalid content digest")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.isfile(self.path(digest))
+
+    def save_stream(self, stream, max_size=None):
+        """Copy a binary stream into the store chunk by chunk; return (digest, size).
+
+        The data is hashed while it is written to a temporary file in the store,
+        which is then renamed into place, so a partial upload is never visible
+        under a digest. More than max_size bytes raises UploadTooLarge.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UploadTooLarge(f"Upload is larger than {max_size} bytes")
+                    tmp.write(chunk)
+            digest = sha256.hexdigest()
+            final_path = self.path(digest)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_bytes(self, data):
+        """Store an in-memory blob; return (digest, size)."""
+        digest = hashlib.sha256(data).hexdigest()
+        final_path = self.path(digest)
+        if not os.path.exists(final_path):
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(final_path), prefix='.upload-')
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, final_path)
+        return digest, len(data)
+
+
+# Leading bytes of the document types the services form accepts
+MAGIC_MIME_TYPES = [
+    (b'%PDF', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+]
+
+
+def guess_mime_type(filename=None, head=b''):
+    """MIME type from the file name, falling back to the leading bytes."""
+    if filename:
+        mime_type, _ = mimetypes.guess_type(filename)
+        if mime_type:
+            return mime_type
+    for magic, mime_type in MAGIC_MIME_TYPES:
+        if head.startswith(magic):
+            return mime_type
+    return 'application/octet-stream'
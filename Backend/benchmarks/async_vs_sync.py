@@ -0,0 +1,76 @@
+"""Requests per second of the dashboard reads under the sync and async servers.
+
+Start both servers with the same memory budget (e.g. the same number of
+worker processes), then point this at each. It fires concurrent GETs at the
+ported dashboard routes and, given the server's master PID, reports the
+resident memory of it and its workers so the runs can be compared fairly.
+
+    python server.py                         # sync, :5000
+    uvicorn asgi:app --port 8000 --workers 1 # async, :8000
+    python benchmarks/async_vs_sync.py --token <jwt> \\
+        --url http://localhost:5000 --url http://localhost:8000 [--pid ... --pid ...]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+PATHS = [
+    '/api/government/stats',
+    '/api/government/tour-bookings',
+    '/api/government/donations',
+    '/api/finance/tours?limit=50',
+    '/api/finance/donations?limit=50',
+]
+
+
+def rss_kib(pid):
+    """Resident memory of pid and its children, from /proc (Linux only)."""
+    pids = [pid]
+    children = f'/proc/{pid}/task/{pid}/children'
+    if os.path.exists(children):
+        with open(children) as f:
+            pids += [int(child) for child in f.read().split()]
+    total = 0
+    for p in pids:
+        with open(f'/proc/{p}/status') as f:
+            total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+    return total
+
+
+def run(base_url, token, requests, concurrency):
+    def fetch(i):
+        request = Request(base_url + PATHS[i % len(PATHS)], headers={'Authorization': f'Bearer {token}'})
+        try:
+            with urlopen(request) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            return e.code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        statuses = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, sum(1 for status in statuses if status != 200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', action='append', required=True)
+    parser.add_argument('--pid', action='append', type=int, default=[])
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    for i, url in enumerate(args.url):
+        rate, errors = run(url, args.token, args.requests, args.concurrency)
+        memory = f"{rss_kib(args.pid[i]) / 1024:8.1f} MiB" if i < len(args.pid) else ''
+        print(f"{url:<28} {rate:8.1f} req/s  {errors} errors  {memory}")
+
+
+if __name__ == '__main__':
+    main()
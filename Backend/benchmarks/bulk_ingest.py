@@ -0,0 +1,54 @@
+"""Throughput of /api/bulk/donations against one /api/donate call per row.
+
+Posts the same generated donations through both paths with the Flask test
+client and reports rows per second. Needs the configured database and
+inserts real rows, so run it against a scratch copy.
+
+Run from Backend/:  python benchmarks/bulk_ingest.py [rows]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+import server
+
+
+def donation(i):
+    return {
+        'donationType': 'one-time', 'amount': 10 + i % 90, 'parkName': 'Benchmark Park',
+        'firstName': 'Bench', 'lastName': str(i), 'email': f'bench{i}@example.com',
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    token = jwt.encode(
+        {'user_id': '1', 'email': 'bench@example.com', 'role': 'admin',
+         'exp': int(server.epoch_time() + 3600)},
+        server.app.config['SECRET_KEY'], algorithm='HS256'
+    )
+    client = server.app.test_client()
+    records = [donation(i) for i in range(rows)]
+
+    started = time.perf_counter()
+    for record in records:
+        client.post('/api/donate', json=record)
+    single = rows / (time.perf_counter() - started)
+
+    body = '\n'.join(json.dumps(record) for record in records)
+    started = time.perf_counter()
+    response = client.post('/api/bulk/donations', data=body, content_type='application/x-ndjson',
+                           headers={'Authorization': f'Bearer {token}'})
+    bulk = rows / (time.perf_counter() - started)
+
+    print(f"{'/api/donate per row':<24} {single:10.0f} rows/s")
+    print(f"{'/api/bulk/donations':<24} {bulk:10.0f} rows/s  (inserted {response.get_json()['inserted']})")
+    print(f"speedup: {bulk / single:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Serialization throughput of tour rows: per-row conversion + Flask's encoder vs FastJSONProvider.
+
+Builds rows shaped like mysql.connector's result for /api/finance/tours
+(datetime, date, TIME as timedelta, Decimal) and times turning a page of
+them into a response body three ways: the old conversion loop followed by
+Flask's default provider, the new provider on the standard library encoder,
+and the new provider on orjson when it is installed. No database is needed.
+
+Run from Backend/:  python benchmarks/json_provider.py [rows]
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import jsonprovider
+
+
+def tour(i):
+    return {
+        'id': i, 'park_name': 'Nyungwe National Park', 'tour_name': 'Canopy Walk',
+        'date': date(2024, 1, 1) + timedelta(days=i % 365),
+        'time': timedelta(hours=8 + i % 9, minutes=30),
+        'guests': 1 + i % 6, 'amount': Decimal(50 * (1 + i % 6)) + Decimal('0.00'),
+        'first_name': 'Bench', 'last_name': str(i), 'email': f'bench{i}@example.com',
+        'phone': '+250700000000', 'special_requests': None,
+        'created_at': datetime(2024, 1, 1, 9, 0) + timedelta(minutes=i),
+    }
+
+
+def convert_rows(tours):
+    """The loop get_all_tours ran before jsonify."""
+    for row in tours:
+        row['created_at'] = row['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        row['date'] = row['date'].strftime('%Y-%m-%d')
+        row['time'] = str(row['time'])
+        row['amount'] = float(row['amount'])
+    return tours
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    page = [tour(i) for i in range(rows)]
+    app = Flask(__name__)
+    flask_provider = DefaultJSONProvider(app)
+    stdlib_encoder = json.JSONEncoder(default=jsonprovider.json_default, ensure_ascii=False, separators=(',', ':'))
+
+    runs = {
+        'convert + Flask default': lambda: flask_provider.dumps({'items': convert_rows([dict(r) for r in page])}).encode(),
+        'provider, stdlib json': lambda: stdlib_encoder.encode({'items': [dict(r) for r in page]}).encode(),
+    }
+    if jsonprovider.orjson is not None:
+        runs['provider, orjson'] = lambda: jsonprovider.dumps_bytes({'items': [dict(r) for r in page]})
+    else:
+        print("orjson is not installed; only the standard library encoder is measured")
+
+    # Every run copies the rows so the conversion loop always sees fresh values
+    baseline = None
+    for name, run in runs.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=5))
+        throughput = rows / seconds
+        baseline = baseline or throughput
+        print(f"{name:<26} {throughput:12.0f} rows/s  {throughput / baseline:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
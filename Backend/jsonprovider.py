@@ -0,0 +1,92 @@
+"""JSON provider that serialises MySQL result types directly, using orjson when installed.
+
+mysql.connector returns DATETIME, DATE, TIME and DECIMAL columns as
+datetime, date, timedelta and Decimal. The provider writes them as
+
+    datetime            "2024-05-01 14:30:00"
+    date                "2024-05-01"
+    time / timedelta    str() of the value, e.g. "9:30:00"
+    Decimal             a JSON number
+
+so views can return rows as fetched instead of converting every row first.
+With orjson the walk over dicts and lists runs in C and only those values
+call back into Python; without it the standard library encoder is used with
+the same conversions. Output is compact and keeps keys in insertion order.
+"""
+import dataclasses
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is used instead
+    orjson = None
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_FORMAT = '%Y-%m-%d'
+# Column types json_default converts; format_report_row checks against these
+CONVERTED_TYPES = (datetime, date, time, timedelta, Decimal)
+
+
+def json_default(value):
+    """Plain JSON value for a type the encoder does not handle itself."""
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, (time, timedelta)):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # Dates go through json_default so they keep the format above, not ISO 8601
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS)
+
+    def loads(s):
+        return orjson.loads(s)
+else:
+    _encoder = json.JSONEncoder(default=json_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps_bytes(obj):
+        return _encoder.encode(obj).encode()
+
+    def loads(s):
+        return json.loads(s)
+
+
+class FastJSONProvider(JSONProvider):
+    """app.json provider used by jsonify, request.get_json and the ASGI routes."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Options such as indent or sort_keys are only understood by the standard library
+            kwargs.setdefault('default', json_default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
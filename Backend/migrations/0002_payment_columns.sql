@@ -0,0 +1,12 @@
+--
+-- Payment tracking columns on donations and tours.
+-- Previously added on the fly by process_payment on every payment.
+--
+
+ALTER TABLE `donations`
+  ADD COLUMN IF NOT EXISTS `status` enum('completed','failed','pending') DEFAULT 'pending',
+  ADD COLUMN IF NOT EXISTS `transaction_id` varchar(50) DEFAULT NULL;
+
+ALTER TABLE `tours`
+  ADD COLUMN IF NOT EXISTS `status` enum('completed','failed','pending') DEFAULT 'pending',
+  ADD COLUMN IF NOT EXISTS `transaction_id` varchar(50) DEFAULT NULL;
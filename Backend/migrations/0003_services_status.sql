@@ -0,0 +1,11 @@
+--
+-- Service application status.
+-- Previously added on the fly by update_service_status on every approval.
+-- The finance officer endpoint records 'denied', so the enum must accept it.
+--
+
+ALTER TABLE `services`
+  ADD COLUMN IF NOT EXISTS `status` enum('pending','approved','rejected','denied') DEFAULT 'pending';
+
+ALTER TABLE `services`
+  MODIFY `status` enum('pending','approved','rejected','denied') DEFAULT 'pending';
@@ -0,0 +1,29 @@
+--
+-- Indexes backing keyset pagination (ORDER BY created_at DESC, id DESC).
+-- InnoDB secondary indexes carry the primary key, so (x, created_at) also orders by id.
+--
+
+ALTER TABLE `tours`
+  ADD INDEX IF NOT EXISTS `idx_tours_park_created` (`park_name`, `created_at`);
+
+ALTER TABLE `donations`
+  ADD INDEX IF NOT EXISTS `idx_donations_park_created` (`park_name`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_donations_created` (`created_at`);
+
+ALTER TABLE `services`
+  ADD INDEX IF NOT EXISTS `idx_services_created` (`created_at`);
+
+ALTER TABLE `fund_requests`
+  ADD INDEX IF NOT EXISTS `idx_fund_requests_park_created` (`parkname`, `created_at`);
+
+ALTER TABLE `parkstaff`
+  ADD INDEX IF NOT EXISTS `idx_parkstaff_created_role` (`created_at`, `role`);
+
+ALTER TABLE `auditors`
+  ADD INDEX IF NOT EXISTS `idx_auditors_created_role` (`created_at`, `role`);
+
+ALTER TABLE `government_officers`
+  ADD INDEX IF NOT EXISTS `idx_government_officers_created_role` (`created_at`, `role`);
+
+ALTER TABLE `finance_officers`
+  ADD INDEX IF NOT EXISTS `idx_finance_officers_created_role` (`created_at`, `role`);
@@ -0,0 +1,40 @@
+--
+-- Per-park, per-year income and approved expense totals.
+-- Maintained by the write endpoints so park-income / park-expenses read one
+-- primary-key range instead of aggregating five tables.
+--
+
+CREATE TABLE IF NOT EXISTS `park_financial_summary` (
+  `park_name` varchar(255) NOT NULL,
+  `period_year` smallint(6) NOT NULL,
+  `donations` decimal(15,2) NOT NULL DEFAULT 0.00,
+  `tours` decimal(15,2) NOT NULL DEFAULT 0.00,
+  `fund_requests` decimal(15,2) NOT NULL DEFAULT 0.00,
+  `extra_funds` decimal(15,2) NOT NULL DEFAULT 0.00,
+  `emergency` decimal(15,2) NOT NULL DEFAULT 0.00,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`park_name`, `period_year`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `park_financial_summary`
+  (`park_name`, `period_year`, `donations`, `tours`, `fund_requests`, `extra_funds`, `emergency`)
+SELECT park_name, period_year,
+       SUM(donations), SUM(tours), SUM(fund_requests), SUM(extra_funds), SUM(emergency)
+FROM (
+  SELECT park_name, YEAR(created_at) AS period_year, amount AS donations, 0 AS tours,
+         0 AS fund_requests, 0 AS extra_funds, 0 AS emergency
+  FROM donations
+  UNION ALL
+  SELECT park_name, YEAR(created_at), 0, amount, 0, 0, 0
+  FROM tours
+  UNION ALL
+  SELECT parkname, YEAR(created_at), 0, 0, amount, 0, 0
+  FROM fund_requests WHERE status = 'approved'
+  UNION ALL
+  SELECT park_name, YEAR(created_at), 0, 0, 0, amount, 0
+  FROM extra_funds_requests WHERE status = 'approved'
+  UNION ALL
+  SELECT park_name, YEAR(created_at), 0, 0, 0, 0, amount
+  FROM emergency_requests WHERE status = 'approved'
+) AS totals
+GROUP BY park_name, period_year;
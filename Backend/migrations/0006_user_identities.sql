@@ -0,0 +1,35 @@
+--
+-- One row per login email, pointing at the table and row that owns it.
+-- Staff and admins share the 'staff' realm (the /api/login namespace);
+-- visitors sign in separately and get their own realm.
+--
+
+CREATE TABLE IF NOT EXISTS `user_identities` (
+  `email` varchar(255) NOT NULL,
+  `realm` enum('staff','visitor') NOT NULL,
+  `role` varchar(20) NOT NULL,
+  `user_table` enum('admintable','parkstaff','finance_officers','auditors','government_officers','visitors') NOT NULL,
+  `user_id` int(11) NOT NULL,
+  PRIMARY KEY (`email`, `realm`),
+  UNIQUE KEY `uq_user_identities_user` (`user_table`, `user_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Seed in the order /api/login used to search the tables, so an email that
+-- exists in several tables keeps resolving to the same account
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'staff', 'admin', 'admintable', id FROM admintable;
+
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'staff', 'park-staff', 'parkstaff', id FROM parkstaff;
+
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'staff', 'finance', 'finance_officers', id FROM finance_officers;
+
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'staff', 'auditor', 'auditors', id FROM auditors;
+
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'staff', 'government', 'government_officers', id FROM government_officers;
+
+INSERT IGNORE INTO `user_identities` (`email`, `realm`, `role`, `user_table`, `user_id`)
+SELECT email, 'visitor', 'visitor', 'visitors', id FROM visitors;
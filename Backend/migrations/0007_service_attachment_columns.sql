@@ -0,0 +1,12 @@
+--
+-- Service application documents move out of LONGBLOB columns into the
+-- content-addressed attachment store; the row keeps digest, size and type.
+--
+
+ALTER TABLE `services`
+  ADD COLUMN IF NOT EXISTS `company_registration_sha256` char(64) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `company_registration_size` bigint(20) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `company_registration_mime` varchar(100) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `application_letter_sha256` char(64) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `application_letter_size` bigint(20) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `application_letter_mime` varchar(100) DEFAULT NULL;
@@ -0,0 +1,47 @@
+"""Move services LONGBLOB documents into the attachment store, then drop the blob columns.
+
+Rows are read one at a time so only a single document is in memory, and each
+row is updated as soon as its files are on disk, so an interrupted run can
+simply be repeated.
+"""
+import logging
+
+from attachments import ContentStore, ATTACHMENT_FOLDER, guess_mime_type
+
+BLOB_COLUMNS = ['company_registration', 'application_letter']
+
+logger = logging.getLogger('migrations')
+
+
+def migrate(cursor):
+    cursor.execute("SHOW COLUMNS FROM services LIKE 'company_registration'")
+    if not cursor.fetchall():
+        return  # already moved
+
+    store = ContentStore(ATTACHMENT_FOLDER)
+    cursor.execute("""
+        SELECT id FROM services
+        WHERE company_registration IS NOT NULL OR application_letter IS NOT NULL
+    """)
+    service_ids = [row[0] for row in cursor.fetchall()]
+
+    for service_id in service_ids:
+        cursor.execute(
+            "SELECT company_registration, application_letter FROM services WHERE id = %s",
+            (service_id,)
+        )
+        blobs = cursor.fetchone()
+        for column, blob in zip(BLOB_COLUMNS, blobs):
+            if blob is None:
+                continue
+            blob = bytes(blob)
+            digest, size = store.save_bytes(blob)
+            cursor.execute(f"""
+                UPDATE services
+                SET {column}_sha256 = %s, {column}_size = %s, {column}_mime = %s, {column} = NULL
+                WHERE id = %s
+            """, (digest, size, guess_mime_type(head=blob[:16]), service_id))
+        cursor.execute("COMMIT")
+        logger.info("Moved attachments of service %s", service_id)
+
+    cursor.execute("ALTER TABLE services DROP COLUMN company_registration, DROP COLUMN application_letter")
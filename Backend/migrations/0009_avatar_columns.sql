@@ -0,0 +1,15 @@
+--
+-- Every role can upload an avatar; only admintable had the column.
+--
+
+ALTER TABLE `parkstaff`
+  ADD COLUMN IF NOT EXISTS `avatar_url` varchar(255) DEFAULT NULL;
+
+ALTER TABLE `auditors`
+  ADD COLUMN IF NOT EXISTS `avatar_url` varchar(255) DEFAULT NULL;
+
+ALTER TABLE `finance_officers`
+  ADD COLUMN IF NOT EXISTS `avatar_url` varchar(255) DEFAULT NULL;
+
+ALTER TABLE `government_officers`
+  ADD COLUMN IF NOT EXISTS `avatar_url` varchar(255) DEFAULT NULL;
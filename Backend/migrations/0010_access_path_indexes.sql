@@ -0,0 +1,34 @@
+--
+-- Composite indexes for the filters and sort orders the routes use.
+-- Indexes added in 0004 already cover (park_name, created_at) on tours and
+-- donations, donations.created_at and (parkname, created_at) on fund_requests.
+-- InnoDB appends the primary key to every secondary index.
+--
+
+ALTER TABLE `tours`
+  ADD INDEX IF NOT EXISTS `idx_tours_created` (`created_at`),
+  ADD INDEX IF NOT EXISTS `idx_tours_email_created` (`email`, `created_at`);
+
+ALTER TABLE `donations`
+  ADD INDEX IF NOT EXISTS `idx_donations_email_created` (`email`, `created_at`);
+
+ALTER TABLE `fund_requests`
+  ADD INDEX IF NOT EXISTS `idx_fund_requests_park_status` (`parkname`, `status`),
+  ADD INDEX IF NOT EXISTS `idx_fund_requests_status_created` (`status`, `created_at`);
+
+ALTER TABLE `emergency_requests`
+  ADD INDEX IF NOT EXISTS `idx_emergency_requests_park_status` (`park_name`, `status`),
+  ADD INDEX IF NOT EXISTS `idx_emergency_requests_status_created` (`status`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_emergency_requests_created` (`created_at`);
+
+ALTER TABLE `extra_funds_requests`
+  ADD INDEX IF NOT EXISTS `idx_extra_funds_requests_park_status` (`park_name`, `status`),
+  ADD INDEX IF NOT EXISTS `idx_extra_funds_requests_status_created` (`status`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_extra_funds_requests_created` (`created_at`);
+
+ALTER TABLE `budgets`
+  ADD INDEX IF NOT EXISTS `idx_budgets_park_status` (`park_name`, `status`),
+  ADD INDEX IF NOT EXISTS `idx_budgets_status_created` (`status`, `created_at`);
+
+ALTER TABLE `login_logs`
+  ADD INDEX IF NOT EXISTS `idx_login_logs_login_time` (`login_time`);
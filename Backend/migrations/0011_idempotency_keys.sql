@@ -0,0 +1,16 @@
+--
+-- Responses recorded per Idempotency-Key for the public write endpoints.
+-- status_code is NULL while the first request holding the key is running.
+--
+
+CREATE TABLE IF NOT EXISTS `idempotency_keys` (
+  `endpoint` varchar(100) NOT NULL,
+  `idempotency_key` varchar(100) NOT NULL,
+  `request_hash` char(64) NOT NULL,
+  `status_code` smallint(6) DEFAULT NULL,
+  `response_body` mediumtext DEFAULT NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `expires_at` datetime NOT NULL,
+  PRIMARY KEY (`endpoint`, `idempotency_key`),
+  KEY `idx_idempotency_keys_expires` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
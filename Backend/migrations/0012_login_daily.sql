@@ -0,0 +1,30 @@
+--
+-- Logins per day, so /api/admin/login-metrics reads one row per day instead
+-- of grouping every row of login_logs. login_logs is written outside the
+-- app, so the counts are kept by triggers. An UPDATE of login_time is not
+-- tracked; `python server.py rebuild-login-daily` recomputes the table.
+-- Creating triggers needs the TRIGGER privilege (and, with binary logging
+-- on, SUPER or log_bin_trust_function_creators).
+--
+
+CREATE TABLE IF NOT EXISTS `login_daily` (
+  `login_date` date NOT NULL,
+  `logins` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`login_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TRIGGER IF NOT EXISTS `login_logs_count_insert` AFTER INSERT ON `login_logs`
+FOR EACH ROW
+  INSERT INTO `login_daily` (`login_date`, `logins`) VALUES (DATE(NEW.login_time), 1)
+  ON DUPLICATE KEY UPDATE `logins` = `logins` + 1;
+
+CREATE TRIGGER IF NOT EXISTS `login_logs_count_delete` AFTER DELETE ON `login_logs`
+FOR EACH ROW
+  UPDATE `login_daily` SET `logins` = `logins` - 1 WHERE `login_date` = DATE(OLD.login_time);
+
+-- Backfill after the triggers exist so no login falls between the two
+INSERT INTO `login_daily` (`login_date`, `logins`)
+SELECT DATE(login_time), COUNT(*)
+FROM login_logs
+GROUP BY DATE(login_time)
+ON DUPLICATE KEY UPDATE `logins` = VALUES(`logins`);
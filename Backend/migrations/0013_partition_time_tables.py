@@ -0,0 +1,12 @@
+"""Partition login_logs, donations and tours by time; see partitions.py.
+
+Each table is rebuilt once, so on a large database run `python server.py
+migrate` in a maintenance window rather than on startup. login_logs loses
+its foreign key to admintable: partitioned InnoDB tables can't have one.
+"""
+from partitions import PARTITIONED_TABLES, partition_table
+
+
+def migrate(cursor):
+    for table, scheme in PARTITIONED_TABLES.items():
+        partition_table(cursor, table, scheme)
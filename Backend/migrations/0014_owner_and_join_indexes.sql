@@ -0,0 +1,24 @@
+--
+-- Indexes for the plans explain_check.py flags on top of 0004 and 0010:
+-- the admin donations join to payments, per-officer listings of budgets and
+-- requests (created_by, then the filter and sort columns), budgets listed by
+-- approval date, a visitor's services and the services status breakdown.
+--
+
+ALTER TABLE `payments`
+  ADD INDEX IF NOT EXISTS `idx_payments_email_park_type` (`customer_email`, `park_name`, `payment_type`);
+
+ALTER TABLE `budgets`
+  ADD INDEX IF NOT EXISTS `idx_budgets_created_by_created` (`created_by`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_budgets_created_by_status_created` (`created_by`, `status`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_budgets_status_approved` (`status`, `approved_at`);
+
+ALTER TABLE `emergency_requests`
+  ADD INDEX IF NOT EXISTS `idx_emergency_requests_owner_created` (`created_by`, `park_name`, `created_at`);
+
+ALTER TABLE `extra_funds_requests`
+  ADD INDEX IF NOT EXISTS `idx_extra_funds_requests_owner_created` (`created_by`, `park_name`, `created_at`);
+
+ALTER TABLE `services`
+  ADD INDEX IF NOT EXISTS `idx_services_email_created` (`email`, `created_at`),
+  ADD INDEX IF NOT EXISTS `idx_services_status` (`status`);
@@ -0,0 +1,192 @@
+"""Time-based RANGE partitions for append-mostly tables, and retention for login_logs.
+
+Each table in PARTITIONED_TABLES is split into monthly or yearly partitions
+on its time column plus a catch-all `pfuture`. Queries that filter on that
+column as a range only read the partitions the range covers (partition
+pruning). maintain_partitions():
+
+- splits pfuture so partitions exist `ahead` periods into the future, which
+  only changes metadata while pfuture is still empty, and
+- for a table with a retention period, removes partitions that end before
+  the cutoff, oldest first: DROP PARTITION, or with archive=True, EXCHANGE
+  PARTITION into a standalone <table>_archive_<partition> table first.
+  Neither fires row triggers, so login_daily keeps the counts of dropped logs.
+
+Shared by server.py and migration 0013, which does the initial partitioning.
+Settings:
+
+    LOGIN_LOGS_RETENTION_MONTHS  months of login_logs kept, default 24
+    LOGIN_LOGS_ARCHIVE           1 to archive expired partitions instead of dropping them
+"""
+import logging
+import os
+from datetime import date
+
+FUTURE_PARTITION = 'pfuture'
+LOGIN_LOGS_RETENTION_MONTHS = int(os.getenv('LOGIN_LOGS_RETENTION_MONTHS', 24))
+LOGIN_LOGS_ARCHIVE = os.getenv('LOGIN_LOGS_ARCHIVE') == '1'
+
+logger = logging.getLogger('partitions')
+
+
+class PartitionScheme:
+    def __init__(self, column, period, timestamp=True, ahead=1, retention=None):
+        self.column = column
+        self.period = period          # 'month' or 'year'
+        self.timestamp = timestamp    # TIMESTAMP columns partition on UNIX_TIMESTAMP(column)
+        self.ahead = ahead            # periods after the current one to create in advance
+        self.retention = retention    # periods kept before the current one; None keeps everything
+
+    def start(self, day):
+        """First day of the period containing day."""
+        return date(day.year, day.month if self.period == 'month' else 1, 1)
+
+    def shift(self, start, periods):
+        if self.period == 'year':
+            return date(start.year + periods, 1, 1)
+        months = start.year * 12 + start.month - 1 + periods
+        return date(months // 12, months % 12 + 1, 1)
+
+    def name(self, start):
+        return f"p{start:%Y%m}" if self.period == 'month' else f"p{start:%Y}"
+
+    def parse(self, name):
+        """Period start of a partition named by name(), or None for pfuture and foreign names."""
+        digits = name[1:]
+        if not digits.isdigit() or len(digits) != (6 if self.period == 'month' else 4):
+            return None
+        return date(int(digits[:4]), int(digits[4:6]) if self.period == 'month' else 1, 1)
+
+    def partition_by(self):
+        if self.timestamp:
+            return f"RANGE (UNIX_TIMESTAMP(`{self.column}`))"
+        return f"RANGE COLUMNS(`{self.column}`)"
+
+    def definition(self, start):
+        end = self.shift(start, 1)
+        bound = f"UNIX_TIMESTAMP('{end:%Y-%m-%d} 00:00:00')" if self.timestamp else f"'{end:%Y-%m-%d}'"
+        return f"PARTITION {self.name(start)} VALUES LESS THAN ({bound})"
+
+    def definitions(self, first, last):
+        """Partition definitions for the periods first..last, followed by pfuture."""
+        definitions = []
+        start = first
+        while start <= last:
+            definitions.append(self.definition(start))
+            start = self.shift(start, 1)
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        return ', '.join(definitions)
+
+
+PARTITIONED_TABLES = {
+    'login_logs': PartitionScheme('login_time', 'month', ahead=3, retention=LOGIN_LOGS_RETENTION_MONTHS),
+    'donations': PartitionScheme('created_at', 'year'),
+    # Tours are reported by the date of the tour, which can be booked well ahead
+    'tours': PartitionScheme('date', 'year', timestamp=False, ahead=2),
+}
+
+
+def partition_names(cursor, table):
+    cursor.execute("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def partition_table(cursor, table, scheme, today=None):
+    """Partition an unpartitioned table from its oldest row through `ahead` periods from today.
+
+    Rebuilds the table. MySQL requires the partition column in every unique key
+    and allows no foreign keys on partitioned tables, so the primary key
+    becomes (id, column) and the table's foreign keys are dropped.
+    """
+    if partition_names(cursor, table):
+        return False
+    today = today or date.today()
+    cursor.execute("""
+        SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE `{table}` DROP FOREIGN KEY `{constraint}`")
+
+    cursor.execute(f"SELECT MIN(`{scheme.column}`) FROM `{table}`")
+    oldest = cursor.fetchone()[0]
+    first = scheme.start(oldest or today)
+    last = scheme.shift(scheme.start(today), scheme.ahead)
+    cursor.execute(f"""
+        ALTER TABLE `{table}`
+            DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `{scheme.column}`)
+        PARTITION BY {scheme.partition_by()} ({scheme.definitions(first, last)})
+    """)
+    logger.info("Partitioned %s by %s on %s from %s", table, scheme.period, scheme.column, first)
+    return True
+
+
+def maintain_partitions(cursor, table, scheme, today=None, archive=False):
+    """Create partitions ahead and apply retention; returns {'added': [...], 'removed': [...]}."""
+    today = today or date.today()
+    names = partition_names(cursor, table)
+    if not names:
+        raise RuntimeError(f"{table} is not partitioned; run the migrations first")
+    starts = sorted(start for start in map(scheme.parse, names) if start is not None)
+
+    added = []
+    last = scheme.shift(scheme.start(today), scheme.ahead)
+    first_new = scheme.shift(starts[-1], 1) if starts else scheme.start(today)
+    if first_new <= last:
+        cursor.execute(f"""
+            ALTER TABLE `{table}` REORGANIZE PARTITION {FUTURE_PARTITION}
+            INTO ({scheme.definitions(first_new, last)})
+        """)
+        start = first_new
+        while start <= last:
+            added.append(scheme.name(start))
+            start = scheme.shift(start, 1)
+
+    removed = []
+    if scheme.retention is not None:
+        cutoff = scheme.shift(scheme.start(today), -scheme.retention)
+        # Never remove the last period partition: pfuture must keep a lower bound
+        for start in starts[:-1]:
+            if scheme.shift(start, 1) > cutoff:
+                break
+            name = scheme.name(start)
+            if archive:
+                archive_partition(cursor, table, name)
+            cursor.execute(f"ALTER TABLE `{table}` DROP PARTITION {name}")
+            removed.append(name)
+
+    if added or removed:
+        logger.info("Partitions of %s: added %s, %s %s", table, added,
+                    'archived' if archive else 'dropped', removed)
+    return {'added': added, 'removed': removed}
+
+
+def archive_partition(cursor, table, name):
+    """Move a partition's rows into <table>_archive_<name> without copying them."""
+    archive = f"{table}_archive_{name}"
+    cursor.execute(f"SELECT 1 FROM `{table}` PARTITION ({name}) LIMIT 1")
+    if not cursor.fetchall():
+        return  # nothing to keep, or an earlier run already moved the rows
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS `{archive}` LIKE `{table}`")
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    """, (archive,))
+    if cursor.fetchone()[0]:
+        cursor.execute(f"ALTER TABLE `{archive}` REMOVE PARTITIONING")
+    cursor.execute(f"ALTER TABLE `{table}` EXCHANGE PARTITION {name} WITH TABLE `{archive}`")
+
+
+def maintain_all(cursor, today=None):
+    """maintain_partitions for every table in PARTITIONED_TABLES; returns {table: result}.
+
+    Only login_logs has a retention period, so LOGIN_LOGS_ARCHIVE only affects it.
+    """
+    return {
+        table: maintain_partitions(cursor, table, scheme, today, archive=LOGIN_LOGS_ARCHIVE)
+        for table, scheme in PARTITIONED_TABLES.items()
+    }
@@ -0,0 +1,231 @@
+"""Pre-forking WSGI launcher used by `python server.py serve` / `flask serve`.
+
+The master binds the listening socket once, with the app already imported,
+and forks worker processes that accept on that shared socket. Each worker
+serves requests on a fixed number of threads and only accepts a new
+connection when one of them is free, so idle workers pick up the load.
+
+Signals to the master:
+    SIGTERM / SIGINT  drain: workers finish in-flight requests, then exit
+    SIGHUP            reload: re-exec the master with fresh code on the same
+                      socket, start new workers, then drain the old ones
+    SIGTTIN / SIGTTOU add / remove one worker
+
+A worker that dies is replaced. Workers still busy after `graceful_timeout`
+seconds of a drain are killed.
+"""
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+LISTEN_FD_ENV = 'PREFORK_LISTEN_FD'
+OLD_WORKERS_ENV = 'PREFORK_OLD_WORKERS'
+RESPAWN_BACKOFF = 1.0  # seconds to wait before replacing a worker that died on startup
+
+logger = logging.getLogger('prefork')
+
+
+class ThreadPoolWSGIServer(BaseWSGIServer):
+    """WSGI server that handles each connection on one of `threads` threads."""
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host, port, app, threads, keepalive_timeout=5, fd=None):
+        # Idle keep-alive connections are closed after keepalive_timeout so they
+        # neither pin a thread nor hold up a drain
+        handler = type('RequestHandler', (WSGIRequestHandler,), {'timeout': keepalive_timeout})
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+        # Held while a connection is being served; accept() waits for a free thread
+        # so a busy worker leaves new connections to the others
+        self._free_threads = threading.Semaphore(threads)
+
+    def get_request(self):
+        self._free_threads.acquire()
+        try:
+            return super().get_request()
+        except BaseException:
+            # Includes BlockingIOError when another worker won the accept
+            self._free_threads.release()
+            raise
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._free_threads.release()
+
+    def drain(self):
+        """Wait for in-flight requests once serve_forever has returned."""
+        self._executor.shutdown(wait=True)
+
+
+class PreforkServer:
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=None, threads=8,
+                 keepalive_timeout=5, graceful_timeout=30, pre_fork=None, post_fork=None, worker_exit=None,
+                 reload_check=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.num_workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.keepalive_timeout = keepalive_timeout
+        self.graceful_timeout = graceful_timeout
+        self.pre_fork = pre_fork        # in the master, before each fork
+        self.post_fork = post_fork      # in the worker, before it accepts requests
+        self.worker_exit = worker_exit  # in the worker, after it has drained
+        self.reload_check = reload_check  # argv that must exit 0 before a reload
+        self.workers = {}  # pid -> start time
+        self.retiring = set()
+        self.sock = None
+        self._signals = []
+
+    # Master
+
+    def run(self):
+        self.sock = self._listen()
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, self._queue_signal)
+        logger.info("Master %s listening on %s:%s with %s workers x %s threads",
+                    os.getpid(), self.host, self.port, self.num_workers, self.threads)
+
+        self._spawn_missing()
+        # After a reload, drain the workers the previous code started
+        old_workers = os.environ.pop(OLD_WORKERS_ENV, '')
+        for pid in filter(None, old_workers.split(',')):
+            self._terminate(int(pid))
+
+        while True:
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    self._stop()
+                    return
+                if signum == signal.SIGHUP:
+                    self._reload()
+                elif signum == signal.SIGTTIN:
+                    self.num_workers += 1
+                elif signum == signal.SIGTTOU and self.num_workers > 1:
+                    self.num_workers -= 1
+                    self._terminate(max(self.workers, key=self.workers.get))
+            self._reap()
+            self._spawn_missing()
+            time.sleep(0.5)
+
+    def _queue_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def _listen(self):
+        inherited = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited is not None:
+            sock = socket.socket(fileno=int(inherited))
+            sock.set_inheritable(False)
+        else:
+            family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+            sock = socket.create_server((self.host, self.port), family=family, backlog=2048)
+        # Every worker is woken for a new connection; the losers must not block in accept()
+        sock.setblocking(False)
+        return sock
+
+    def _spawn_missing(self):
+        while len(self.workers) < self.num_workers:
+            if self.pre_fork:
+                self.pre_fork()
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker()  # never returns
+            self.workers[pid] = time.monotonic()
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.discard(pid)
+            started = self.workers.pop(pid, None)
+            if started is not None:
+                logger.warning("Worker %s exited with status %s; replacing it", pid, status)
+                if time.monotonic() - started < RESPAWN_BACKOFF:
+                    time.sleep(RESPAWN_BACKOFF)
+
+    def _terminate(self, pid):
+        self.workers.pop(pid, None)
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.retiring.discard(pid)
+
+    def _stop(self):
+        logger.info("Draining %s workers", len(self.workers) + len(self.retiring))
+        for pid in list(self.workers):
+            self._terminate(pid)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.retiring and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self.retiring:
+            logger.warning("Worker %s did not drain in %ss; killing it", pid, self.graceful_timeout)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.sock.close()
+
+    def _reload(self):
+        """Re-exec the master on the same socket; the new master retires our workers."""
+        if self.reload_check and subprocess.run(self.reload_check).returncode != 0:
+            logger.error("Reload aborted: the new code failed to import")
+            return
+        logger.info("Reloading master %s", os.getpid())
+        self.sock.set_inheritable(True)
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[OLD_WORKERS_ENV] = ','.join(str(pid) for pid in [*self.workers, *self.retiring])
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+
+    # Worker
+
+    def _run_worker(self):
+        status = 0
+        try:
+            for signum in (signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+                signal.signal(signum, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if self.post_fork:
+                self.post_fork()
+
+            server = ThreadPoolWSGIServer(self.host, self.port, self.app, self.threads,
+                                          self.keepalive_timeout, fd=self.sock.fileno())
+            # shutdown() blocks until serve_forever returns, so call it off the main thread
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+            server.serve_forever()
+            server.drain()
+            if self.worker_exit:
+                self.worker_exit()
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+
+def serve(app, **options):
+    PreforkServer(app, **options).run()
@@ -0,0 +1,87 @@
+"""Declarative row mapping: a resource lists its columns, converters and output names once.
+
+A RowMapper compiles its columns into one function that turns a result
+tuple from a plain (non-dictionary) cursor into the response dict, so a
+listing neither builds an intermediate dict per row nor loops over the rows
+again to convert them:
+
+    TOUR_ROWS = RowMapper([Column('id', convert=str), 'park_name', 'created_at'])
+    VISITOR_TOURS = TOUR_ROWS.view(camel=True)     # {'id': '7', 'parkName': ..., 'createdAt': ...}
+
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {VISITOR_TOURS.select_list} FROM tours WHERE email = %s", (email,))
+    tours = VISITOR_TOURS.map(cursor.fetchall())
+
+Converters are not called for NULL; the column's default (None unless
+given) is used instead. Values without a converter are passed through as
+fetched; dates, times and Decimals are written by the JSON provider.
+"""
+
+
+def camel_case(name):
+    """'park_name' -> 'parkName'"""
+    first, *rest = name.split('_')
+    return first + ''.join(part.capitalize() for part in rest)
+
+
+class Column:
+    def __init__(self, name, convert=None, alias=None, default=None, sql=None):
+        self.name = name          # key used to refer to the column, e.g. in KeysetPage
+        self.convert = convert    # callable applied to non-NULL values
+        self.alias = alias        # output key; defaults to name
+        self.default = default    # output value for NULL
+        self.sql = sql or name    # select expression, e.g. "b.created_at" or "CONCAT(...)"
+
+    @property
+    def output(self):
+        return self.alias or self.name
+
+    def replace(self, **changes):
+        fields = dict(vars(self), **changes)
+        return Column(**fields)
+
+
+class RowMapper:
+    def __init__(self, columns, camel=False):
+        self.columns = [column if isinstance(column, Column) else Column(column) for column in columns]
+        if camel:
+            self.columns = [column if column.alias else column.replace(alias=camel_case(column.name))
+                            for column in self.columns]
+        self.positions = {column.name: position for position, column in enumerate(self.columns)}
+        self.select_list = ', '.join(column.sql for column in self.columns)
+        self.map_row = self._compile()
+
+    def _compile(self):
+        """Build `def map_row(row): return {...}` with one entry per column, reading by position."""
+        namespace = {}
+        entries = []
+        for position, column in enumerate(self.columns):
+            value = f"row[{position}]"
+            if column.convert is not None or column.default is not None:
+                namespace[f'convert_{position}'] = column.convert or (lambda value: value)
+                namespace[f'default_{position}'] = column.default
+                value = f"(default_{position} if {value} is None else convert_{position}({value}))"
+            entries.append(f"{column.output!r}: {value}")
+        source = "def map_row(row):\n    return {" + ", ".join(entries) + "}\n"
+        exec(source, namespace)
+        return namespace['map_row']
+
+    def view(self, *names, camel=False, **converters):
+        """Mapper over a subset of the columns (all by default), in the order given.
+
+        Keyword arguments replace a column's converter, e.g. view(id=str).
+        """
+        columns = [self.columns[self.positions[name]] for name in names] if names else self.columns
+        columns = [column.replace(convert=converters[column.name]) if column.name in converters else column
+                   for column in columns]
+        return RowMapper(columns, camel)
+
+    def index(self, name):
+        """Position of a column in the result tuple."""
+        return self.positions[name]
+
+    def map(self, rows):
+        return list(map(self.map_row, rows))
+
+    def one(self, row):
+        return None if row is None else self.map_row(row)
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_app_context, has_request_context, Response, stream_with_context, send_file, send_from_directory
 import mysql.connector
 from mysql.connector import Error
 import os
@@ -8,26 +8,63 @@ from flask_cors import CORS
 import random
 import hashlib
 import jwt
-from functools import wraps
+from functools import wraps, lru_cache
 import bcrypt
 import os
 import re
+import json
+import base64
+import csv
+import mimetypes
+import io
+from decimal import Decimal
+import sys
+import importlib.util
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, time as epoch_time
 from dotenv import load_dotenv
+from attachments import ContentStore, ATTACHMENT_FOLDER, UploadTooLarge, guess_mime_type
+import prefork
+import partitions
+import applog
+from jsonprovider import FastJSONProvider, CONVERTED_TYPES, json_default
+from rowmap import RowMapper, Column
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it avatars are served at their original size
+    Image = None
 
 
 app = Flask(__name__)
+# Serialises datetime, date, TIME and Decimal row values itself; see jsonprovider.py
+app.json = FastJSONProvider(app)
 app.config['UPLOAD_FOLDER'] = 'uploads'
+# Let a fronting nginx/Apache serve attachment downloads when it is configured to
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE') == '1'
 
 load_dotenv()
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'x7k9p2m4q8v5n3j6h1t0r2y5u8w3z6b9')
+# Upper bound for any request body, chunked or not; Werkzeug answers 413 past it
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+
+# JSON lines written by a background thread; see applog.py for LOG_* settings
+applog.configure_logging()
+logger = logging.getLogger('server')
+auth_logger = logging.getLogger('auth')
 
 
 # Allow specific origins
+CORS_ORIGINS = ["http://localhost:8081", "http://127.0.0.1:8081", "http://localhost:8080",  "http://127.0.0.1:8080","http://localhost:8082",  "http://127.0.0.1:8082", "http://localhost:8083",  "http://127.0.0.1:8083", "http://localhost:5000", "http://127.0.0.1:5000"]
 CORS(app, resources={
     r"/api/*": {
-        "origins": ["http://localhost:8081", "http://127.0.0.1:8081", "http://localhost:8080",  "http://127.0.0.1:8080","http://localhost:8082",  "http://127.0.0.1:8082", "http://localhost:8083",  "http://127.0.0.1:8083", "http://localhost:5000", "http://127.0.0.1:5000"],
+        "origins": CORS_ORIGINS,
         "methods": ["GET", "POST", "OPTIONS", "PUT", "DELETE"],  # Added DELETE to allowed methods
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key"]
     }
 })
 
@@ -40,89 +77,1456 @@ db_config = {
     'port': 3306
 }
 
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+DB_POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', 30))
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when no database connection can be obtained."""
+
+
+def record_db_time(seconds, statements=0):
+    """Add to the current request's SQL statement count and DB time."""
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + statements
+        g.db_seconds = g.get('db_seconds', 0.0) + seconds
+
+
+# Statements slower than this are logged; the same statement run more than
+# REPEATED_QUERY_THRESHOLD times in one request is flagged as a likely N+1 loop
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', 10))
+sql_logger = logging.getLogger('sql')
+
+SQL_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+SQL_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+SQL_VALUE_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(operation):
+    """Statement text with literals and placeholder lists folded, for grouping and logging."""
+    if isinstance(operation, bytes):
+        operation = operation.decode('utf-8', 'replace')
+    sql = ' '.join(operation.split())
+    sql = SQL_STRING_LITERAL.sub('?', sql)
+    sql = SQL_NUMBER_LITERAL.sub('?', sql)
+    return SQL_VALUE_LIST.sub('(...)', sql)
+
+
+def param_shape(params):
+    """Types of the bound parameters, never their values."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+class QueryRecorder:
+    """Normalized statements run while the recorder is active, in any thread.
+
+    For asserting query counts per endpoint in tests:
+
+        with record_queries() as queries:
+            client.get('/api/finance/budgets', headers=auth)
+        assert queries.count() <= 3 and not queries.repeated()
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def count(self, fragment=None):
+        return sum(1 for sql in self.statements if fragment is None or fragment in sql)
+
+    def repeated(self, threshold=REPEATED_QUERY_THRESHOLD):
+        """{sql: runs} for statements run more than threshold times."""
+        counts = {}
+        for sql in self.statements:
+            counts[sql] = counts.get(sql, 0) + 1
+        return {sql: runs for sql, runs in counts.items() if runs > threshold}
+
+
+_query_recorders = []
+_query_recorders_lock = threading.Lock()
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with _query_recorders_lock:
+        _query_recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        with _query_recorders_lock:
+            _query_recorders.remove(recorder)
+
+
+def observe_statement(operation, params, seconds, batch=False):
+    """Account one executed statement: request counters, recorders, slow and repeat logs."""
+    record_db_time(seconds, 1)
+    sql = normalize_sql(operation)
+    if _query_recorders:
+        with _query_recorders_lock:
+            for recorder in _query_recorders:
+                recorder.statements.append(sql)
+
+    endpoint = request.endpoint if has_request_context() else None
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        if batch:
+            shape = {'rows': len(params), 'row': param_shape(params[0]) if params else None}
+        else:
+            shape = param_shape(params)
+        sql_logger.warning(json.dumps({
+            'event': 'slow_query', 'ms': round(seconds * 1000, 1),
+            'endpoint': endpoint, 'sql': sql, 'params': shape,
+        }))
+
+    if has_request_context():
+        counts = g.setdefault('sql_counts', {})
+        counts[sql] = counts.get(sql, 0) + 1
+        if counts[sql] == REPEATED_QUERY_THRESHOLD + 1:
+            sql_logger.warning(json.dumps({
+                'event': 'repeated_query', 'endpoint': endpoint, 'sql': sql,
+                'runs': counts[sql], 'method': request.method, 'path': request.path,
+            }))
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that times statements and fetches against the current request.
+
+    Installed by PooledConnection.cursor(), so every connection from
+    get_db_connection() gets one. See observe_statement for what is recorded.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._raw.close()
+
+    def _timed_fetch(self, method, *args, **kwargs):
+        start = monotonic()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_db_time(monotonic() - start)
+
+    def execute(self, operation, params=None, **kwargs):
+        start = monotonic()
+        try:
+            return self._raw.execute(operation, params, **kwargs)
+        finally:
+            observe_statement(operation, params, monotonic() - start)
+
+    def executemany(self, operation, seq_params, **kwargs):
+        seq_params = list(seq_params)
+        start = monotonic()
+        try:
+            return self._raw.executemany(operation, seq_params, **kwargs)
+        finally:
+            observe_statement(operation, seq_params, monotonic() - start, batch=True)
+
+    def fetchone(self):
+        return self._timed_fetch(self._raw.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed_fetch(self._raw.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed_fetch(self._raw.fetchall)
+
+
+class PooledConnection:
+    """A connection checked out of ConnectionPool.
+
+    Behaves like the underlying mysql.connector connection, except that
+    close() hands it back to the pool instead of disconnecting.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise DatabaseUnavailable("Connection has already been returned to the pool")
+        return getattr(self._raw, name)
+
+    def is_connected(self):
+        # Liveness is checked on checkout, so skip the ping round trip here
+        return self._raw is not None
+
+    def cursor(self, *args, **kwargs):
+        if self._raw is None:
+            raise DatabaseUnavailable("Connection has already been returned to the pool")
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._created_at)
+
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool.
+
+    Keeps up to `size` idle connections and opens up to `max_overflow` extra
+    ones under bursts. Connections older than `recycle` seconds are replaced,
+    and connections idle for longer than `ping_after` seconds are pinged
+    before being handed out.
+    """
+
+    def __init__(self, config, size=10, max_overflow=10, timeout=5.0, recycle=1800.0, ping_after=30.0):
+        self.config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._idle = []  # (raw, created_at, last_used), most recently used last
+        self._open = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._counters = {
+            'created': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+        }
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def connect(self):
+        """Check out a connection, waiting up to `timeout` seconds for a free slot."""
+        start = monotonic()
+        entry = self._acquire_slot(start + self.timeout)
+        try:
+            if entry is None:
+                raw, created_at = self._new_raw()
+            else:
+                raw, created_at = self._validate(*entry)
+        except Error as e:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise DatabaseUnavailable(f"The error '{e}' occurred") from e
+
+        elapsed = monotonic() - start
+        with self._cond:
+            self._in_use += 1
+            self._counters['checkouts'] += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+        return PooledConnection(self, raw, created_at)
+
+    def _acquire_slot(self, deadline):
+        """Pop an idle connection, or reserve a slot for a new one (returns None)."""
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    return None
+                if not waited:
+                    waited = True
+                    self._counters['waits'] += 1
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise DatabaseUnavailable(
+                        f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                self._cond.wait(remaining)
+
+    def _new_raw(self):
+        raw = mysql.connector.connect(**self.config)
+        with self._cond:
+            self._counters['created'] += 1
+        return raw, monotonic()
+
+    def _validate(self, raw, created_at, last_used):
+        now = monotonic()
+        if now - created_at > self.recycle:
+            self._discard(raw, 'recycled')
+            return self._new_raw()
+        if now - last_used > self.ping_after:
+            try:
+                raw.ping(reconnect=False)
+            except Error:
+                self._discard(raw, 'discarded')
+                return self._new_raw()
+        return raw, created_at
+
+    def _discard(self, raw, counter):
+        with self._cond:
+            self._counters[counter] += 1
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _release(self, raw, created_at):
+        # End any open transaction so the next borrower starts from a clean snapshot
+        healthy = True
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.size:
+                self._idle.append((raw, created_at, monotonic()))
+                raw = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw, 'discarded')
+
+    def dispose(self):
+        """Close every idle connection; checked-out connections close on release."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _, _ in idle:
+            self._discard(raw, 'discarded')
+
+    def stats(self):
+        """Return a snapshot of pool usage and checkout latency."""
+        with self._cond:
+            checkouts = self._counters['checkouts']
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                **self._counters,
+                'checkout_ms_avg': round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'checkout_ms_max': round(self._checkout_time_max * 1000, 3),
+            }
+
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(
+                    db_config,
+                    size=DB_POOL_SIZE,
+                    max_overflow=DB_POOL_MAX_OVERFLOW,
+                    timeout=DB_POOL_TIMEOUT,
+                    recycle=DB_POOL_RECYCLE,
+                    ping_after=DB_POOL_PING_AFTER,
+                )
+    return _db_pool
+
+
 def get_db_connection():
+    """Borrow a connection from the pool; connection.close() returns it.
+
+    Raises DatabaseUnavailable when no connection can be obtained.
+    """
+    connection = get_db_pool().connect()
+    if has_app_context():
+        # Tracked so teardown can return it if a route exits before closing it
+        g.setdefault('_db_connections', []).append(connection)
+    return connection
+
+
+@app.teardown_request
+def release_db_connections(exc):
+    for connection in g.pop('_db_connections', []):
+        connection.close()
+
+
+# Request metrics, exposed in Prometheus text format at /api/admin/metrics.
+# Counters live in each worker process; under `serve` every worker reports its own.
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class RequestMetrics:
+    """Per-endpoint latency and query-count histograms, status counts and DB time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}     # (endpoint, method) -> Histogram
+        self.queries = {}     # endpoint -> Histogram of statements per request
+        self.db_seconds = {}  # endpoint -> total seconds spent in the database
+        self.responses = {}   # (endpoint, method, status) -> count
+
+    def observe(self, endpoint, method, status, seconds, queries, db_seconds):
+        with self._lock:
+            self.latency.setdefault((endpoint, method), Histogram(METRICS_LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(endpoint, Histogram(METRICS_QUERY_BUCKETS)).observe(queries)
+            self.db_seconds[endpoint] = self.db_seconds.get(endpoint, 0.0) + db_seconds
+            key = (endpoint, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        lines = []
+
+        def histogram(name, help_text, series):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram"])
+            for labels, hist in series:
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+                lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {hist.count}")
+                lines.append(f"{name}_sum{format_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{format_labels(labels)} {hist.count}")
+
+        with self._lock:
+            histogram('park_http_request_duration_seconds', 'Request latency by endpoint.',
+                      [({'endpoint': e, 'method': m}, h) for (e, m), h in sorted(self.latency.items())])
+            lines.extend(["# HELP park_http_responses_total Responses by endpoint and status code.",
+                          "# TYPE park_http_responses_total counter"])
+            for (endpoint, method, status), count in sorted(self.responses.items()):
+                labels = {'endpoint': endpoint, 'method': method, 'status': status}
+                lines.append(f"park_http_responses_total{format_labels(labels)} {count}")
+            histogram('park_http_request_db_queries', 'SQL statements run per request.',
+                      [({'endpoint': e}, h) for e, h in sorted(self.queries.items())])
+            lines.extend(["# HELP park_http_request_db_seconds_total Time spent in the database by endpoint.",
+                          "# TYPE park_http_request_db_seconds_total counter"])
+            for endpoint, seconds in sorted(self.db_seconds.items()):
+                lines.append(f"park_http_request_db_seconds_total{format_labels({'endpoint': endpoint})} {seconds}")
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = monotonic()
+
+
+@app.before_request
+def assign_request_id():
+    """Tag the request's log records with the caller's X-Request-ID, or a new one."""
+    request_id = request.headers.get('X-Request-ID', '')
+    g.request_id = request_id if REQUEST_ID_PATTERN.match(request_id) else os.urandom(8).hex()
+    g.request_id_token = applog.request_id_var.set(g.request_id)
+
+
+@app.teardown_request
+def clear_request_id(exc):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        applog.request_id_var.reset(token)
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed until their generator is returned, not drained
+    started = g.get('request_started')
+    if started is not None:
+        request_metrics.observe(
+            request.endpoint or 'unmatched',
+            request.method,
+            response.status_code,
+            monotonic() - started,
+            g.get('db_queries', 0),
+            g.get('db_seconds', 0.0),
+        )
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+@app.errorhandler(413)
+def handle_request_too_large(e):
+    return jsonify({"error": "Request body is too large"}), 413
+
+
+@app.errorhandler(DatabaseUnavailable)
+def handle_database_unavailable(e):
+    logger.error("Database unavailable: %s", e)
+    return jsonify({"error": "Database connection failed"}), 503
+
+
+# Schema migrations: version 1 is the SQL dump, later versions live in migrations/NNNN_name.sql,
+# or migrations/NNNN_name.py defining migrate(cursor) for data moves SQL cannot do
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_SCHEMA = os.path.join(BACKEND_DIR, 'newpark_conservation.sql')
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, 'migrations')
+MIGRATION_LOCK_NAME = 'park_conservation_migrations'
+
+
+def load_migrations():
+    """Return (version, name, path) for every migration, ordered by version."""
+    migrations = [(1, 'baseline', BASELINE_SCHEMA)]
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = re.match(r'^(\d+)_(\w+)\.(sql|py)$', filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version numbers in migrations/")
+    return migrations
+
+
+def split_sql_statements(sql):
+    """Split a SQL script into statements on lines ending with ';', dropping comment lines."""
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        if stripped.endswith(';'):
+            statements.append('\n'.join(current).rstrip()[:-1])
+            current = []
+    if current:
+        statements.append('\n'.join(current))
+    return statements
+
+
+def run_migrations():
+    """Apply pending migrations in order and return the versions that were applied."""
+    connection = get_db_connection()
+    cursor = connection.cursor()
     try:
-        connection = mysql.connector.connect(**db_config)
-        return connection
-    except Error as f:
-        return(f"The error '{f}' occurred")
+        # Serialise concurrent startups so each migration runs exactly once
+        cursor.execute("SELECT GET_LOCK(%s, 60)", (MIGRATION_LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Timed out waiting for the migration lock")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version int(11) NOT NULL PRIMARY KEY,
+                name varchar(255) NOT NULL,
+                applied_at timestamp NOT NULL DEFAULT current_timestamp()
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_version")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        if not applied:
+            # A database imported by hand from the dump already has the baseline schema
+            cursor.execute("SHOW TABLES LIKE 'admintable'")
+            if cursor.fetchone():
+                cursor.execute("INSERT INTO schema_version (version, name) VALUES (1, 'baseline')")
+                connection.commit()
+                applied.add(1)
+
+        newly_applied = []
+        for version, name, path in load_migrations():
+            if version in applied:
+                continue
+            logger.info("Applying migration %04d_%s", version, name)
+            if path.endswith('.py'):
+                spec = importlib.util.spec_from_file_location(f"migration_{version:04d}", path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                module.migrate(cursor)
+            else:
+                with open(path, encoding='utf-8') as f:
+                    statements = split_sql_statements(f.read())
+                for statement in statements:
+                    cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+            connection.commit()
+            newly_applied.append(version)
+        return newly_applied
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending database migrations."""
+    applied = run_migrations()
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+
+
+class InvalidYear(ValueError):
+    """Raised for a ?year= outside the years a date range can be built for."""
+
+
+@app.errorhandler(InvalidYear)
+def handle_invalid_year(e):
+    return jsonify({"error": str(e)}), 400
+
+
+def year_range(column, year):
+    """WHERE condition keeping one calendar year of column ('1=1' for None) and its params.
+
+    Written as a half-open range rather than YEAR(column) = %s so it uses
+    indexes and prunes the yearly partitions of donations and tours.
+    """
+    if year is None:
+        return "1=1", []
+    if not 1 <= year <= 9998:  # date(year + 1, 1, 1) must exist
+        raise InvalidYear("year must be between 1 and 9998")
+    return f"{column} >= %s AND {column} < %s", [date(year, 1, 1), date(year + 1, 1, 1)]
+
+
+# Keyset (cursor) pagination for list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed limit or cursor query parameter."""
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque URL-safe token."""
+    payload = json.dumps([
+        value.isoformat(sep=' ') if isinstance(value, datetime) else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise InvalidPageRequest("Invalid cursor")
+    if (not isinstance(values, list) or len(values) != length
+            or not all(isinstance(value, (str, int)) for value in values)):
+        raise InvalidPageRequest("Invalid cursor")
+    return values
+
+
+class KeysetPage:
+    """One page of a listing sorted descending on `columns`, e.g. (created_at, id).
+
+    Pagination is opt-in: unless the client sends ?limit= or ?cursor= the page
+    is disabled, the query is unbounded and the endpoint returns its plain list.
+    """
+
+    def __init__(self, columns=('created_at', 'id'), limit=None, after=None):
+        self.columns = columns
+        self.row_keys = [column.split('.')[-1] for column in columns]
+        self.enabled = limit is not None
+        self.limit = limit
+        self.after = after
+
+    @classmethod
+    def from_request(cls, columns=('created_at', 'id'), args=None):
+        """Page described by the query string; args defaults to request.args."""
+        args = request.args if args is None else args
+        raw_limit = args.get('limit')
+        raw_cursor = args.get('cursor')
+        if raw_limit is None and raw_cursor is None:
+            return cls(columns)
+        try:
+            limit = int(raw_limit) if raw_limit is not None else DEFAULT_PAGE_SIZE
+        except ValueError:
+            raise InvalidPageRequest("limit must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise InvalidPageRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        after = decode_cursor(raw_cursor, len(columns)) if raw_cursor else None
+        return cls(columns, limit, after)
+
+    def where(self):
+        """Condition selecting the rows after the cursor ('1=1' on the first page) and its params."""
+        if self.after is None:
+            return "1=1", []
+        # (a, b) < (x, y) written out as a < x OR (a = x AND b < y) so it range-scans the index
+        condition = f"{self.columns[-1]} < %s"
+        params = [self.after[-1]]
+        for column, value in zip(reversed(self.columns[:-1]), reversed(self.after[:-1])):
+            condition = f"({column} < %s OR ({column} = %s AND {condition}))"
+            params = [value, value] + params
+        return condition, params
+
+    def order_limit(self):
+        """ORDER BY (and LIMIT, one extra row to detect a next page) and its params."""
+        order_by = "ORDER BY " + ", ".join(f"{column} DESC" for column in self.columns)
+        if not self.enabled:
+            return order_by, []
+        return f"{order_by} LIMIT %s", [self.limit + 1]
+
+    def paginate(self, rows, mapper=None):
+        """Trim the extra row and return (rows, next_cursor); call before formatting the rows.
+
+        Given a RowMapper, rows are tuples from a plain cursor and are returned mapped.
+        """
+        next_cursor = None
+        if self.enabled and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            if mapper is not None:
+                next_cursor = encode_cursor([last[mapper.index(key)] for key in self.row_keys])
+            else:
+                next_cursor = encode_cursor([last[key] for key in self.row_keys])
+        if mapper is not None:
+            rows = mapper.map(rows)
+        return rows, next_cursor
+
+    def response(self, rows, next_cursor):
+        if not self.enabled:
+            return rows
+        return {"items": rows, "next_cursor": next_cursor}
+
+
+@app.errorhandler(InvalidPageRequest)
+def handle_invalid_page_request(e):
+    return jsonify({"error": str(e)}), 400
+
+
+# Listed resources: columns, converters and output names are declared once per
+# resource and endpoints select a view of them (see rowmap.py). Rows are read
+# from plain cursors and mapped straight from the result tuples.
+TOUR_ROWS = RowMapper([
+    'id', 'park_name', 'tour_name', 'date', 'time', 'guests', 'amount',
+    'first_name', 'last_name', 'email', 'phone', 'special_requests', 'created_at',
+])
+DONATION_ROWS = RowMapper([
+    'id', 'donation_type', 'amount', 'park_name', 'first_name', 'last_name',
+    'email', 'message', 'is_anonymous', 'created_at',
+])
+SERVICE_ROWS = RowMapper([
+    'id', 'first_name', 'last_name', 'email', 'phone', 'company_type',
+    'provided_service', 'company_name', 'tax_id', 'status', 'created_at',
+])
+BUDGET_ROWS = RowMapper([
+    Column('id', str, sql='b.id'),
+    Column('title', sql='b.title'),
+    Column('fiscal_year', sql='b.fiscal_year'),
+    Column('total_amount', sql='b.total_amount'),
+    Column('park_name', sql='b.park_name'),
+    Column('status', sql='b.status'),
+    Column('created_at', datetime.isoformat, sql='b.created_at'),
+    Column('created_by', alias='created_by', sql='b.created_by'),
+    Column('description', sql='b.description'),
+    Column('created_by_name', default='Unknown', sql="CONCAT(fo.first_name, ' ', fo.last_name)"),
+], camel=True)
+BUDGET_ITEM_ROWS = RowMapper(['id', 'budget_id', 'category', 'description', 'amount', 'type'])
+
+VISITOR_DONATIONS = DONATION_ROWS.view(camel=True)
+VISITOR_TOURS = TOUR_ROWS.view(
+    'id', 'park_name', 'tour_name', 'date', 'time', 'guests', 'amount',
+    'first_name', 'last_name', 'email', 'special_requests', 'created_at', camel=True
+)
+VISITOR_SERVICES = SERVICE_ROWS.view(camel=True)
+# The finance officer's own budgets, read from budgets alone
+OFFICER_BUDGETS = BUDGET_ROWS.view('id', 'title', 'fiscal_year', 'total_amount', 'park_name', 'status', 'created_at')
+# Item shapes: as stored, with string ids for the review screens, and without type for reports
+REVIEW_BUDGET_ITEMS = BUDGET_ITEM_ROWS.view(id=str)
+REPORT_BUDGET_ITEMS = BUDGET_ITEM_ROWS.view('id', 'budget_id', 'category', 'description', 'amount')
+OFFICER_BUDGET_ITEMS = REPORT_BUDGET_ITEMS.view(id=str)
+
+
+# park_financial_summary holds per-park, per-year totals behind park-income / park-expenses.
+# Writers update it in the same transaction as the row they change; counts follow
+# the old aggregates: every donation and tour, and approved requests only.
+SUMMARY_REQUEST_TABLES = {
+    # table: (park column, summary column)
+    'fund_requests': ('parkname', 'fund_requests'),
+    'extra_funds_requests': ('park_name', 'extra_funds'),
+    'emergency_requests': ('park_name', 'emergency'),
+}
+
+SUMMARY_REBUILD_SQL = """
+    SELECT park_name, period_year,
+           SUM(donations) AS donations, SUM(tours) AS tours,
+           SUM(fund_requests) AS fund_requests, SUM(extra_funds) AS extra_funds,
+           SUM(emergency) AS emergency
+    FROM (
+        SELECT park_name, YEAR(created_at) AS period_year, amount AS donations, 0 AS tours,
+               0 AS fund_requests, 0 AS extra_funds, 0 AS emergency
+        FROM donations
+        UNION ALL
+        SELECT park_name, YEAR(created_at), 0, amount, 0, 0, 0
+        FROM tours
+        UNION ALL
+        SELECT parkname, YEAR(created_at), 0, 0, amount, 0, 0
+        FROM fund_requests WHERE status = 'approved'
+        UNION ALL
+        SELECT park_name, YEAR(created_at), 0, 0, 0, amount, 0
+        FROM extra_funds_requests WHERE status = 'approved'
+        UNION ALL
+        SELECT park_name, YEAR(created_at), 0, 0, 0, 0, amount
+        FROM emergency_requests WHERE status = 'approved'
+    ) AS totals
+    GROUP BY park_name, period_year
+"""
+SUMMARY_COLUMNS = ['donations', 'tours', 'fund_requests', 'extra_funds', 'emergency']
+
+
+def add_to_park_summary(connection, park_name, column, amount, period_year=None):
+    """Add amount to one summary column; the caller commits. period_year defaults to this year."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            INSERT INTO park_financial_summary (park_name, period_year, {column})
+            VALUES (%s, COALESCE(%s, YEAR(CURRENT_TIMESTAMP)), %s)
+            ON DUPLICATE KEY UPDATE {column} = {column} + VALUES({column})
+        """, (park_name, period_year, amount))
+    finally:
+        cursor.close()
+
+
+def lock_request_contribution(connection, table, request_id):
+    """Lock a request row and return the (park, year, amount) it adds to the summary.
+
+    Returns None for requests that are missing or not approved. Call before and
+    after changing a request, then pass both results to move_request_contribution.
+    """
+    park_column, _ = SUMMARY_REQUEST_TABLES[table]
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT {park_column}, YEAR(created_at), amount, status
+            FROM {table} WHERE id = %s FOR UPDATE
+        """, (request_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not row or row[3] != 'approved':
+        return None
+    return row[:3]
+
+
+def move_request_contribution(connection, table, before, after):
+    """Apply the summary change between two lock_request_contribution results."""
+    if before == after:
+        return
+    _, column = SUMMARY_REQUEST_TABLES[table]
+    if before:
+        park_name, period_year, amount = before
+        add_to_park_summary(connection, park_name, column, -amount, period_year)
+    if after:
+        park_name, period_year, amount = after
+        add_to_park_summary(connection, park_name, column, amount, period_year)
+
+
+def rebuild_park_financial_summary():
+    """Recompute park_financial_summary from the source tables.
+
+    Returns the (park, year) keys whose stored totals differed from the recomputed ones.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM park_financial_summary FOR UPDATE")
+        stored = {(row['park_name'], row['period_year']): row for row in cursor.fetchall()}
+        cursor.execute(SUMMARY_REBUILD_SQL)
+        fresh = {(row['park_name'], row['period_year']): row for row in cursor.fetchall()}
+
+        drifted = []
+        for key in sorted(set(stored) | set(fresh)):
+            old, new = stored.get(key), fresh.get(key)
+            if not old or not new or any(old[c] != new[c] for c in SUMMARY_COLUMNS):
+                drifted.append(key)
+
+        cursor.execute("DELETE FROM park_financial_summary")
+        cursor.execute(f"""
+            INSERT INTO park_financial_summary (park_name, period_year, {', '.join(SUMMARY_COLUMNS)})
+            {SUMMARY_REBUILD_SQL}
+        """)
+        connection.commit()
+        return drifted
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+@app.cli.command('rebuild-financial-summary')
+def rebuild_financial_summary_command():
+    """Recompute park_financial_summary and report rows that had drifted."""
+    drifted = rebuild_park_financial_summary()
+    print(f"Rebuilt park_financial_summary; corrected {len(drifted)} drifted rows: {drifted}"
+          if drifted else "Rebuilt park_financial_summary; no drift found")
+
+
+# Dashboard aggregates are cached per worker process for a short TTL and dropped
+# as soon as a write endpoint changes one of the tables they are computed from.
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', 30))
+
+# key: (ttl in seconds, tables the value is computed from)
+STATS_CACHE_KEYS = {
+    'admin_stats': (STATS_CACHE_TTL, {'tours', 'donations', 'admintable', 'parkstaff'}),
+    'government_stats': (STATS_CACHE_TTL, {'donations', 'tours', 'budgets', 'emergency_requests'}),
+    'officer_counts': (STATS_CACHE_TTL * 4, {'finance_officers', 'government_officers', 'auditors', 'parkstaff'}),
+}
+
+
+class StatsCache:
+    """Thread-safe TTL cache with hit/miss/invalidation counters per key."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped on invalidation so a value computed before a write is never stored after it
+        self._generations = {key: 0 for key in keys}
+        self._counters = {key: {'hits': 0, 'misses': 0, 'invalidations': 0} for key in keys}
+
+    def get(self, key, compute):
+        """Return the cached value for key, calling compute() to refresh it when missing or expired."""
+        hit, value, generation = self._lookup(key)
+        if hit:
+            return value
+        value = compute()
+        self._store(key, value, generation)
+        return value
+
+    async def get_async(self, key, compute):
+        """get() for the async entry point; compute is a coroutine function."""
+        hit, value, generation = self._lookup(key)
+        if hit:
+            return value
+        value = await compute()
+        self._store(key, value, generation)
+        return value
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > monotonic():
+                self._counters[key]['hits'] += 1
+                return True, entry[1], None
+            self._counters[key]['misses'] += 1
+            return False, None, self._generations[key]
+
+    def _store(self, key, value, generation):
+        ttl = self.keys[key][0]
+        with self._lock:
+            if self._generations[key] == generation:
+                self._entries[key] = (monotonic() + ttl, value)
+
+    def invalidate_tables(self, *tables):
+        """Drop every key computed from any of the given tables."""
+        with self._lock:
+            for key, (_, depends_on) in self.keys.items():
+                if depends_on.intersection(tables):
+                    self._entries.pop(key, None)
+                    self._generations[key] += 1
+                    self._counters[key]['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            now = monotonic()
+            result = {}
+            for key, counters in self._counters.items():
+                lookups = counters['hits'] + counters['misses']
+                entry = self._entries.get(key)
+                result[key] = dict(
+                    counters,
+                    hit_ratio=round(counters['hits'] / lookups, 3) if lookups else None,
+                    ttl=self.keys[key][0],
+                    cached=bool(entry and entry[0] > now),
+                )
+            return result
+
+
+stats_cache = StatsCache(STATS_CACHE_KEYS)
+
+# Retried POSTs carrying the same Idempotency-Key get the first response back
+# instead of writing another donation, tour or payment row.
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 2048))
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,100}$')
+
+
+class IdempotencyStore:
+    """Responses recorded under (endpoint, Idempotency-Key).
+
+    Rows in idempotency_keys are the source of truth; a bounded LRU of
+    completed responses sits in front so a retry storm is answered from memory.
+    A key is claimed with a row whose status_code is NULL before the handler
+    runs, so concurrent retries can't both reach the write path.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, endpoint, key):
+        """Return the remembered (request_hash, status_code, body), or None."""
+        with self._lock:
+            entry = self._entries.get((endpoint, key))
+            if entry is None or entry[0] <= monotonic():
+                self._entries.pop((endpoint, key), None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end((endpoint, key))
+            self.hits += 1
+            return entry[1]
+
+    def remember(self, endpoint, key, recorded, ttl):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[(endpoint, key)] = (monotonic() + ttl, recorded)
+            self._entries.move_to_end((endpoint, key))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def claim(self, endpoint, key, request_hash):
+        """Claim the key for this request.
+
+        Returns None when the caller now owns the key, otherwise what is
+        recorded for it: (request_hash, status_code, body), status_code being
+        None while the owning request is still running.
+        """
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                DELETE FROM idempotency_keys
+                WHERE endpoint = %s AND idempotency_key = %s AND expires_at <= NOW()
+            """, (endpoint, key))
+            cursor.execute("""
+                INSERT IGNORE INTO idempotency_keys (endpoint, idempotency_key, request_hash, expires_at)
+                VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+            """, (endpoint, key, request_hash, self.ttl))
+            if cursor.rowcount == 1:
+                connection.commit()
+                return None
+            cursor.execute("""
+                SELECT request_hash, status_code, response_body,
+                       TIMESTAMPDIFF(SECOND, NOW(), expires_at)
+                FROM idempotency_keys
+                WHERE endpoint = %s AND idempotency_key = %s
+            """, (endpoint, key))
+            row = cursor.fetchone()
+            connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
+        if row is None:
+            # Released between our insert and select; let the client retry
+            return (request_hash, None, None)
+        recorded = row[:3]
+        if recorded[1] is not None:
+            self.remember(endpoint, key, recorded, row[3])
+        return recorded
+
+    def complete(self, endpoint, key, request_hash, status_code, body):
+        """Record the response for a claimed key."""
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                UPDATE idempotency_keys SET status_code = %s, response_body = %s
+                WHERE endpoint = %s AND idempotency_key = %s
+            """, (status_code, body, endpoint, key))
+            connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
+        self.remember(endpoint, key, (request_hash, status_code, body), self.ttl)
+
+    def release(self, endpoint, key):
+        """Drop a claim whose request failed so a retry can run it again."""
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                DELETE FROM idempotency_keys
+                WHERE endpoint = %s AND idempotency_key = %s AND status_code IS NULL
+            """, (endpoint, key))
+            connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
+
+    def purge_expired(self):
+        """Delete expired rows; return how many were removed."""
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DELETE FROM idempotency_keys WHERE expires_at <= NOW()")
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL)
+
+
+def idempotent(f):
+    """Replay the recorded response when a request repeats its Idempotency-Key.
+
+    Requests without the header run as before. Server errors are not recorded,
+    so the client's next retry runs the handler again.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        if not IDEMPOTENCY_KEY_PATTERN.match(key):
+            return jsonify({"error": "Invalid Idempotency-Key header"}), 400
+
+        endpoint = request.endpoint
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        recorded = idempotency_store.cached(endpoint, key)
+        if recorded is None:
+            recorded = idempotency_store.claim(endpoint, key, request_hash)
+        if recorded is None:
+            try:
+                response = app.make_response(f(*args, **kwargs))
+            except Exception:
+                idempotency_store.release(endpoint, key)
+                raise
+            if response.status_code >= 500:
+                idempotency_store.release(endpoint, key)
+            else:
+                idempotency_store.complete(
+                    endpoint, key, request_hash, response.status_code, response.get_data(as_text=True)
+                )
+            return response
+
+        recorded_hash, status_code, body = recorded
+        if recorded_hash != request_hash:
+            return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+        if status_code is None:
+            return jsonify({"error": "A request with this Idempotency-Key is still being processed"}), 409
+        response = app.response_class(body, status=status_code, mimetype='application/json')
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+    return decorated
+
+
+@app.cli.command('purge-idempotency-keys')
+def purge_idempotency_keys_command():
+    """Delete expired Idempotency-Key records."""
+    print(f"Purged {idempotency_store.purge_expired()} expired idempotency keys")
 
 
 def generate_salt():
     return os.urandom(16).hex()
 
+# Shared by the single-record endpoints and the bulk ingestion endpoints
+DONATION_FIELDS = ['donationType', 'amount', 'parkName', 'firstName', 'lastName', 'email']
+DONATION_INSERT_SQL = '''
+    INSERT INTO donations (
+        donation_type, amount, park_name,
+        first_name, last_name, email,
+        message, is_anonymous
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+'''
+
+TOUR_FIELDS = ['parkName', 'tourName', 'date', 'time', 'guests', 'amount', 'firstName', 'lastName', 'email']
+TOUR_INSERT_SQL = '''
+    INSERT INTO tours (
+        park_name, tour_name, date, time, guests, amount,
+        first_name, last_name, email, special_requests,
+        status, created_at
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+'''
+VALID_TOUR_PURPOSES = {
+    'Wildlife Photography', 'Bird Watching', 'Hiking Adventure',
+    'Nature Trail Walking', 'Canopy Walk', 'Forest Exploration',
+    'Educational Tour', 'Research Visit', 'Cultural Experience',
+    'Waterfall Visit', 'Mountain Climbing', 'Camping',
+    'Animal Observation', 'Conservation Learning', 'School Field Trip'
+}
+TOUR_PRICE_PER_GUEST = 75
+
+
+def validate_donation(data):
+    """Check a donation submission; return (DONATION_INSERT_SQL values, None) or (None, error)."""
+    if not isinstance(data, dict) or not all(field in data for field in DONATION_FIELDS):
+        return None, {"error": "Missing required fields"}
+
+    # Validate amount
+    try:
+        donation_amount = float(data['amount'])
+    except (ValueError, TypeError):
+        return None, {"error": "Invalid donation amount"}
+    if donation_amount <= 0:
+        return None, {"error": "Donation amount must be positive"}
+
+    return (
+        data['donationType'],
+        donation_amount,
+        data['parkName'],
+        data['firstName'],
+        data['lastName'],
+        data['email'],
+        data.get('message') or '',
+        False  # is_anonymous
+    ), None
+
+
+def validate_tour_booking(data):
+    """Check a tour booking; return (TOUR_INSERT_SQL values, None) or (None, error)."""
+    if not isinstance(data, dict):
+        return None, {"error": "Missing required fields", "missing": TOUR_FIELDS}
+    missing_fields = [field for field in TOUR_FIELDS if field not in data]
+    if missing_fields:
+        return None, {"error": "Missing required fields", "missing": missing_fields}
+
+    # Validate tour purpose
+    tour_purpose = str(data['tourName']).strip()
+    if tour_purpose not in VALID_TOUR_PURPOSES:
+        return None, {
+            "error": "Invalid tour purpose",
+            "message": "Please select a valid tour purpose",
+            "valid_purposes": sorted(VALID_TOUR_PURPOSES)
+        }
+
+    # Validate guests and amount
+    try:
+        guests = int(data['guests'])
+        amount = int(data['amount'])
+    except (ValueError, TypeError):
+        return None, {"error": "Invalid guests or amount value"}
+    if guests < 1 or guests > 20:
+        return None, {"error": "Number of guests must be between 1 and 20"}
+    if amount != guests * TOUR_PRICE_PER_GUEST:
+        return None, {"error": f"Invalid amount: must be ${TOUR_PRICE_PER_GUEST} per guest"}
+
+    # Validate date and time
+    try:
+        tour_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        datetime.strptime(data['time'], '%H:%M')
+    except (ValueError, TypeError):
+        return None, {"error": "Invalid date or time format"}
+    if tour_date < datetime.now().date():
+        return None, {"error": "Tour date must be in the future"}
+
+    return (
+        data['parkName'],
+        tour_purpose,
+        data['date'],
+        data['time'],
+        guests,
+        amount,
+        data['firstName'],
+        data['lastName'],
+        data['email'],
+        data.get('specialRequests') or '',
+        'pending'
+    ), None
+
+
 @app.route('/api/donate', methods=['POST'])
+@idempotent
 def donate():
     """Handles donation submissions."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
+    cursor = None
+
     try:
         data = request.json
-        required_fields = ['donationType', 'amount', 'parkName', 'firstName', 'lastName', 'email']
-        
-        # Validate all required fields
-        if not all(field in data for field in required_fields):
-            return jsonify({"error": "Missing required fields"}), 400
-
-        # Validate amount
-        try:
-            donation_amount = float(data['amount'])
-            if donation_amount <= 0:
-                return jsonify({"error": "Donation amount must be positive"}), 400
-        except ValueError:
-            return jsonify({"error": "Invalid donation amount"}), 400
+        values, error = validate_donation(data)
+        if error:
+            return jsonify(error), 400
 
         cursor = connection.cursor()
-        cursor.execute('''
-            INSERT INTO donations (
-                donation_type, amount, park_name, 
-                first_name, last_name, email, 
-                message, is_anonymous
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (
-            data['donationType'],
-            donation_amount,
-            data['parkName'],
-            data['firstName'],
-            data['lastName'],
-            data['email'],
-            data.get('message', ''),
-            False  # Adding the missing value for is_anonymous
-        ))
+        cursor.execute(DONATION_INSERT_SQL, values)
+        booking_reference = cursor.lastrowid
+        add_to_park_summary(connection, data['parkName'], 'donations', values[1])
         connection.commit()
-        return jsonify({"message": "Donation recorded successfully"}), 201
+        stats_cache.invalidate_tables('donations')
+        return jsonify({
+            "message": "Donation recorded successfully",
+            "bookingReference": booking_reference
+        }), 201
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Database operation failed"}), 500
     finally:
-        if connection.is_connected():
+        if cursor:
             cursor.close()
+        if connection.is_connected():
             connection.close()
 
+# Verified tokens are remembered so repeat requests skip the HMAC check
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 4096))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token -> claims for tokens that already passed jwt.decode.
+
+    Each entry expires at the token's own exp claim, so a cached token stops
+    being accepted at the same moment jwt.decode would start rejecting it.
+    Tokens without exp are never cached. maxsize=0 disables the cache.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at <= epoch_time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims):
+        if self.maxsize <= 0 or 'exp' not in claims:
+            return
+        with self._lock:
+            self._entries[token] = (claims['exp'], claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses}
+
+
+verified_tokens = VerifiedTokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+def decode_token(token):
+    """Claims of a bearer token, from the verified-token cache or jwt.decode."""
+    data = verified_tokens.get(token)
+    if data is None:
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        verified_tokens.put(token, data)
+    return data
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = request.headers.get('Authorization')
         if not token:
-            print("Token missing")
+            auth_logger.info("Token missing")
             return jsonify({'error': 'Token is missing'}), 401
         try:
-            data = jwt.decode(token.split()[1], app.config['SECRET_KEY'], algorithms=["HS256"])
-            print(f"Token valid for user_id: {data['user_id']}")
+            data = decode_token(token.split()[1])
+            g.token_claims = data
+            auth_logger.debug("Token valid for user_id: %s", data['user_id'])
             kwargs['current_user_id'] = data['user_id']
         except jwt.ExpiredSignatureError:
-            print("Token expired")
+            auth_logger.info("Token expired")
             return jsonify({'error': 'Token has expired'}), 401
         except Exception as e:
-            print(f"Token error: {str(e)}")
+            auth_logger.warning("Token error: %s", e)
             return jsonify({'error': f'Invalid token: {str(e)}'}), 401
         return f(*args, **kwargs)
     return decorated
 
 
+def admin_required(f):
+    """token_required, restricted to tokens issued to administrators."""
+    @wraps(f)
+    @token_required
+    def decorated(*args, **kwargs):
+        if g.token_claims.get('role') != 'admin':
+            return jsonify({'error': 'Administrator access required'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+
+def roles_required(*roles):
+    """token_required, restricted to tokens issued to one of roles."""
+    def decorator(f):
+        @wraps(f)
+        @token_required
+        def decorated(*args, **kwargs):
+            if g.token_claims.get('role') not in roles:
+                return jsonify({'error': 'Access denied for this role'}), 403
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
 
 
 
@@ -131,12 +1535,80 @@ def hash_password(password, salt):
     return hashlib.sha256((password + salt).encode()).hexdigest()
 
 
+# user_identities maps each login email to the table and row that owns it, so login
+# and email-uniqueness checks are one unique-index lookup instead of a scan per table.
+# Every route that creates, re-emails or deletes a user keeps it in the same transaction.
+IDENTITY_ROLES = {
+    'admintable': 'admin',
+    'parkstaff': 'park-staff',
+    'finance_officers': 'finance',
+    'auditors': 'auditor',
+    'government_officers': 'government',
+    'visitors': 'visitor',
+}
+
+
+def identity_realm(table):
+    """Staff and admins share the /api/login namespace; visitors sign in separately."""
+    return 'visitor' if table == 'visitors' else 'staff'
+
+
+def find_identity(connection, email, realm='staff'):
+    """Return (user_table, user_id, role) for the email, or None."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT user_table, user_id, role FROM user_identities
+            WHERE email = %s AND realm = %s
+        """, (email, realm))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def email_in_use(connection, email, table, user_id=None):
+    """True if an account other than table/user_id already signs in with email."""
+    identity = find_identity(connection, email, identity_realm(table))
+    return identity is not None and (identity[0], str(identity[1])) != (table, str(user_id))
+
+
+def add_identity(connection, table, user_id, email):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO user_identities (email, realm, role, user_table, user_id)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (email, identity_realm(table), IDENTITY_ROLES[table], table, user_id))
+    finally:
+        cursor.close()
+
+
+def update_identity_email(connection, table, user_id, email):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "UPDATE user_identities SET email = %s WHERE user_table = %s AND user_id = %s",
+            (email, table, user_id)
+        )
+    finally:
+        cursor.close()
+
+
+def remove_identity(connection, table, user_id):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "DELETE FROM user_identities WHERE user_table = %s AND user_id = %s",
+            (table, user_id)
+        )
+    finally:
+        cursor.close()
+
+
 
 @app.route('/api/login', methods=['POST'])
 def login():
     connection = get_db_connection()
-    if isinstance(connection, tuple):  # Check if connection failed
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -148,28 +1620,14 @@ def login():
 
         cursor = connection.cursor(dictionary=True)
         
-        # Check all user tables
-        user_tables = [
-            ('admintable', 'admin'),
-            ('parkstaff', 'park-staff'),
-            ('finance_officers', 'finance'),
-            ('auditors', 'auditor'),
-            ('government_officers', 'government')
-        ]
-        
-        user = None
-        user_role = None
-        user_table = None
-        
-        for table, role in user_tables:
-            cursor.execute(f"SELECT * FROM {table} WHERE email = %s", (email,))
-            result = cursor.fetchone()
-            if result:
-                user = result
-                user_role = role
-                user_table = table
-                break
+        # Resolve the email to its account, then read that row by primary key
+        identity = find_identity(connection, email)
+        if not identity:
+            return jsonify({"error": "Invalid credentials"}), 401
+        user_table, user_id, user_role = identity
         
+        cursor.execute(f"SELECT * FROM {user_table} WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
         if not user:
             return jsonify({"error": "Invalid credentials"}), 401
 
@@ -226,7 +1684,7 @@ def login():
         }), 200
 
     except Exception as e:
-        print(f"Login error: {str(e)}")
+        logger.exception("Login error")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -241,89 +1699,30 @@ def login():
 
 
 @app.route('/api/book-tour', methods=['POST'])
+@idempotent
 def book_tour():
     """Handle tour booking with specific tour purpose validation."""
     connection = get_db_connection()
     cursor = None
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-
-    # Define valid tour purposes
-    VALID_TOUR_PURPOSES = {
-        'Wildlife Photography', 'Bird Watching', 'Hiking Adventure',
-        'Nature Trail Walking', 'Canopy Walk', 'Forest Exploration',
-        'Educational Tour', 'Research Visit', 'Cultural Experience',
-        'Waterfall Visit', 'Mountain Climbing', 'Camping',
-        'Animal Observation', 'Conservation Learning', 'School Field Trip'
-    }
 
     try:
         data = request.json
-        required_fields = ['parkName', 'tourName', 'date', 'time', 'guests', 'amount', 'firstName', 'lastName', 'email']
-
-        # Validate required fields
-        if not all(field in data for field in required_fields):
-            missing_fields = [field for field in required_fields if field not in data]
-            return jsonify({
-                "error": "Missing required fields",
-                "missing": missing_fields
-            }), 400
-
-        # Validate tour purpose
-        tour_purpose = data['tourName'].strip()
-        if not tour_purpose or tour_purpose not in VALID_TOUR_PURPOSES:
-            return jsonify({
-                "error": "Invalid tour purpose",
-                "message": "Please select a valid tour purpose",
-                "valid_purposes": sorted(list(VALID_TOUR_PURPOSES))
-            }), 400
-
-        # Validate guests and amount
-        try:
-            guests = int(data['guests'])
-            amount = int(data['amount'])
-            if guests < 1 or guests > 20:
-                return jsonify({"error": "Number of guests must be between 1 and 20"}), 400
-            if amount != guests * 75:
-                return jsonify({"error": "Invalid amount: must be $75 per guest"}), 400
-        except (ValueError, TypeError):
-            return jsonify({"error": "Invalid guests or amount value"}), 400
-
-        # Validate date and time
-        try:
-            tour_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-            tour_time = datetime.strptime(data['time'], '%H:%M').time()
-            
-            if tour_date < datetime.now().date():
-                return jsonify({"error": "Tour date must be in the future"}), 400
-        except ValueError:
-            return jsonify({"error": "Invalid date or time format"}), 400
+        values, error = validate_tour_booking(data)
+        if error:
+            return jsonify(error), 400
+        tour_purpose, guests, amount = values[1], values[4], values[5]
 
         # Insert the tour booking
         cursor = connection.cursor()
-        cursor.execute('''
-            INSERT INTO tours (
-                park_name, tour_name, date, time, guests, amount,
-                first_name, last_name, email, special_requests,
-                status, created_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-        ''', (
-            data['parkName'],
-            tour_purpose,
-            data['date'],
-            data['time'],
-            guests,
-            amount,
-            data['firstName'],
-            data['lastName'],
-            data['email'],
-            data.get('specialRequests', ''),
-            'pending'
-        ))
+        cursor.execute(TOUR_INSERT_SQL, values)
+        booking_reference = cursor.lastrowid
+        add_to_park_summary(connection, data['parkName'], 'tours', amount)
         connection.commit()
+        stats_cache.invalidate_tables('tours')
         
         return jsonify({
             "message": "Tour booked successfully",
+            "bookingReference": booking_reference,
             "details": {
                 "park": data['parkName'],
                 "purpose": tour_purpose,
@@ -336,7 +1735,7 @@ def book_tour():
         }), 201
 
     except Error as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Database operation failed: {str(e)}"}), 500
     finally:
         if cursor:
@@ -345,16 +1744,136 @@ def book_tour():
             connection.close()
 
 
+# Offline batches from gate offices and partner agencies are validated with the
+# same rules as the single-record endpoints and inserted a chunk per transaction
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 20000))
+BULK_FORMATS = {'application/x-ndjson', 'application/jsonl', 'text/csv'}
+# Staff who enter gate-office and agency batches; visitors and auditors may not
+BULK_INGEST_ROLES = ('admin', 'finance', 'park-staff')
 
+# kind: (table, validator, insert statement, summary column, park index, amount index)
+BULK_INGEST_KINDS = {
+    'donations': ('donations', validate_donation, DONATION_INSERT_SQL, 'donations', 2, 1),
+    'tours': ('tours', validate_tour_booking, TOUR_INSERT_SQL, 'tours', 0, 5),
+}
 
 
+def read_bulk_records():
+    """Yield one dict per record of a JSON-lines or CSV body; None for an unparseable line."""
+    body = io.StringIO(request.get_data(as_text=True))
+    if request.mimetype == 'text/csv':
+        yield from csv.DictReader(body)
+        return
+    for line in body:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+@app.route('/api/bulk/<kind>', methods=['POST'])
+@roles_required(*BULK_INGEST_ROLES)
+def bulk_ingest(current_user_id, kind):
+    """Validate and insert a batch of donations or tours.
+
+    The body is JSON lines (application/x-ndjson) or CSV with a header row,
+    using the field names of /api/donate and /api/book-tour. The response
+    reports every row by its 1-based position: inserted, rejected by
+    validation, or failed with the rest of its chunk.
+    """
+    if kind not in BULK_INGEST_KINDS:
+        return jsonify({"error": f"Unknown batch type: {kind}"}), 404
+    if request.mimetype not in BULK_FORMATS:
+        return jsonify({"error": "Send the batch as application/x-ndjson or text/csv"}), 415
+    table, validate, insert_sql, column, park_index, amount_index = BULK_INGEST_KINDS[kind]
+
+    results = []
+    valid = []
+    received = 0
+    for received, record in enumerate(read_bulk_records(), start=1):
+        if received > BULK_MAX_ROWS:
+            return jsonify({"error": f"Batches are limited to {BULK_MAX_ROWS} rows"}), 413
+        values, error = validate(record) if record is not None else (None, {"error": "Invalid JSON"})
+        if error:
+            results.append({"row": received, "status": "rejected", "error": error['error']})
+        else:
+            valid.append((received, values))
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    inserted = failed = 0
+    try:
+        for start in range(0, len(valid), BULK_CHUNK_SIZE):
+            chunk = valid[start:start + BULK_CHUNK_SIZE]
+            park_totals = {}
+            for _, values in chunk:
+                park = values[park_index]
+                park_totals[park] = park_totals.get(park, 0) + values[amount_index]
+            try:
+                cursor.executemany(insert_sql, [values for _, values in chunk])
+                for park, amount in park_totals.items():
+                    add_to_park_summary(connection, park, column, amount)
+                connection.commit()
+            except Error:
+                connection.rollback()
+                logger.exception("Bulk %s chunk failed", kind)
+                failed += len(chunk)
+                results.extend({"row": row, "status": "failed", "error": "Database operation failed"}
+                               for row, _ in chunk)
+                continue
+            inserted += len(chunk)
+            results.extend({"row": row, "status": "inserted"} for row, _ in chunk)
+    finally:
+        cursor.close()
+        connection.close()
+
+    if inserted:
+        stats_cache.invalidate_tables(table)
+    results.sort(key=lambda result: result['row'])
+    return jsonify({
+        "received": received,
+        "inserted": inserted,
+        "rejected": received - len(valid),
+        "failed": failed,
+        "results": results
+    }), 200
+
+
+
+
+
+
+
+# Service application documents live in a content-addressed store on disk; the
+# services row keeps only their digest, size and MIME type
+attachment_store = ContentStore(ATTACHMENT_FOLDER)
+
+# Applicants' company documents are for the staff who review service applications
+SERVICE_ATTACHMENT_ROLES = ('finance', 'government', 'admin')
+
+# URL name -> services column prefix
+SERVICE_ATTACHMENTS = {
+    'company-registration': 'company_registration',
+    'application-letter': 'application_letter',
+}
+
+
+def store_upload(file):
+    """Stream an uploaded file into the attachment store; return (digest, size, mime_type)."""
+    digest, size = attachment_store.save_stream(file.stream)
+    mime_type = file.mimetype
+    if not mime_type or mime_type == 'application/octet-stream':
+        with open(attachment_store.path(digest), 'rb') as f:
+            mime_type = guess_mime_type(file.filename, f.read(16))
+    return digest, size, mime_type
 
 
 @app.route('/api/services', methods=['POST'])
 def services():
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.form
@@ -367,16 +1886,17 @@ def services():
         if 'companyRegistration' not in files:
             return jsonify({"error": "Company registration file is required"}), 400
 
-        company_registration = files['companyRegistration'].read()
-        application_letter = files['applicationLetter'].read() if 'applicationLetter' in files else None
+        company_registration = store_upload(files['companyRegistration'])
+        application_letter = store_upload(files['applicationLetter']) if 'applicationLetter' in files else (None, None, None)
 
         cursor = connection.cursor()
         cursor.execute('''
             INSERT INTO services (
                 first_name, last_name, email, phone, company_type, 
                 provided_service, company_name, tax_id, 
-                company_registration, application_letter
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                company_registration_sha256, company_registration_size, company_registration_mime,
+                application_letter_sha256, application_letter_size, application_letter_mime
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         ''', (
             data['firstName'],
             data['lastName'],
@@ -386,15 +1906,15 @@ def services():
             data.get('providedService', ''),  
             data['companyName'],
             data['taxId'],
-            company_registration,
-            application_letter
+            *company_registration,
+            *application_letter
         ))
 
         connection.commit()
         return jsonify({"message": "Service application submitted successfully"}), 201
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("Error")
         return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
 
     finally:
@@ -403,17 +1923,255 @@ def services():
             connection.close()
 
 
+@app.route('/api/services/<int:service_id>/attachments/<kind>', methods=['GET'])
+@roles_required(*SERVICE_ATTACHMENT_ROLES)
+def download_service_attachment(current_user_id, service_id, kind):
+    """Download a service application document.
+
+    Served straight from the file store (sendfile where the server supports it)
+    with Range requests, and an ETag equal to the content digest.
+    """
+    column = SERVICE_ATTACHMENTS.get(kind)
+    if not column:
+        return jsonify({"error": f"Unknown attachment; expected one of: {', '.join(SERVICE_ATTACHMENTS)}"}), 404
+    connection = get_db_connection()
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT {column}_sha256 AS digest, {column}_mime AS mime_type
+            FROM services WHERE id = %s
+        """, (service_id,))
+        attachment = cursor.fetchone()
+    except Exception:
+        logger.exception("Database error")
+        return jsonify({"error": "Failed to retrieve attachment"}), 500
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+    if not attachment or not attachment['digest']:
+        return jsonify({"error": "Attachment not found"}), 404
+    path = attachment_store.path(attachment['digest'])
+    if not os.path.isfile(path):
+        logger.warning("Attachment %s for service %s is missing from the store", attachment['digest'], service_id)
+        return jsonify({"error": "Attachment not found"}), 404
+
+    extension = mimetypes.guess_extension(attachment['mime_type'] or '') or ''
+    response = send_file(
+        path,
+        mimetype=attachment['mime_type'] or 'application/octet-stream',
+        as_attachment=True,
+        download_name=f"service-{service_id}-{kind}{extension}",
+        conditional=True,
+        etag=attachment['digest'],
+        max_age=3600,
+    )
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+# Avatars for every role are stored once per content digest under uploads/avatars and
+# served from immutable URLs: /uploads/avatars/<digest>.<ext> for the original and
+# /uploads/avatars/<digest>-<size>.jpg for square thumbnails, which a small thread pool
+# renders in the background.
+AVATAR_FOLDER = os.path.join(BACKEND_DIR, app.config['UPLOAD_FOLDER'], 'avatars')
+AVATAR_MAX_BYTES = int(os.getenv('AVATAR_MAX_BYTES', 5 * 1024 * 1024))
+AVATAR_THUMBNAIL_SIZES = (64, 256)
+AVATAR_URL_SIZE = 256  # thumbnail stored in avatar_url
+AVATAR_MIME_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif'}
+AVATAR_FILE_PATTERN = re.compile(r'^([0-9a-f]{64})(?:-(\d+))?\.(jpg|png|gif)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+avatar_store = ContentStore(AVATAR_FOLDER)
+thumbnail_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('AVATAR_THUMBNAIL_WORKERS', 2)),
+    thread_name_prefix='avatar-thumbnail'
+)
+_thumbnail_jobs = {}
+_thumbnail_jobs_lock = threading.Lock()
+_failed_thumbnails = set()  # (digest, size) whose render raised; served as the original instead
+
+
+def avatar_thumbnail_path(digest, size):
+    return f"{avatar_store.path(digest)}-{size}.jpg"
+
+
+def render_avatar_thumbnail(digest, size):
+    """Write the size x size JPEG thumbnail of an avatar, if it doesn't exist yet."""
+    path = avatar_thumbnail_path(digest, size)
+    if not os.path.exists(path):
+        with Image.open(avatar_store.path(digest)) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        thumbnail.save(tmp_path, 'JPEG', quality=85, optimize=True)
+        os.replace(tmp_path, path)
+    return path
+
+
+def avatar_thumbnail_job(digest, size):
+    """Future for a thumbnail, sharing one render between concurrent callers."""
+    key = (digest, size)
+    with _thumbnail_jobs_lock:
+        job = _thumbnail_jobs.get(key)
+        if job is None:
+            job = thumbnail_pool.submit(render_avatar_thumbnail, digest, size)
+            _thumbnail_jobs[key] = job
+            job.add_done_callback(lambda done: thumbnail_job_done(key, done))
+        return job
+
+
+def thumbnail_job_done(key, job):
+    with _thumbnail_jobs_lock:
+        _thumbnail_jobs.pop(key, None)
+        if job.exception() is not None:
+            logger.warning("Avatar thumbnail %s-%s failed: %r", key[0], key[1], job.exception())
+            _failed_thumbnails.add(key)
+
+
+def avatar_decodes(stream):
+    """True if Pillow can fully decode the uploaded image, so its thumbnails can be rendered."""
+    try:
+        with Image.open(stream) as image:
+            image.load()
+        return True
+    except Exception:  # truncated or corrupt data, DecompressionBombError, ...
+        return False
+    finally:
+        stream.seek(0)
+
+
+def update_avatar(table, user_id):
+    """Shared body of the /api/<role>/avatar upload routes."""
+    if 'avatar' not in request.files:
+        return jsonify({"error": "No avatar file provided"}), 400
+
+    avatar = request.files['avatar']
+    if avatar.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+    if request.content_length and request.content_length > AVATAR_MAX_BYTES:
+        return jsonify({"error": f"Avatar must be smaller than {AVATAR_MAX_BYTES // (1024 * 1024)} MB"}), 413
+
+    head = avatar.stream.read(16)
+    avatar.stream.seek(0)
+    extension = AVATAR_MIME_TYPES.get(guess_mime_type(head=head))
+    if not extension:
+        return jsonify({"error": "Invalid file type. Only JPG, PNG and GIF images are allowed"}), 400
+    if Image is not None and not avatar_decodes(avatar.stream):
+        return jsonify({"error": "The image could not be read"}), 400
+
+    try:
+        # Chunked uploads carry no Content-Length, so the size is checked again while storing
+        digest, _ = avatar_store.save_stream(avatar.stream, max_size=AVATAR_MAX_BYTES)
+    except UploadTooLarge:
+        return jsonify({"error": f"Avatar must be smaller than {AVATAR_MAX_BYTES // (1024 * 1024)} MB"}), 413
+    original_url = f"/uploads/avatars/{digest}.{extension}"
+    if Image is not None:
+        for size in AVATAR_THUMBNAIL_SIZES:
+            avatar_thumbnail_job(digest, size)
+        thumbnails = {size: f"/uploads/avatars/{digest}-{size}.jpg" for size in AVATAR_THUMBNAIL_SIZES}
+        avatar_url = thumbnails[AVATAR_URL_SIZE]
+    else:
+        thumbnails = {}
+        avatar_url = original_url
+
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"UPDATE {table} SET avatar_url = %s WHERE id = %s", (avatar_url, user_id))
+        if cursor.rowcount == 0:
+            cursor.execute(f"SELECT id FROM {table} WHERE id = %s", (user_id,))
+            if not cursor.fetchone():
+                return jsonify({"error": "User not found"}), 404
+        connection.commit()
+
+        return jsonify({
+            "message": "Avatar updated successfully",
+            "avatarUrl": avatar_url,
+            "originalUrl": original_url,
+            "thumbnails": thumbnails
+        }), 200
+
+    except Exception:
+        logger.exception("Avatar update error")
+        return jsonify({"error": "Failed to update avatar"}), 500
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+@app.route('/uploads/<path:filename>', methods=['GET'])
+def serve_upload(filename):
+    """Serve uploaded files with validators for conditional GET.
+
+    Content-hashed avatar URLs never change meaning, so they are cacheable for a year.
+    """
+    folder, _, name = filename.rpartition('/')
+    match = AVATAR_FILE_PATTERN.match(name) if folder == 'avatars' else None
+    if not match:
+        # Older uploads with per-upload file names
+        return send_from_directory(
+            os.path.join(BACKEND_DIR, app.config['UPLOAD_FOLDER']), filename,
+            conditional=True, max_age=3600
+        )
+
+    digest, size, _ = match.groups()
+    if not avatar_store.exists(digest):
+        return jsonify({"error": "Not found"}), 404
+    if size:
+        size = int(size)
+        if size not in AVATAR_THUMBNAIL_SIZES or Image is None:
+            return jsonify({"error": "Not found"}), 404
+        path = avatar_thumbnail_path(digest, size)
+        if not os.path.exists(path):
+            try:
+                if (digest, size) in _failed_thumbnails:
+                    raise ValueError("thumbnail render failed earlier")
+                path = avatar_thumbnail_job(digest, size).result(timeout=30)
+            except Exception as e:  # undecodable image or a slow render: send the original
+                logger.warning("Serving original avatar %s instead of %s px thumbnail: %r", digest, size, e)
+                return send_original_avatar(digest)
+        etag = f"{digest}-{size}"
+    else:
+        path = avatar_store.path(digest)
+        etag = digest
+
+    response = send_file(
+        path,
+        mimetype=mimetypes.guess_type(name)[0],
+        conditional=True,
+        etag=etag,
+        max_age=IMMUTABLE_MAX_AGE,
+    )
+    response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return response
+
+
+def send_original_avatar(digest):
+    """Original avatar under a thumbnail URL; briefly cacheable, since a later render may succeed."""
+    path = avatar_store.path(digest)
+    with open(path, 'rb') as f:
+        mimetype = guess_mime_type(head=f.read(16))
+    return send_file(path, mimetype=mimetype, conditional=True, etag=digest, max_age=60)
+
+
 
 
 
 
 
+# Payment types that settle a booking row, and the table holding it
+PAYMENT_BOOKING_TABLES = {'donation': 'donations', 'tour': 'tours'}
+
+
 @app.route('/api/process_payment', methods=['POST'])
+@idempotent
 def process_payment():
     """Handle payment processing for donations and tour bookings."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -436,29 +2194,33 @@ def process_payment():
         except ValueError:
             return jsonify({"error": "Invalid payment amount"}), 400
 
+        # Donations and tours are settled by the reference their booking returned
+        booking_table = PAYMENT_BOOKING_TABLES.get(data['paymentType'])
+        booking_reference = data.get('bookingReference')
         cursor = connection.cursor()
-
-        # First, ensure the necessary columns exist
-        try:
-            # Add status column to donations if it doesn't exist
-            cursor.execute("""
-                ALTER TABLE donations 
-                ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'pending',
-                ADD COLUMN IF NOT EXISTS transaction_id VARCHAR(50)
-            """)
-            
-            # Add status column to tours if it doesn't exist
-            cursor.execute("""
-                ALTER TABLE tours 
-                ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'pending',
-                ADD COLUMN IF NOT EXISTS transaction_id VARCHAR(50)
-            """)
-            
-            connection.commit()
-        except Exception as e:
-            print(f"Table alteration error: {e}")
-            # Continue even if alteration fails (columns might already exist)
-            pass
+        if booking_table:
+            try:
+                booking_reference = int(booking_reference)
+            except (TypeError, ValueError):
+                return jsonify({"error": "Missing or invalid booking reference"}), 400
+
+            # Lock the booking so two payments can't settle it concurrently
+            cursor.execute(
+                f"SELECT email, amount, status FROM {booking_table} WHERE id = %s FOR UPDATE",
+                (booking_reference,)
+            )
+            booking = cursor.fetchone()
+            if booking is None:
+                connection.rollback()
+                return jsonify({"error": "Booking not found"}), 404
+            email, booked_amount, status = booking
+            if (email.lower() != data['customerEmail'].strip().lower()
+                    or Decimal(str(payment_amount)) != booked_amount):
+                connection.rollback()
+                return jsonify({"error": "Payment does not match the booking"}), 400
+            if status == 'completed':
+                connection.rollback()
+                return jsonify({"error": "Booking has already been paid"}), 409
 
         # Generate a unique transaction ID
         timestamp = datetime.now().strftime('%y%m%d%H%M%S')
@@ -488,37 +2250,13 @@ def process_payment():
             data['customerEmail']
         ))
         
-        # Update the corresponding record based on payment type
-        if data['paymentType'] == 'donation':
-            cursor.execute('''
-                UPDATE donations 
-                SET status = %s, 
-                    transaction_id = %s 
-                WHERE email = %s 
-                AND amount = %s 
-                AND created_at >= DATE_SUB(NOW(), INTERVAL 1 HOUR)
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''', ('completed', transaction_id, data['customerEmail'], payment_amount))
-            
-            if cursor.rowcount == 0:
-                raise Exception("No matching donation record found")
-                
-        elif data['paymentType'] == 'tour':
-            cursor.execute('''
-                UPDATE tours 
-                SET status = %s, 
-                    transaction_id = %s 
-                WHERE email = %s 
-                AND amount = %s 
-                AND created_at >= DATE_SUB(NOW(), INTERVAL 1 HOUR)
-                ORDER BY created_at DESC 
-                LIMIT 1
-            ''', ('completed', transaction_id, data['customerEmail'], payment_amount))
-            
-            if cursor.rowcount == 0:
-                raise Exception("No matching tour record found")
-        
+        # Settle the booking by primary key in the same transaction as the payment
+        if booking_table:
+            cursor.execute(
+                f"UPDATE {booking_table} SET status = %s, transaction_id = %s WHERE id = %s",
+                ('completed', transaction_id, booking_reference)
+            )
+
         connection.commit()
         
         return jsonify({
@@ -529,7 +2267,7 @@ def process_payment():
         }), 201
 
     except Exception as e:
-        print(f"Payment processing error: {e}")
+        logger.exception("Payment processing error")
         connection.rollback()
         return jsonify({"error": str(e)}), 500
     finally:
@@ -549,8 +2287,6 @@ def process_payment():
 def get_park_staff():
     """Retrieve all park staff members."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -577,8 +2313,8 @@ def get_park_staff():
         
         return jsonify(staff), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve park staff"}), 500
     finally:
         if connection.is_connected():
@@ -591,8 +2327,6 @@ def get_park_staff():
 def add_park_staff():
     """Add a new park staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -608,10 +2342,7 @@ def add_park_staff():
 
         # Check if email already exists
         cursor = connection.cursor()
-        cursor.execute("SELECT id FROM parkstaff WHERE email = %s", (data['email'],))
-        existing_user = cursor.fetchone()
-        
-        if existing_user:
+        if email_in_use(connection, data['email'], 'parkstaff'):
             return jsonify({"error": "Email already exists"}), 409
 
         # Hash the password
@@ -630,17 +2361,22 @@ def add_park_staff():
             data['park'],
             'park-staff'  # Default role
         ))
-        connection.commit()
-        
         new_staff_id = cursor.lastrowid
+        add_identity(connection, 'parkstaff', new_staff_id, data['email'])
+        connection.commit()
+        stats_cache.invalidate_tables('parkstaff')
         
         return jsonify({
             "message": "Park staff added successfully",
             "id": new_staff_id
         }), 201
 
+    except mysql.connector.IntegrityError:
+        # A concurrent sign-up claimed the email between email_in_use and add_identity
+        connection.rollback()
+        return jsonify({"error": "Email already exists"}), 409
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to add park staff: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -657,8 +2393,6 @@ def add_park_staff():
 def update_park_staff_password(staff_id, current_user_id):
     """Update park staff password."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -689,7 +2423,7 @@ def update_park_staff_password(staff_id, current_user_id):
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update password: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -701,8 +2435,6 @@ def update_park_staff_password(staff_id, current_user_id):
 def update_park_staff(staff_id):
     """Update an existing park staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -725,11 +2457,7 @@ def update_park_staff(staff_id):
             return jsonify({"error": "Staff member not found"}), 404
         
         # Check if email exists for another user
-        cursor.execute("SELECT id FROM parkstaff WHERE email = %s AND id != %s", 
-                      (data['email'], staff_id))
-        email_exists = cursor.fetchone()
-        
-        if email_exists:
+        if email_in_use(connection, data['email'], 'parkstaff', staff_id):
             return jsonify({"error": "Email already in use by another staff member"}), 409
 
         # Update staff member
@@ -747,6 +2475,7 @@ def update_park_staff(staff_id):
             data['park'],
             staff_id
         ))
+        update_identity_email(connection, 'parkstaff', staff_id, data['email'])
         connection.commit()
         
         return jsonify({
@@ -755,7 +2484,7 @@ def update_park_staff(staff_id):
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update park staff: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -767,8 +2496,6 @@ def update_park_staff(staff_id):
 def delete_parkstaff(staff_id):
     """Delete a park staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor()
@@ -782,14 +2509,16 @@ def delete_parkstaff(staff_id):
         
         # Delete staff member
         cursor.execute("DELETE FROM parkstaff WHERE id = %s", (staff_id,))
+        remove_identity(connection, 'parkstaff', staff_id)
         connection.commit()
+        stats_cache.invalidate_tables('parkstaff')
         
         return jsonify({
             "message": "Park staff deleted successfully"
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to delete park staff: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -801,8 +2530,6 @@ def delete_parkstaff(staff_id):
 def update_login_time(staff_id):
     """Update the last login time for a park staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor()
@@ -826,7 +2553,7 @@ def update_login_time(staff_id):
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update login time: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -838,8 +2565,6 @@ def update_login_time(staff_id):
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login():
     connection = get_db_connection()
-    if isinstance(connection, tuple):  # Check if connection failed
-        return connection
     
     try:
         data = request.json
@@ -852,11 +2577,9 @@ def admin_login():
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT * FROM admintable WHERE email = %s", (email,))
         admin = cursor.fetchone()
-        print(f"Found admin: {admin}")
         
         if not admin or hashlib.sha256(password.encode()).hexdigest() != admin['password_hash']:
-            print(f"Password hash attempted: {hashlib.sha256(password.encode()).hexdigest()}")
-            print(f"Stored hash: {admin['password_hash'] if admin else 'No user'}")
+            auth_logger.info("Failed admin login for %s", email)
             return jsonify({"error": "Invalid credentials"}), 401
 
         # Update last login
@@ -886,7 +2609,7 @@ def admin_login():
         }), 200
 
     except Exception as e:
-        print(f"Login error: {str(e)}")
+        logger.exception("Login error")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -897,8 +2620,6 @@ def admin_login():
 @token_required
 def update_admin_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -908,6 +2629,9 @@ def update_admin_profile(current_user_id):
             return jsonify({"error": "Missing required fields"}), 400
 
         cursor = connection.cursor()
+        if email_in_use(connection, data['email'], 'admintable', current_user_id):
+            return jsonify({"error": "Email already in use"}), 409
+
         cursor.execute('''
             UPDATE admintable SET
                 first_name = %s,
@@ -921,12 +2645,13 @@ def update_admin_profile(current_user_id):
             data['email'],
             current_user_id
         ))
+        update_identity_email(connection, 'admintable', current_user_id, data['email'])
         connection.commit()
 
         return jsonify({"message": "Profile updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error")
         return jsonify({"error": "Failed to update profile"}), 500
     finally:
         if connection.is_connected():
@@ -936,57 +2661,22 @@ def update_admin_profile(current_user_id):
 @app.route('/api/admin/avatar', methods=['POST'])
 @token_required
 def update_admin_avatar(current_user_id):
-    connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
-    
-    try:
-        if 'avatar' not in request.files:
-            return jsonify({"error": "No avatar file provided"}), 400
-
-        avatar = request.files['avatar']
-        if avatar.filename == '':
-            return jsonify({"error": "No selected file"}), 400
-
-        # Save the file
-        filename = f"avatar_{current_user_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        avatar.save(filepath)
-
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE admintable SET avatar_url = %s WHERE id = %s",
-            (f"/uploads/{filename}", current_user_id)
-        )
-        connection.commit()
-
-        return jsonify({
-            "message": "Avatar updated successfully",
-            "avatarUrl": f"/uploads/{filename}"
-        }), 200
-
-    except Exception as e:
-        print(f"Avatar update error: {e}")
-        return jsonify({"error": "Failed to update avatar"}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    return update_avatar('admintable', current_user_id)
 
 @app.route('/api/admin/account', methods=['DELETE'])
 @token_required
 def delete_admin_account(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, dict):
-        return connection, 500
     
     try:
         cursor = connection.cursor()
         cursor.execute("DELETE FROM admintable WHERE id = %s", (current_user_id,))
+        remove_identity(connection, 'admintable', current_user_id)
         connection.commit()
+        stats_cache.invalidate_tables('admintable')
         return jsonify({"message": "Account deleted successfully"}), 200
-    except Exception as e:
-        print(f"Account deletion error: {e}")
+    except Exception:
+        logger.exception("Account deletion error")
         return jsonify({"error": "Failed to delete account"}), 500
     finally:
         if connection.is_connected():
@@ -998,8 +2688,6 @@ def delete_admin_account(current_user_id):
 @token_required
 def update_admin_password(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -1029,8 +2717,8 @@ def update_admin_password(current_user_id):
 
         return jsonify({"message": "Password updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Password update error: {e}")
+    except Exception:
+        logger.exception("Password update error")
         return jsonify({"error": "Failed to update password"}), 500
     finally:
         if connection.is_connected():
@@ -1042,8 +2730,6 @@ def update_admin_password(current_user_id):
 @token_required
 def get_tour_bookings(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, dict):
-        return connection, 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1054,8 +2740,8 @@ def get_tour_bookings(current_user_id):
         )
         bookings = cursor.fetchall()
         return jsonify({"tour_bookings": bookings}), 200
-    except Exception as e:
-        print(f"Error fetching tour bookings: {e}")
+    except Exception:
+        logger.exception("Error fetching tour bookings")
         return jsonify({"error": "Failed to fetch tour bookings"}), 500
     finally:
         if connection.is_connected():
@@ -1068,118 +2754,211 @@ def get_tour_bookings(current_user_id):
 @app.route('/api/admin/donations', methods=['GET'])
 @token_required
 def get_admin_donations(current_user_id):
+    page = KeysetPage.from_request(('d.created_at', 'd.id'))
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        query = """
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        query = f"""
         SELECT d.*, p.transaction_id, p.status as payment_status
         FROM donations d
         LEFT JOIN payments p ON p.customer_email = d.email 
             AND p.park_name = d.park_name 
             AND p.payment_type = 'donation'
-        ORDER BY d.created_at DESC
+        WHERE {condition}
+        {order_limit}
         """
         
-        cursor.execute(query)
-        donations = cursor.fetchall()
-        
-        # Format dates
-        for donation in donations:
-            donation['created_at'] = donation['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            donation['amount'] = float(donation['amount'])
+        cursor.execute(query, (*condition_params, *limit_params))
+        donations, next_cursor = page.paginate(cursor.fetchall())
         
         cursor.close()
         conn.close()
         
-        return jsonify(donations)
-    except Exception as e:
-        print(f"Database error: {str(e)}")
+        return jsonify(page.response(donations, next_cursor))
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to fetch donations"}), 500
 
 @app.route('/api/admin/services', methods=['GET'])
 @token_required
 def get_admin_services(current_user_id):
+    page = KeysetPage.from_request()
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        query = """
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        query = f"""
         SELECT id, first_name, last_name, email, phone, 
                company_type, provided_service, company_name,
                created_at, status, tax_id
         FROM services
-        ORDER BY created_at DESC
+        WHERE {condition}
+        {order_limit}
         """
         
-        cursor.execute(query)
-        services = cursor.fetchall()
-        
-        # Format dates
-        for service in services:
-            service['created_at'] = service['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute(query, (*condition_params, *limit_params))
+        services, next_cursor = page.paginate(cursor.fetchall())
         
         cursor.close()
         conn.close()
         
-        return jsonify(services)
-    except Exception as e:
-        print(f"Database error: {str(e)}")
+        return jsonify(page.response(services, next_cursor))
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to fetch services"}), 500
 
 @app.route('/api/admin/recent-logins', methods=['GET'])
 @token_required
 def get_recent_logins(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, dict):
-        return connection, 500
     
     try:
         cursor = connection.cursor(dictionary=True)
+        # Walks idx_login_logs_login_time backwards; id breaks ties within a second
         cursor.execute(
             "SELECT email, role, login_time as last_login "
-            "FROM login_logs ORDER BY login_time DESC LIMIT 5"
+            "FROM login_logs ORDER BY login_time DESC, id DESC LIMIT 5"
         )
         logins = cursor.fetchall()
         return jsonify({"recent_logins": logins}), 200
-    except Exception as e:
-        print(f"Error fetching logins: {e}")
+    except Exception:
+        logger.exception("Error fetching logins")
         return jsonify({"error": "Failed to fetch recent logins"}), 500
     finally:
         if connection.is_connected():
             cursor.close()
             connection.close()
 
+
+LOGIN_METRICS_MONTHS = 12  # months shown by the admin login chart, this one included
+
+
+def login_metrics_since(today):
+    """First day of the month LOGIN_METRICS_MONTHS - 1 months before today's."""
+    months = today.year * 12 + today.month - LOGIN_METRICS_MONTHS
+    return date(months // 12, months % 12 + 1, 1)
+
+
 @app.route('/api/admin/login-metrics', methods=['GET'])
 @token_required
 def get_login_metrics(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, dict):
-        return connection, 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
+        # One row per day of the last LOGIN_METRICS_MONTHS months, a primary-key
+        # range read however long login_daily grows, folded into months here
         cursor.execute(
-            "SELECT DATE_FORMAT(login_time, '%b') as month, COUNT(*) as logins "
-            "FROM login_logs GROUP BY YEAR(login_time), MONTH(login_time) "
-            "ORDER BY login_time"
+            "SELECT login_date, logins FROM login_daily WHERE login_date >= %s AND logins > 0 ORDER BY login_date",
+            (login_metrics_since(date.today()),)
         )
-        metrics = cursor.fetchall()
+        metrics = []
+        current_month = None
+        for login_date, logins in cursor.fetchall():
+            if (login_date.year, login_date.month) != current_month:
+                current_month = (login_date.year, login_date.month)
+                metrics.append({"month": login_date.strftime('%b'), "logins": 0})
+            metrics[-1]["logins"] += logins
         return jsonify({"login_metrics": metrics}), 200
-    except Exception as e:
-        print(f"Error fetching login metrics: {e}")
+    except Exception:
+        logger.exception("Error fetching login metrics")
         return jsonify({"error": "Failed to fetch login metrics"}), 500
     finally:
         if connection.is_connected():
             cursor.close()
             connection.close()
 
+
+# login_daily holds logins per day, counted by triggers on login_logs (migration 0012)
+LOGIN_DAILY_REBUILD_SQL = """
+    SELECT DATE(login_time) AS login_date, COUNT(*) AS logins
+    FROM login_logs
+    GROUP BY DATE(login_time)
+"""
+
+
+def rebuild_login_daily():
+    """Recompute login_daily from login_logs and return the days whose counts had drifted.
+
+    Days before the oldest remaining login keep their counts: their logs were
+    removed by the login_logs retention (partitions.py), which fires no triggers.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT DATE(MIN(login_time)) FROM login_logs")
+        first_day = cursor.fetchone()[0]
+        if first_day is None:
+            return []
+        cursor.execute(
+            "SELECT login_date, logins FROM login_daily WHERE login_date >= %s AND logins > 0 FOR UPDATE",
+            (first_day,)
+        )
+        stored = dict(cursor.fetchall())
+        cursor.execute(LOGIN_DAILY_REBUILD_SQL)
+        fresh = dict(cursor.fetchall())
+        drifted = [day for day in sorted(set(stored) | set(fresh)) if stored.get(day) != fresh.get(day)]
+
+        cursor.execute("DELETE FROM login_daily WHERE login_date >= %s", (first_day,))
+        cursor.execute(f"INSERT INTO login_daily (login_date, logins) {LOGIN_DAILY_REBUILD_SQL}")
+        connection.commit()
+        return drifted
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+
+
+@app.cli.command('rebuild-login-daily')
+def rebuild_login_daily_command():
+    """Recompute login_daily and report days that had drifted."""
+    drifted = rebuild_login_daily()
+    print(f"Rebuilt login_daily; corrected {len(drifted)} drifted days"
+          if drifted else "Rebuilt login_daily; no drift found")
+
+
+def maintain_partitions():
+    """Create upcoming partitions and apply login_logs retention; run daily, e.g. from cron."""
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        return partitions.maintain_all(cursor)
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def print_partition_changes(changes):
+    for table, result in changes.items():
+        print(f"{table}: added {', '.join(result['added']) or 'none'}; "
+              f"removed {', '.join(result['removed']) or 'none'}")
+
+
+@app.cli.command('maintain-partitions')
+def maintain_partitions_command():
+    """Create upcoming partitions and drop or archive expired login_logs partitions."""
+    print_partition_changes(maintain_partitions())
+
 @app.route('/api/admin/stats', methods=['GET'])
 @token_required
 def get_dashboard_stats(current_user_id):
+    try:
+        return jsonify({"stats": stats_cache.get('admin_stats', load_admin_stats)}), 200
+    except Exception:
+        logger.exception("Error fetching stats")
+        return jsonify({"error": "Failed to fetch stats"}), 500
+
+
+def load_admin_stats():
+    """Compute the admin dashboard stats (cached under admin_stats)."""
     connection = get_db_connection()
-    if isinstance(connection, dict):
-        return connection, 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1202,22 +2981,39 @@ def get_dashboard_stats(current_user_id):
             {"title": "Total Admins", "value": total_logins, "icon": "LogIn", "trend": "up"},
             {"title": "Recorded Park stuffs", "value": active_admins, "icon": "Users", "trend": "up"},
         ]
-        return jsonify({"stats": stats}), 200
-    except Exception as e:
-        print(f"Error fetching stats: {e}")
-        return jsonify({"error": "Failed to fetch stats"}), 500
+        return stats
     finally:
         if connection.is_connected():
             cursor.close()
-            connection.close()    
+            connection.close()
+
+@app.route('/api/admin/db-pool', methods=['GET'])
+@admin_required
+def get_db_pool_stats(current_user_id):
+    """Report connection pool usage: open/in-use/idle counts, waits and checkout latency."""
+    return jsonify({"pool": get_db_pool().stats()}), 200
+
+@app.route('/api/admin/stats-cache', methods=['GET'])
+@admin_required
+def get_stats_cache_stats(current_user_id):
+    """Report dashboard stats, verified-token and idempotency cache hits and misses."""
+    return jsonify({
+        "cache": stats_cache.stats(),
+        "auth_tokens": verified_tokens.stats(),
+        "idempotency_keys": idempotency_store.stats()
+    }), 200
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_required
+def get_request_metrics(current_user_id):
+    """Per-endpoint latency, status, SQL statement and DB time metrics in Prometheus text format."""
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/fund-requests', methods=['POST'])
 @token_required
 def create_fund_request(current_user_id):
     """Create a new fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -1268,7 +3064,7 @@ def create_fund_request(current_user_id):
         }), 201
     
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to create fund request: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1279,9 +3075,8 @@ def create_fund_request(current_user_id):
 @token_required
 def get_fund_requests(current_user_id):
     """Retrieve fund requests for the staff member's park."""
+    page = KeysetPage.from_request(('fr.created_at', 'fr.id'))
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1300,7 +3095,9 @@ def get_fund_requests(current_user_id):
         staff_park = staff_result['park_name']
         
         # Get fund requests for the staff's park
-        cursor.execute("""
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        cursor.execute(f"""
             SELECT 
                 fr.*, 
                 ps.first_name,
@@ -1309,23 +3106,16 @@ def get_fund_requests(current_user_id):
                 ps.park_name as staff_park
             FROM fund_requests fr
             LEFT JOIN parkstaff ps ON fr.created_by = ps.id
-            WHERE fr.parkname = %s
-            ORDER BY fr.created_at DESC
-        """, (staff_park,))
-        
-        requests = cursor.fetchall()
+            WHERE fr.parkname = %s AND {condition}
+            {order_limit}
+        """, (staff_park, *condition_params, *limit_params))
         
-        # Format dates and amounts
-        for request in requests:
-            if request['created_at']:
-                request['created_at'] = request['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if request['amount']:
-                request['amount'] = float(request['amount'])
+        requests, next_cursor = page.paginate(cursor.fetchall())
         
-        return jsonify(requests), 200
+        return jsonify(page.response(requests, next_cursor)), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve fund requests"}), 500
     finally:
         if connection.is_connected():
@@ -1337,8 +3127,6 @@ def get_fund_requests(current_user_id):
 def get_all_fund_requests(current_user_id):
     """Retrieve all fund requests for finance officer, filtered by their park."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1362,14 +3150,10 @@ def get_all_fund_requests(current_user_id):
         """, (park_name,))
         requests = cursor.fetchall()
         
-        for req in requests:
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            req['amount'] = float(req['amount'])
-            
         return jsonify(requests), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to retrieve fund requests: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1385,8 +3169,6 @@ def get_all_fund_requests(current_user_id):
 def update_fund_request(request_id, current_user_id):
     """Update an existing fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -1411,6 +3193,7 @@ def update_fund_request(request_id, current_user_id):
         if not cursor.fetchone():
             return jsonify({"error": "Fund request not found or unauthorized"}), 404
 
+        before = lock_request_contribution(connection, 'fund_requests', request_id)
         cursor.execute("""
             UPDATE fund_requests SET
                 title = %s, description = %s, amount = %s, category = %s, parkname = %s,
@@ -1420,12 +3203,14 @@ def update_fund_request(request_id, current_user_id):
             data['title'], data['description'], float(data['amount']),
             data['category'], park_name, data['urgency'], request_id
         ))
+        after = lock_request_contribution(connection, 'fund_requests', request_id)
+        move_request_contribution(connection, 'fund_requests', before, after)
         connection.commit()
         
         return jsonify({"message": "Fund request updated successfully"}), 200
     
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update fund request: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1442,8 +3227,6 @@ def update_fund_request(request_id, current_user_id):
 def delete_fund_request(request_id, current_user_id):
     """Delete a fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor()
@@ -1461,13 +3244,15 @@ def delete_fund_request(request_id, current_user_id):
         if not cursor.fetchone():
             return jsonify({"error": "Fund request not found or unauthorized"}), 404
 
+        before = lock_request_contribution(connection, 'fund_requests', request_id)
         cursor.execute("DELETE FROM fund_requests WHERE id = %s", (request_id,))
+        move_request_contribution(connection, 'fund_requests', before, None)
         connection.commit()
         
         return jsonify({"message": "Fund request deleted successfully"}), 200
     
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to delete fund request: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1485,8 +3270,6 @@ def delete_fund_request(request_id, current_user_id):
 @token_required
 def get_fund_request_stats(current_user_id):
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     parkname = request.args.get('parkname')
     try:
@@ -1509,8 +3292,8 @@ def get_fund_request_stats(current_user_id):
                 {"title": "Rejected Requests", "value": stats['rejected'] or 0, "icon": "XCircle"}
             ]
         }), 200
-    except Exception as e:
-        print(f"Error fetching fund request stats: {e}")
+    except Exception:
+        logger.exception("Error fetching fund request stats")
         return jsonify({"error": "Failed to fetch fund request stats"}), 500
     finally:
         if connection.is_connected():
@@ -1523,40 +3306,32 @@ def get_fund_request_stats(current_user_id):
 @token_required
 def get_all_tours(current_user_id):
     """Retrieve all booked tours for finance officer, filtered by their park."""
+    page = KeysetPage.from_request()
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         cursor.execute("SELECT park_name FROM finance_officers WHERE id = %s", (current_user_id,))
         officer = cursor.fetchone()
-        if not officer or not officer['park_name']:
+        if not officer or not officer[0]:
             return jsonify({"error": "Finance officer or park not found"}), 404
         
-        park_name = officer['park_name']
+        park_name = officer[0]
         
-        cursor.execute("""
-            SELECT 
-                id, park_name, tour_name, date, time, guests, amount,
-                first_name, last_name, email, phone, special_requests,
-                created_at
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        cursor.execute(f"""
+            SELECT {TOUR_ROWS.select_list}
             FROM tours
-            WHERE park_name = %s
-            ORDER BY created_at DESC
-        """, (park_name,))
-        tours = cursor.fetchall()
+            WHERE park_name = %s AND {condition}
+            {order_limit}
+        """, (park_name, *condition_params, *limit_params))
+        tours, next_cursor = page.paginate(cursor.fetchall(), TOUR_ROWS)
         
-        for tour in tours:
-            tour['created_at'] = tour['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            tour['date'] = tour['date'].strftime('%Y-%m-%d')
-            tour['time'] = str(tour['time'])
-            tour['amount'] = float(tour['amount'])
-            
-        return jsonify(tours), 200
+        return jsonify(page.response(tours, next_cursor)), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to retrieve tours: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1570,38 +3345,32 @@ def get_all_tours(current_user_id):
 @token_required
 def get_all_donations(current_user_id):
     """Retrieve all donations for finance officer, filtered by their park."""
+    page = KeysetPage.from_request()
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         cursor.execute("SELECT park_name FROM finance_officers WHERE id = %s", (current_user_id,))
         officer = cursor.fetchone()
-        if not officer or not officer['park_name']:
+        if not officer or not officer[0]:
             return jsonify({"error": "Finance officer or park not found"}), 404
         
-        park_name = officer['park_name']
+        park_name = officer[0]
         
-        cursor.execute("""
-            SELECT 
-                id, donation_type, amount, park_name,
-                first_name, last_name, email, message,
-                is_anonymous, created_at
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        cursor.execute(f"""
+            SELECT {DONATION_ROWS.select_list}
             FROM donations
-            WHERE park_name = %s
-            ORDER BY created_at DESC
-        """, (park_name,))
-        donations = cursor.fetchall()
+            WHERE park_name = %s AND {condition}
+            {order_limit}
+        """, (park_name, *condition_params, *limit_params))
+        donations, next_cursor = page.paginate(cursor.fetchall(), DONATION_ROWS)
         
-        for donation in donations:
-            donation['created_at'] = donation['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            donation['amount'] = float(donation['amount'])
-            
-        return jsonify(donations), 200
+        return jsonify(page.response(donations, next_cursor)), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve donations"}), 500
     finally:
         if connection.is_connected():
@@ -1615,13 +3384,14 @@ def get_all_donations(current_user_id):
 @token_required
 def get_all_services(current_user_id):
     """Retrieve all service applications"""
+    page = KeysetPage.from_request()
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        cursor.execute(f"""
             SELECT 
                 id, first_name, last_name, email, phone,
                 company_type, provided_service, company_name,
@@ -1629,17 +3399,15 @@ def get_all_services(current_user_id):
                 status IS NULL as 'pending',
                 status
             FROM services
-            ORDER BY created_at DESC
-        """)
-        services = cursor.fetchall()
+            WHERE {condition}
+            {order_limit}
+        """, (*condition_params, *limit_params))
+        services, next_cursor = page.paginate(cursor.fetchall())
         
-        for service in services:
-            service['created_at'] = service['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            
-        return jsonify(services), 200
+        return jsonify(page.response(services, next_cursor)), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve services"}), 500
     finally:
         if connection.is_connected():
@@ -1651,8 +3419,6 @@ def get_all_services(current_user_id):
 def update_service_status(current_user_id, service_id):
     """Approve or deny service application"""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -1662,9 +3428,6 @@ def update_service_status(current_user_id, service_id):
             return jsonify({"error": "Invalid status"}), 400
             
         cursor = connection.cursor()
-        cursor.execute("""
-            ALTER TABLE services ADD COLUMN IF NOT EXISTS status ENUM('approved', 'denied') DEFAULT NULL
-        """)
         cursor.execute("""
             UPDATE services 
             SET status = %s
@@ -1675,7 +3438,7 @@ def update_service_status(current_user_id, service_id):
         return jsonify({"message": f"Service {status} successfully"}), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update service status: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1687,8 +3450,6 @@ def update_service_status(current_user_id, service_id):
 def get_all_fund_requests(current_user_id):
     """Retrieve all fund requests with park staff details, optionally filtered by status"""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         status = request.args.get('status')  # Optional status filter (e.g., 'approved')
@@ -1715,14 +3476,10 @@ def get_all_fund_requests(current_user_id):
         cursor.execute(query, params)
         requests = cursor.fetchall()
         
-        for req in requests:
-            req['amount'] = float(req['amount'])
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        
         return jsonify(requests), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve fund requests"}), 500
     finally:
         if connection.is_connected():
@@ -1737,8 +3494,6 @@ def get_all_fund_requests(current_user_id):
 def update_fund_request_status(current_user_id, id):
     """Update the status of a fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1762,17 +3517,20 @@ def update_fund_request_status(current_user_id, id):
         if status not in ['approved', 'rejected']:
             return jsonify({"error": "Invalid status. Must be 'approved' or 'rejected'"}), 400
         
+        before = lock_request_contribution(connection, 'fund_requests', id)
         cursor.execute("""
             UPDATE fund_requests 
             SET status = %s 
             WHERE id = %s
         """, (status, id))
+        after = lock_request_contribution(connection, 'fund_requests', id)
+        move_request_contribution(connection, 'fund_requests', before, after)
         connection.commit()
         
         return jsonify({"message": f"Fund request {status} successfully"}), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update fund request status: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1787,8 +3545,6 @@ def update_fund_request_status(current_user_id, id):
 def get_all_emergency_requests(current_user_id):
     """Retrieve all emergency fund requests for government officers."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1805,7 +3561,6 @@ def get_all_emergency_requests(current_user_id):
         requests = cursor.fetchall()
         
         for req in requests:
-            req['amount'] = float(req['amount'])  # Convert Decimal to float
             req['submittedDate'] = req['created_at'].strftime('%Y-%m-%d') if req['created_at'] else None
             req['id'] = str(req['id'])
             req['requestedBy'] = f"{req['first_name']} {req['last_name']}"
@@ -1816,8 +3571,8 @@ def get_all_emergency_requests(current_user_id):
         
         return jsonify(requests), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve emergency requests"}), 500
     finally:
         if connection.is_connected():
@@ -1829,8 +3584,6 @@ def get_all_emergency_requests(current_user_id):
 def get_all_extra_funds_requests(current_user_id):
     """Retrieve all extra funds requests for government officers."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1847,7 +3600,6 @@ def get_all_extra_funds_requests(current_user_id):
         requests = cursor.fetchall()
         
         for req in requests:
-            req['amount'] = float(req['amount'])
             req['dateSubmitted'] = req['created_at'].strftime('%Y-%m-%d') if req['created_at'] else None
             req['id'] = str(req['id'])
             req['requestedBy'] = f"{req['first_name']} {req['last_name']}"
@@ -1858,8 +3610,8 @@ def get_all_extra_funds_requests(current_user_id):
         
         return jsonify(requests), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve extra funds requests"}), 500
     finally:
         if connection.is_connected():
@@ -1871,8 +3623,6 @@ def get_all_extra_funds_requests(current_user_id):
 def update_emergency_request_status(current_user_id, request_id):
     """Approve or reject an emergency fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -1885,6 +3635,7 @@ def update_emergency_request_status(current_user_id, request_id):
             return jsonify({"error": "Reason must be at least 10 characters"}), 400
             
         cursor = connection.cursor()
+        before = lock_request_contribution(connection, 'emergency_requests', request_id)
         cursor.execute("""
             UPDATE emergency_requests 
             SET status = %s, reviewed_by = %s, reviewed_date = CURRENT_TIMESTAMP, reason = %s
@@ -1893,13 +3644,15 @@ def update_emergency_request_status(current_user_id, request_id):
         
         if cursor.rowcount == 0:
             return jsonify({"error": "Request not found"}), 404
-            
+        
+        after = lock_request_contribution(connection, 'emergency_requests', request_id)
+        move_request_contribution(connection, 'emergency_requests', before, after)
         connection.commit()
         
         return jsonify({"message": f"Emergency request {status} successfully"}), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update emergency request status: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -1913,10 +3666,17 @@ def update_emergency_request_status(current_user_id, request_id):
 @token_required
 def get_officer_counts(current_user_id):
     """Retrieve the total count of each officer type."""
-    print(f"Handling GET request for /api/admin/officer-counts by user {current_user_id}")
+    logger.debug("Officer counts requested by user %s", current_user_id)
+    try:
+        return jsonify({"officer_counts": stats_cache.get('officer_counts', load_officer_counts)}), 200
+    except Exception:
+        logger.exception("Error fetching officer counts")
+        return jsonify({"error": "Failed to fetch officer counts"}), 500
+
+
+def load_officer_counts():
+    """Count each officer type (cached under officer_counts)."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -1944,10 +3704,7 @@ def get_officer_counts(current_user_id):
             {"title": "Park Staff", "value": park_staff_count, "icon": "Users", "trend": "neutral"},
         ]
         
-        return jsonify({"officer_counts": officer_counts}), 200
-    except Exception as e:
-        print(f"Error fetching officer counts: {e}")
-        return jsonify({"error": "Failed to fetch officer counts"}), 500
+        return officer_counts
     finally:
         if connection.is_connected():
             cursor.close()
@@ -1964,8 +3721,6 @@ def get_officer_counts(current_user_id):
 def update_extra_funds_request_status(current_user_id, request_id):
     """Approve or reject an extra funds request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -1978,6 +3733,7 @@ def update_extra_funds_request_status(current_user_id, request_id):
             return jsonify({"error": "Reason must be at least 10 characters"}), 400
             
         cursor = connection.cursor()
+        before = lock_request_contribution(connection, 'extra_funds_requests', request_id)
         cursor.execute("""
             UPDATE extra_funds_requests 
             SET status = %s, reviewed_by = %s, reviewed_date = CURRENT_TIMESTAMP, reason = %s
@@ -1986,13 +3742,15 @@ def update_extra_funds_request_status(current_user_id, request_id):
         
         if cursor.rowcount == 0:
             return jsonify({"error": "Request not found"}), 404
-            
+        
+        after = lock_request_contribution(connection, 'extra_funds_requests', request_id)
+        move_request_contribution(connection, 'extra_funds_requests', before, after)
         connection.commit()
         
         return jsonify({"message": f"Extra funds request {status} successfully"}), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update extra funds request status: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -2004,13 +3762,46 @@ def update_extra_funds_request_status(current_user_id, request_id):
 
 
 
+# Budget items are loaded for a whole page of budgets at once instead of one query per budget
+BUDGET_ITEMS_BATCH_SIZE = 1000
+
+
+def fetch_budget_items(connection, budget_ids, items=BUDGET_ITEM_ROWS):
+    """Load the items of many budgets with one IN-list query per batch, shaped by the `items` mapper.
+
+    Returns {str(budget_id): [items]}; every requested id is present.
+    """
+    items_by_budget = {str(budget_id): [] for budget_id in budget_ids}
+    ids = list(items_by_budget)
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(ids), BUDGET_ITEMS_BATCH_SIZE):
+            batch = ids[start:start + BUDGET_ITEMS_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f"SELECT {items.select_list} FROM budget_items WHERE budget_id IN ({placeholders})",
+                batch
+            )
+            for item in items.map(cursor.fetchall()):
+                items_by_budget[str(item.pop('budget_id'))].append(item)
+    finally:
+        cursor.close()
+    return items_by_budget
+
+
+def attach_budget_items(connection, budgets, items=BUDGET_ITEM_ROWS):
+    """Set budget['items'] on every budget row; ids may already be strings."""
+    items_by_budget = fetch_budget_items(connection, [budget['id'] for budget in budgets], items)
+    for budget in budgets:
+        budget['items'] = items_by_budget[str(budget['id'])]
+    return budgets
+
+
 @app.route('/api/finance/budgets', methods=['GET'])
 @token_required
 def get_budgets(current_user_id):
     """Retrieve all budgets for finance officer with item types."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2027,27 +3818,12 @@ def get_budgets(current_user_id):
             WHERE b.created_by = %s
             ORDER BY b.created_at DESC
         """, (current_user_id,))
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall())
         
-        for budget in budgets:
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
-            # Fetch budget items with type
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-            budget['items'] = items
-            
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2061,8 +3837,6 @@ def get_budgets(current_user_id):
 def create_budget(current_user_id):
     """Create a new budget with items, specifying expense or income."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -2121,7 +3895,7 @@ def create_budget(current_user_id):
         }), 201
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         connection.rollback()
         return jsonify({"error": f"Failed to create budget: {str(e)}"}), 500
     finally:
@@ -2139,8 +3913,6 @@ def create_budget(current_user_id):
 def get_government_all_budgets(current_user_id):  # Renamed from get_all_budgets
     """Get all budgets with detailed financial data."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2159,29 +3931,11 @@ def get_government_all_budgets(current_user_id):  # Renamed from get_all_budgets
             WHERE b.status = 'submitted'
             ORDER BY b.created_at DESC
         """)
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall(), REVIEW_BUDGET_ITEMS)
         
         # Format and enhance budget data
         for budget in budgets:
-            # Get budget items
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            
-            # Format items
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-            
-            budget['items'] = items
             budget['id'] = str(budget['id'])
-            budget['total_amount'] = float(budget['total_amount'])
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
             
             # Add creator and approver full names
             budget['created_by_full_name'] = f"{budget['created_by_name']} {budget['created_by_lastname']}"
@@ -2196,8 +3950,8 @@ def get_government_all_budgets(current_user_id):  # Renamed from get_all_budgets
             
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Error fetching budgets: {e}")
+    except Exception:
+        logger.exception("Error fetching budgets")
         return jsonify({"error": "Failed to fetch budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2209,8 +3963,6 @@ def get_government_all_budgets(current_user_id):  # Renamed from get_all_budgets
 def get_government_approved_budgets_v2(current_user_id):  # Renamed from get_government_approved_budgets
     """Get all approved budgets with detailed financial data."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2229,29 +3981,11 @@ def get_government_approved_budgets_v2(current_user_id):  # Renamed from get_gov
             WHERE b.status = 'approved'
             ORDER BY b.approved_at DESC
         """)
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall(), REVIEW_BUDGET_ITEMS)
         
         # Format and enhance budget data
         for budget in budgets:
-            # Get budget items
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            
-            # Format items
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-            
-            budget['items'] = items
             budget['id'] = str(budget['id'])
-            budget['total_amount'] = float(budget['total_amount'])
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
             
             # Add creator and approver full names
             budget['created_by_full_name'] = f"{budget['created_by_name']} {budget['created_by_lastname']}"
@@ -2265,8 +3999,8 @@ def get_government_approved_budgets_v2(current_user_id):  # Renamed from get_gov
             
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Error fetching approved budgets: {e}")
+    except Exception:
+        logger.exception("Error fetching approved budgets")
         return jsonify({"error": "Failed to fetch approved budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2278,8 +4012,6 @@ def get_government_approved_budgets_v2(current_user_id):  # Renamed from get_gov
 def get_government_rejected_budgets_v2(current_user_id):  # Renamed from get_government_rejected_budgets
     """Get all rejected budgets with detailed financial data."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2298,29 +4030,11 @@ def get_government_rejected_budgets_v2(current_user_id):  # Renamed from get_gov
             WHERE b.status = 'rejected'
             ORDER BY b.approved_at DESC
         """)
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall(), REVIEW_BUDGET_ITEMS)
         
         # Format and enhance budget data
         for budget in budgets:
-            # Get budget items
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            
-            # Format items
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-            
-            budget['items'] = items
             budget['id'] = str(budget['id'])
-            budget['total_amount'] = float(budget['total_amount'])
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
             
             # Add creator and approver full names
             budget['created_by_full_name'] = f"{budget['created_by_name']} {budget['created_by_lastname']}"
@@ -2334,8 +4048,8 @@ def get_government_rejected_budgets_v2(current_user_id):  # Renamed from get_gov
             
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Error fetching rejected budgets: {e}")
+    except Exception:
+        logger.exception("Error fetching rejected budgets")
         return jsonify({"error": "Failed to fetch rejected budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2352,8 +4066,6 @@ def get_government_rejected_budgets_v2(current_user_id):  # Renamed from get_gov
 def get_approved_budgets(current_user_id):
     """Retrieve the total sum of approved budgets for finance officer"""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
 
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2365,8 +4077,8 @@ def get_approved_budgets(current_user_id):
         result = cursor.fetchone()
         total_approved_amount = float(result['total_approved_amount'] or 0)
         return jsonify({"total_approved_amount": total_approved_amount}), 200
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve approved budgets total"}), 500
     finally:
         if connection.is_connected():
@@ -2380,61 +4092,31 @@ def get_approved_budgets(current_user_id):
 def get_pending_budgets(current_user_id):
     """Retrieve pending (submitted) budgets for the finance officer's park."""
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         # Get the finance officer's park name
         cursor.execute("SELECT park_name FROM finance_officers WHERE id = %s", (current_user_id,))
         officer = cursor.fetchone()
-        if not officer or not officer['park_name']:
+        if not officer or not officer[0]:
             return jsonify({"error": "Finance officer or park not found"}), 404
         
-        park_name = officer['park_name']
+        park_name = officer[0]
         
         # Retrieve pending budgets filtered by park_name
-        cursor.execute("""
-            SELECT 
-                id, title, fiscal_year AS fiscalYear, total_amount AS totalAmount,
-                park_name AS parkName, status, created_at AS createdAt,
-                created_by, description
-            FROM budgets
-            WHERE park_name = %s AND status = 'submitted'
-            ORDER BY created_at DESC
+        cursor.execute(f"""
+            SELECT {BUDGET_ROWS.select_list}
+            FROM budgets b
+            LEFT JOIN finance_officers fo ON b.created_by = fo.id
+            WHERE b.park_name = %s AND b.status = 'submitted'
+            ORDER BY b.created_at DESC
         """, (park_name,))
-        budgets = cursor.fetchall()
-        
-        for budget in budgets:
-            # Fetch budget items with type
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-                # Ensure type is included (expense/income)
-                item['type'] = item['type'] if item['type'] in ['expense', 'income'] else 'expense'
-            budget['items'] = items
-            budget['id'] = str(budget['id'])
-            budget['totalAmount'] = float(budget['totalAmount'])
-            budget['createdAt'] = budget['createdAt'].isoformat()
-            # Include creator details
-            cursor.execute("""
-                SELECT CONCAT(first_name, ' ', last_name) AS created_by_name
-                FROM finance_officers
-                WHERE id = %s
-            """, (budget['created_by'],))
-            creator = cursor.fetchone()
-            budget['createdByName'] = creator['created_by_name'] if creator else 'Unknown'
+        budgets = attach_budget_items(connection, BUDGET_ROWS.map(cursor.fetchall()), REVIEW_BUDGET_ITEMS)
         
         return jsonify(budgets), 200
     
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve pending budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2454,40 +4136,21 @@ def get_pending_budgets(current_user_id):
 def get_approved_newlybudgets(current_user_id):
     """Retrieve approved budgets for finance officer"""
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT 
-                id, title, fiscal_year AS fiscalYear, total_amount AS totalAmount,
-                park_name AS parkName, status, created_at AS createdAt
-            FROM budgets
-            WHERE created_by = %s AND status = 'approved'
-            ORDER BY created_at DESC
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT {OFFICER_BUDGETS.select_list}
+            FROM budgets b
+            WHERE b.created_by = %s AND b.status = 'approved'
+            ORDER BY b.created_at DESC
         """, (current_user_id,))
-        budgets = cursor.fetchall()
-        
-        for budget in budgets:
-            cursor.execute("""
-                SELECT id, category, description, amount
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-            budget['items'] = items
-            budget['id'] = str(budget['id'])
-            budget['totalAmount'] = float(budget['totalAmount'])
-            budget['createdAt'] = budget['createdAt'].isoformat()
+        budgets = attach_budget_items(connection, OFFICER_BUDGETS.map(cursor.fetchall()), OFFICER_BUDGET_ITEMS)
         
         return jsonify(budgets), 200
     
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve approved budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2501,132 +4164,181 @@ def get_approved_newlybudgets(current_user_id):
 
 
 
+STAFF_FIELDS = ['firstName', 'lastName', 'email', 'role', 'password']
+STAFF_ROLE_TABLES = {
+    'park-staff': 'parkstaff',
+    'auditor': 'auditors',
+    'government': 'government_officers',
+    'finance': 'finance_officers'
+}
+STAFF_ROLES_REQUIRING_PARK = {'park-staff', 'auditor', 'government'}
+STAFF_INSERT_SQL = """
+    INSERT INTO {table} (
+        first_name, last_name, email, password_hash, park_name
+    ) VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def validate_staff(data):
+    """Check a new staff member; return (table, STAFF_INSERT_SQL values, None) or (None, None, error)."""
+    if not isinstance(data, dict):
+        return None, None, {"error": "Missing required fields", "missing": STAFF_FIELDS}
+    missing_fields = [field for field in STAFF_FIELDS if not data.get(field)]
+    if missing_fields:
+        return None, None, {"error": "Missing required fields", "missing": missing_fields}
+
+    # Validate role
+    if data['role'] not in STAFF_ROLE_TABLES:
+        return None, None, {"error": f"Invalid role. Must be one of: {', '.join(STAFF_ROLE_TABLES)}"}
+
+    # Validate park_name for roles requiring it
+    if data['role'] in STAFF_ROLES_REQUIRING_PARK and not data.get('park_name'):
+        return None, None, {"error": f"park_name is required for {data['role']} role"}
+
+    password_hash = hashlib.sha256(str(data['password']).encode()).hexdigest()
+    return STAFF_ROLE_TABLES[data['role']], (
+        data['firstName'],
+        data['lastName'],
+        data['email'],
+        password_hash,
+        data.get('park_name') or None
+    ), None
+
+
 @app.route('/api/staff', methods=['POST'])
 def add_staff():
     """Add a new staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
+    cursor = None
+
     try:
         data = request.json
-        required_fields = ['firstName', 'lastName', 'email', 'role', 'password']
-        
-        # Validate required fields
-        if not all(field in data for field in required_fields):
-            missing_fields = [field for field in required_fields if field not in data]
-            return jsonify({"error": "Missing required fields", "missing": missing_fields}), 400
-        
-        # Validate role
-        valid_roles = ['park-staff', 'auditor', 'government', 'finance']
-        if data['role'] not in valid_roles:
-            return jsonify({"error": f"Invalid role. Must be one of: {', '.join(valid_roles)}"}), 400
-
-        # Validate park_name for roles requiring it
-        roles_requiring_park = ['park-staff', 'auditor', 'government']
-        if data['role'] in roles_requiring_park and not data.get('park_name'):
-            return jsonify({"error": f"park_name is required for {data['role']} role"}), 400
+        table, values, error = validate_staff(data)
+        if error:
+            return jsonify(error), 400
 
         cursor = connection.cursor()
-        
-        # Check if email already exists across all staff tables
-        tables = ['parkstaff', 'auditors', 'government_officers', 'finance_officers']
-        for table in tables:
-            cursor.execute(f"SELECT id FROM {table} WHERE email = %s", (data['email'],))
-            if cursor.fetchone():
-                return jsonify({"error": "Email already exists"}), 409
-
-        # Hash password
-        password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
-
-        # Map role to table
-        table_map = {
-            'park-staff': 'parkstaff',
-            'auditor': 'auditors',
-            'government': 'government_officers',
-            'finance': 'finance_officers'
-        }
-        table = table_map[data['role']]
 
-        # Log query details for debugging
-        print(f"Inserting into table: {table}")
-        print(f"Data: {data}")
+        # Check if email already exists for any account
+        if email_in_use(connection, data['email'], table):
+            return jsonify({"error": "Email already exists"}), 409
 
-        # Insert into appropriate table
-        if data['role'] == 'park-staff':
-            query = """
-                INSERT INTO parkstaff (
-                    first_name, last_name, email, password_hash, park_name
-                ) VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (
-                data['firstName'],
-                data['lastName'],
-                data['email'],
-                password_hash,
-                data['park_name']
-            )
-        elif data['role'] == 'auditor':
-            query = """
-                INSERT INTO auditors (
-                    first_name, last_name, email, password_hash, park_name
-                ) VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (
-                data['firstName'],
-                data['lastName'],
-                data['email'],
-                password_hash,
-                data['park_name']
-            )
-        elif data['role'] == 'government':
-            query = """
-                INSERT INTO government_officers (
-                    first_name, last_name, email, password_hash, park_name
-                ) VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (
-                data['firstName'],
-                data['lastName'],
-                data['email'],
-                password_hash,
-                data['park_name']
-            )
-        elif data['role'] == 'finance':
-            query = """
-                INSERT INTO finance_officers (
-                    first_name, last_name, email, password_hash, park_name
-                ) VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (
-                data['firstName'],
-                data['lastName'],
-                data['email'],
-                password_hash,
-                data.get('park_name')  # Fixed: Changed data('park_name') to data.get('park_name')
-            )
+        logger.debug("Inserting staff member into %s", table)
 
-        print(f"Executing query: {query}")
-        print(f"Parameters: {params}")
-        cursor.execute(query, params)
+        cursor.execute(STAFF_INSERT_SQL.format(table=table), values)
+        new_staff_id = cursor.lastrowid
+        add_identity(connection, table, new_staff_id, data['email'])
 
         connection.commit()
-        new_staff_id = cursor.lastrowid
+        stats_cache.invalidate_tables(table)
         
         return jsonify({
             "message": "Staff member added successfully",
             "id": new_staff_id
         }), 201
 
+    except mysql.connector.IntegrityError:
+        # A concurrent sign-up claimed the email between email_in_use and add_identity
+        connection.rollback()
+        return jsonify({"error": "Email already exists"}), 409
     except Exception as e:
-        print(f"Database error: {str(e)}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to add staff: {str(e)}"}), 500
     finally:
-        if connection.is_connected():
+        if cursor:
             cursor.close()
+        if connection.is_connected():
             connection.close()
 
 
+@app.route('/api/staff/import', methods=['POST'])
+@admin_required
+def import_staff(current_user_id):
+    """Create staff members from a CSV with the /api/staff field names as its header.
+
+    Emails are checked against every account in one query, rows are inserted
+    with one executemany per role table, and the whole import is a single
+    transaction. The response reports every data row by its CSV line number.
+    """
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+
+    report = []
+    pending = []  # (report entry, table, values)
+    seen_emails = set()
+    for record in reader:
+        entry = {"row": reader.line_num, "email": (record.get('email') or '').strip()}
+        report.append(entry)
+        record['email'] = entry['email']
+        table, values, error = validate_staff(record)
+        if error:
+            entry.update(status="rejected", error=error['error'])
+        elif entry['email'].lower() in seen_emails:
+            entry.update(status="rejected", error="Duplicate email in file")
+        else:
+            seen_emails.add(entry['email'].lower())
+            pending.append((entry, table, values))
+    if not report:
+        return jsonify({"error": "CSV has no staff rows"}), 400
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    created_tables = set()
+    try:
+        # One uniqueness pass for the whole file
+        if pending:
+            placeholders = ', '.join(['%s'] * len(pending))
+            cursor.execute(f"""
+                SELECT email FROM user_identities
+                WHERE realm = 'staff' AND email IN ({placeholders})
+            """, [entry['email'] for entry, _, _ in pending])
+            taken = {email.lower() for (email,) in cursor.fetchall()}
+            for entry, _, _ in pending:
+                if entry['email'].lower() in taken:
+                    entry.update(status="rejected", error="Email already exists")
+            pending = [item for item in pending if item[0]['email'].lower() not in taken]
+
+        by_table = {}
+        for entry, table, values in pending:
+            by_table.setdefault(table, []).append((entry, values))
+
+        for table, rows in by_table.items():
+            cursor.executemany(STAFF_INSERT_SQL.format(table=table), [values for _, values in rows])
+            # Read the new ids back by email, which is unique per staff table
+            placeholders = ', '.join(['%s'] * len(rows))
+            cursor.execute(f"SELECT id, email FROM {table} WHERE email IN ({placeholders})",
+                           [entry['email'] for entry, _ in rows])
+            ids = {email.lower(): user_id for user_id, email in cursor.fetchall()}
+            cursor.executemany("""
+                INSERT INTO user_identities (email, realm, role, user_table, user_id)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [(entry['email'], identity_realm(table), IDENTITY_ROLES[table], table,
+                   ids[entry['email'].lower()]) for entry, _ in rows])
+            for entry, _ in rows:
+                entry.update(status="created", id=ids[entry['email'].lower()])
+            created_tables.add(table)
+
+        connection.commit()
+    except Error as e:
+        connection.rollback()
+        logger.exception("Staff import failed")
+        status = 409 if e.errno == 1062 else 500
+        return jsonify({"error": f"Staff import failed, nothing was created: {e.msg}"}), status
+    finally:
+        cursor.close()
+        connection.close()
+
+    if created_tables:
+        stats_cache.invalidate_tables(*created_tables)
+    created = sum(1 for entry in report if entry['status'] == 'created')
+    return jsonify({
+        "created": created,
+        "rejected": len(report) - created,
+        "results": report
+    }), 200
+
+
 
 
 
@@ -2640,40 +4352,21 @@ def add_staff():
 def get_rejected_budgets(current_user_id):
     """Retrieve rejected budgets"""
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT 
-                id, title, fiscal_year AS fiscalYear, total_amount AS totalAmount,
-                park_name AS parkName, status, created_at AS createdAt
-            FROM budgets
-            WHERE created_by = %s AND status = 'rejected'
-            ORDER BY created_at DESC
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT {OFFICER_BUDGETS.select_list}
+            FROM budgets b
+            WHERE b.created_by = %s AND b.status = 'rejected'
+            ORDER BY b.created_at DESC
         """, (current_user_id,))
-        budgets = cursor.fetchall()
-        
-        for budget in budgets:
-            cursor.execute("""
-                SELECT id, category, description, amount
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-                item['id'] = str(item['id'])
-            budget['items'] = items
-            budget['id'] = str(budget['id'])
-            budget['totalAmount'] = float(budget['totalAmount'])
-            budget['createdAt'] = budget['createdAt'].isoformat()
+        budgets = attach_budget_items(connection, OFFICER_BUDGETS.map(cursor.fetchall()), OFFICER_BUDGET_ITEMS)
         
         return jsonify(budgets), 200
     
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve rejected budgets"}), 500
     finally:
         if connection.is_connected():
@@ -2690,8 +4383,6 @@ def get_rejected_budgets(current_user_id):
 def update_budget(current_user_id, budget_id):
     """Update an existing budget and its items with expense/income type."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -2753,12 +4444,12 @@ def update_budget(current_user_id, budget_id):
             ))
         
         connection.commit()
-        print(f"Budget {budget_id} updated by user {current_user_id}")
+        logger.info("Budget %s updated by user %s", budget_id, current_user_id)
         return jsonify({"message": "Budget updated successfully"}), 200
 
     except Exception as e:
         connection.rollback()
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update budget: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -2775,8 +4466,6 @@ def update_budget(current_user_id, budget_id):
 def update_budget_status(current_user_id, budget_id):
     """Approve or reject a budget"""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -2804,11 +4493,12 @@ def update_budget_status(current_user_id, budget_id):
         """, (status, current_user_id, reason, budget_id))
         
         connection.commit()
-        print(f"Budget {budget_id} {status} by user {current_user_id}")
+        stats_cache.invalidate_tables('budgets')
+        logger.info("Budget %s %s by user %s", budget_id, status, current_user_id)
         return jsonify({"message": f"Budget {status} successfully"}), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update budget status: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -2824,8 +4514,6 @@ def update_budget_status(current_user_id, budget_id):
 def create_emergency_request(current_user_id):
     """Create a new emergency fund request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -2861,6 +4549,7 @@ def create_emergency_request(current_user_id):
             current_user_id
         ))
         connection.commit()
+        stats_cache.invalidate_tables('emergency_requests')
         
         new_request_id = cursor.lastrowid
         
@@ -2870,7 +4559,7 @@ def create_emergency_request(current_user_id):
         }), 201
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to create emergency request: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -2884,8 +4573,6 @@ def create_emergency_request(current_user_id):
 def get_emergency_requests(current_user_id):
     """Retrieve all emergency fund requests for the finance officer, filtered by their park."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -2911,15 +4598,14 @@ def get_emergency_requests(current_user_id):
         
         # Format dates for frontend
         for req in requests:
-            req['amount'] = float(req['amount'])  # Convert Decimal to float
             req['submittedDate'] = req['created_at'].strftime('%Y-%m-%d') if req['created_at'] else None
             req['id'] = str(req['id'])  # Match frontend expectation
             del req['created_at']
         
         return jsonify(requests), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve emergency requests"}), 500
     finally:
         if connection.is_connected():
@@ -2935,8 +4621,6 @@ def get_emergency_requests(current_user_id):
 def create_extra_funds_request(current_user_id):
     """Create a new extra funds request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -2981,7 +4665,7 @@ def create_extra_funds_request(current_user_id):
         }), 201
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to create extra funds request: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -2995,8 +4679,6 @@ def create_extra_funds_request(current_user_id):
 def get_extra_funds_requests(current_user_id):
     """Retrieve all extra funds requests for the finance officer, filtered by their park."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -3031,169 +4713,213 @@ def get_extra_funds_requests(current_user_id):
         
         # Format data for frontend
         for req in requests:
-            req['amount'] = float(req['amount'])  # Convert Decimal to float
             req['dateSubmitted'] = req['created_at'].strftime('%Y-%m-%d') if req['created_at'] else None
             req_id = int(req['id'])  # Convert to int explicitly
             req['id'] = f"ef-{req_id:03d}"  # Format as ef-001
             req['parkId'] = f"park-{req_id:03d}"  # Format as park-001
             req['submittedBy'] = officer_name
-            req['park'] = req['parkName']  # Add park field for frontend
-            del req['created_at']
-        
-        return jsonify(requests), 200
-
-    except ValueError as ve:
-        print(f"ValueError: {ve}")
-        return jsonify({"error": "Invalid data format in database"}), 500
-    except Exception as e:
-        print(f"Database error: {e}")
-        return jsonify({"error": "Failed to retrieve extra funds requests"}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
-
-
-
-
-@app.route('/api/finance/all-approved-data', methods=['GET'])
-@token_required
-def get_all_approved_data(current_user_id):
-    """Retrieve all booked tours, donations, approved fund requests, approved extra funds requests, approved emergency requests, and approved budgets."""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
-    try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # 1. Booked Tours
-        cursor.execute("""
-            SELECT 
-                id, park_name, tour_name, date, time, guests, amount,
-                first_name, last_name, email, phone, special_requests,
-                created_at
-            FROM tours
-            ORDER BY created_at DESC
-        """)
-        tours = cursor.fetchall()
-        for tour in tours:
-            tour['created_at'] = tour['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            tour['date'] = tour['date'].strftime('%Y-%m-%d')
-            tour['time'] = str(tour['time'])
-            tour['amount'] = float(tour['amount'])
-        
-        # 2. Donations
-        cursor.execute("""
-            SELECT 
-                id, donation_type, amount, park_name,
-                first_name, last_name, email, message,
-                is_anonymous, created_at
-            FROM donations
-            ORDER BY created_at DESC
-        """)
-        donations = cursor.fetchall()
-        for donation in donations:
-            donation['created_at'] = donation['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            donation['amount'] = float(donation['amount'])
-        
-        # 3. Approved Fund Requests
-        cursor.execute("""
-            SELECT 
-                fr.id, fr.title, fr.description, fr.amount,
-                fr.category, fr.parkname, fr.urgency, fr.status,
-                fr.created_at, fr.created_by,
-                ps.first_name, ps.last_name, ps.email AS staff_email,
-                ps.park_name AS staff_park
-            FROM fund_requests fr
-            JOIN parkstaff ps ON fr.created_by = ps.id
-            WHERE fr.status = 'approved'
-            ORDER BY fr.created_at DESC
-        """)
-        fund_requests = cursor.fetchall()
-        for req in fund_requests:
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            req['amount'] = float(req['amount'])
-        
-        # 4. Approved Extra Funds Requests
-        cursor.execute("""
-            SELECT 
-                efr.id, efr.title, efr.description, efr.amount,
-                efr.park_name AS parkName, efr.category,
-                efr.justification, efr.expected_duration,
-                efr.status, efr.created_at, efr.created_by,
-                fo.first_name, fo.last_name, fo.email AS finance_email
-            FROM extra_funds_requests efr
-            JOIN finance_officers fo ON efr.created_by = fo.id
-            WHERE efr.status = 'approved'
-            ORDER BY efr.created_at DESC
-        """)
-        extra_funds_requests = cursor.fetchall()
-        for req in extra_funds_requests:
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            req['amount'] = float(req['amount'])
-        
-        # 5. Approved Emergency Requests
-        cursor.execute("""
-            SELECT 
-                er.id, er.title, er.description, er.amount,
-                er.park_name AS parkName, er.emergency_type,
-                er.justification, er.timeframe, er.status,
-                er.created_at, er.created_by,
-                fo.first_name, fo.last_name, fo.email AS finance_email
-            FROM emergency_requests er
-            JOIN finance_officers fo ON er.created_by = fo.id
-            WHERE er.status = 'approved'
-            ORDER BY er.created_at DESC
-        """)
-        emergency_requests = cursor.fetchall()
-        for req in emergency_requests:
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            req['amount'] = float(req['amount'])
+            req['park'] = req['parkName']  # Add park field for frontend
+            del req['created_at']
         
-        # 6. Approved Budgets
-        cursor.execute("""
-            SELECT 
-                b.id, b.title, b.fiscal_year, b.total_amount,
-                b.park_name, b.description, b.status,
-                b.created_at, b.created_by, b.approved_by,
-                b.approved_at,
-                fo.first_name AS created_by_name,
-                go.first_name AS approved_by_name
-            FROM budgets b
-            LEFT JOIN finance_officers fo ON b.created_by = fo.id
-            LEFT JOIN government_officers go ON b.approved_by = go.id
-            WHERE b.status = 'approved'
-            ORDER BY b.created_at DESC
-        """)
-        budgets = cursor.fetchall()
-        for budget in budgets:
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            budget['total_amount'] = float(budget['total_amount'])
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
-            # Fetch budget items
-            cursor.execute("""
-                SELECT id, category, description, amount
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-            budget['items'] = items
+        return jsonify(requests), 200
+
+    except ValueError:
+        logger.exception("Invalid data format in extra funds requests")
+        return jsonify({"error": "Invalid data format in database"}), 500
+    except Exception:
+        logger.exception("Database error")
+        return jsonify({"error": "Failed to retrieve extra funds requests"}), 500
+    finally:
+        if connection.is_connected():
+            cursor.close()
+            connection.close()
+
+
+
+
+# Sections of the approved-data report, in output order
+APPROVED_DATA_SECTIONS = {
+    # 1. Booked Tours
+    'tours': """
+        SELECT 
+            id, park_name, tour_name, date, time, guests, amount,
+            first_name, last_name, email, phone, special_requests,
+            created_at
+        FROM tours
+        ORDER BY created_at DESC
+    """,
+    # 2. Donations
+    'donations': """
+        SELECT 
+            id, donation_type, amount, park_name,
+            first_name, last_name, email, message,
+            is_anonymous, created_at
+        FROM donations
+        ORDER BY created_at DESC
+    """,
+    # 3. Approved Fund Requests
+    'fund_requests': """
+        SELECT 
+            fr.id, fr.title, fr.description, fr.amount,
+            fr.category, fr.parkname, fr.urgency, fr.status,
+            fr.created_at, fr.created_by,
+            ps.first_name, ps.last_name, ps.email AS staff_email,
+            ps.park_name AS staff_park
+        FROM fund_requests fr
+        JOIN parkstaff ps ON fr.created_by = ps.id
+        WHERE fr.status = 'approved'
+        ORDER BY fr.created_at DESC
+    """,
+    # 4. Approved Extra Funds Requests
+    'extra_funds_requests': """
+        SELECT 
+            efr.id, efr.title, efr.description, efr.amount,
+            efr.park_name AS parkName, efr.category,
+            efr.justification, efr.expected_duration,
+            efr.status, efr.created_at, efr.created_by,
+            fo.first_name, fo.last_name, fo.email AS finance_email
+        FROM extra_funds_requests efr
+        JOIN finance_officers fo ON efr.created_by = fo.id
+        WHERE efr.status = 'approved'
+        ORDER BY efr.created_at DESC
+    """,
+    # 5. Approved Emergency Requests
+    'emergency_requests': """
+        SELECT 
+            er.id, er.title, er.description, er.amount,
+            er.park_name AS parkName, er.emergency_type,
+            er.justification, er.timeframe, er.status,
+            er.created_at, er.created_by,
+            fo.first_name, fo.last_name, fo.email AS finance_email
+        FROM emergency_requests er
+        JOIN finance_officers fo ON er.created_by = fo.id
+        WHERE er.status = 'approved'
+        ORDER BY er.created_at DESC
+    """,
+    # 6. Approved Budgets
+    'budgets': """
+        SELECT 
+            b.id, b.title, b.fiscal_year, b.total_amount,
+            b.park_name, b.description, b.status,
+            b.created_at, b.created_by, b.approved_by,
+            b.approved_at,
+            fo.first_name AS created_by_name,
+            go.first_name AS approved_by_name
+        FROM budgets b
+        LEFT JOIN finance_officers fo ON b.created_by = fo.id
+        LEFT JOIN government_officers go ON b.approved_by = go.id
+        WHERE b.status = 'approved'
+        ORDER BY b.created_at DESC
+    """,
+}
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 500))
+
+
+def format_report_row(row):
+    """Convert dates, times and decimals in a report row to plain values, in place, for CSV."""
+    for key, value in row.items():
+        if isinstance(value, CONVERTED_TYPES):
+            row[key] = json_default(value)
+    return row
+
+
+def stream_approved_data(connection, sections, export_format):
+    """Yield the report sections chunk by chunk, reading EXPORT_FETCH_SIZE rows at a time.
+
+    Rows are read from an unbuffered (server-side) cursor so only one chunk is
+    held in memory. Budgets are buffered instead because their items are
+    looked up with a second query per chunk, and an unbuffered result must be
+    drained before the connection can run another statement.
+    """
+    try:
+        for name in sections:
+            buffered = name == 'budgets'
+            cursor = connection.cursor(dictionary=True, buffered=buffered)
+            try:
+                cursor.execute(APPROVED_DATA_SECTIONS[name])
+                if export_format == 'csv':
+                    columns = list(cursor.column_names) + (['items'] if buffered else [])
+                    out = io.StringIO()
+                    writer = csv.DictWriter(out, fieldnames=columns)
+                    writer.writeheader()
+                    yield out.getvalue()
+                while True:
+                    rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    if buffered:
+                        attach_budget_items(connection, rows, REPORT_BUDGET_ITEMS)
+                    if export_format == 'csv':
+                        out = io.StringIO()
+                        writer = csv.DictWriter(out, fieldnames=columns)
+                        for row in rows:
+                            row = format_report_row(row)
+                            if buffered:
+                                row['items'] = app.json.dumps(row['items'])
+                            writer.writerow(row)
+                        yield out.getvalue()
+                    else:
+                        yield ''.join(
+                            app.json.dumps({"section": name, **row}) + '\n'
+                            for row in rows
+                        )
+            finally:
+                cursor.close()
+    except Exception:
+        # Headers are already sent, so the client sees a truncated download
+        logger.exception("Export error")
+    finally:
+        connection.close()
+
+
+@app.route('/api/finance/all-approved-data', methods=['GET'])
+@token_required
+def get_all_approved_data(current_user_id):
+    """Retrieve all booked tours, donations, approved fund requests, approved extra funds requests, approved emergency requests, and approved budgets.
+
+    With ?format=ndjson or ?format=csv the data is streamed as a download
+    instead: NDJSON tags each line with its section, CSV needs ?section=.
+    """
+    export_format = request.args.get('format')
+    if export_format is not None:
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        section = request.args.get('section')
+        if section is not None and section not in APPROVED_DATA_SECTIONS:
+            return jsonify({"error": f"section must be one of: {', '.join(APPROVED_DATA_SECTIONS)}"}), 400
+        if export_format == 'csv' and section is None:
+            return jsonify({"error": "section is required for CSV export"}), 400
+        sections = [section] if section else list(APPROVED_DATA_SECTIONS)
+        filename = f"approved-data{'-' + section if section else ''}.{export_format}"
+        # The generator owns the connection; stream_with_context keeps the
+        # request alive so teardown doesn't reclaim it mid-stream
+        connection = get_db_connection()
+        return Response(
+            stream_with_context(stream_approved_data(connection, sections, export_format)),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
+    connection = get_db_connection()
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        data = {}
+        for name, query in APPROVED_DATA_SECTIONS.items():
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            if name == 'budgets':
+                rows = attach_budget_items(connection, rows, REPORT_BUDGET_ITEMS)
+            data[name] = rows
         
-        return jsonify({
-            "tours": tours,
-            "donations": donations,
-            "fund_requests": fund_requests,
-            "extra_funds_requests": extra_funds_requests,
-            "emergency_requests": emergency_requests,
-            "budgets": budgets
-        }), 200
+        return jsonify(data), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to retrieve data: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3207,9 +4933,8 @@ def get_all_approved_data(current_user_id):
 @token_required
 def get_staff(current_user_id):
     """Retrieve all staff members across all roles."""
+    page = KeysetPage.from_request(('created_at', 'role', 'id'))
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -3218,32 +4943,22 @@ def get_staff(current_user_id):
         if not cursor.fetchone():
             return jsonify({"error": "Unauthorized: Admin access required"}), 403
 
-        # Query all staff tables with UNION
-        query = """
-            SELECT id, first_name, last_name, email, park_name, role, last_login, created_at
-            FROM parkstaff
-            UNION
-            SELECT id, first_name, last_name, email, park_name, role, last_login, created_at
-            FROM auditors
-            UNION
-            SELECT id, first_name, last_name, email, park_name, role, last_login, created_at
-            FROM government_officers
-            UNION
-            SELECT id, first_name, last_name, email, park_name, role, last_login, created_at
-            FROM finance_officers
-            ORDER BY created_at DESC
-        """
-        cursor.execute(query)
-        staff = cursor.fetchall()
-
-        # Format dates and clean up response
+        # Query all staff tables with UNION; ids repeat across tables, so role breaks ties.
+        # Each branch is limited to one page so the merge never reads whole tables.
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        branches = [f"""
+            (SELECT id, first_name, last_name, email, park_name, role, last_login, created_at
+            FROM {table}
+            WHERE {condition}
+            {order_limit})""" for table in ['parkstaff', 'auditors', 'government_officers', 'finance_officers']]
+        query = " UNION ALL ".join(branches) + f" {order_limit}"
+        cursor.execute(query, (condition_params + limit_params) * len(branches) + limit_params)
+        staff, next_cursor = page.paginate(cursor.fetchall())
+
+        # Clean up response
         for member in staff:
             member['id'] = str(member['id'])  # Convert to string for frontend
-            if member['last_login']:
-                member['last_login'] = member['last_login'].strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                member['last_login'] = None
-            member['created_at'] = member['created_at'].strftime('%Y-%m-%d %H:%M:%S')
             # Ensure role is consistent
             if member['role'] == 'park-staff':
                 member['role'] = 'park-staff'
@@ -3254,10 +4969,10 @@ def get_staff(current_user_id):
             elif member['role'] == 'finance':
                 member['role'] = 'finance'
 
-        return jsonify(staff), 200
+        return jsonify(page.response(staff, next_cursor)), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve staff"}), 500
     finally:
         if connection.is_connected():
@@ -3269,8 +4984,6 @@ def get_staff(current_user_id):
 def delete_staff(current_user_id, staff_id):
     """Delete a staff member from any role."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         role = request.args.get('role')
@@ -3300,14 +5013,16 @@ def delete_staff(current_user_id, staff_id):
         
         # Delete staff member
         cursor.execute(f"DELETE FROM {table} WHERE id = %s", (staff_id,))
+        remove_identity(connection, table, staff_id)
         connection.commit()
+        stats_cache.invalidate_tables(table)
         
         return jsonify({
             "message": "Staff member deleted successfully"
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to delete staff: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3320,8 +5035,6 @@ def delete_staff(current_user_id, staff_id):
 def update_staff(current_user_id, staff_id):
     """Update an existing staff member."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3361,10 +5074,8 @@ def update_staff(current_user_id, staff_id):
             return jsonify({"error": "Staff member not found"}), 404
         
         # Check if email is already in use by another user
-        for tbl in ['parkstaff', 'auditors', 'government_officers', 'finance_officers']:
-            cursor.execute(f"SELECT id FROM {tbl} WHERE email = %s AND id != %s", (data['email'], staff_id))
-            if cursor.fetchone():
-                return jsonify({"error": "Email already in use by another staff member"}), 409
+        if email_in_use(connection, data['email'], table, staff_id):
+            return jsonify({"error": "Email already in use by another staff member"}), 409
         
         # Update staff member
         if role == 'park-staff':
@@ -3420,6 +5131,7 @@ def update_staff(current_user_id, staff_id):
                 UPDATE {table} SET password_hash = %s WHERE id = %s
             """, (password_hash, staff_id))
         
+        update_identity_email(connection, table, staff_id, data['email'])
         connection.commit()
         
         return jsonify({
@@ -3428,7 +5140,7 @@ def update_staff(current_user_id, staff_id):
         }), 200
 
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update staff: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3444,8 +5156,6 @@ def update_staff(current_user_id, staff_id):
 def get_visitor_profile(current_user_id):
     """Retrieve the logged-in visitor's profile information."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -3468,8 +5178,8 @@ def get_visitor_profile(current_user_id):
             }
         }), 200
         
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve visitor profile"}), 500
     finally:
         if connection.is_connected():
@@ -3481,8 +5191,6 @@ def get_visitor_profile(current_user_id):
 def update_visitor_profile(current_user_id):
     """Update the logged-in visitor's profile information."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3499,9 +5207,7 @@ def update_visitor_profile(current_user_id):
         cursor = connection.cursor()
         
         # Check if email is already in use by another visitor
-        cursor.execute("SELECT id FROM visitors WHERE email = %s AND id != %s", 
-                      (data['email'], current_user_id))
-        if cursor.fetchone():
+        if email_in_use(connection, data['email'], 'visitors', current_user_id):
             return jsonify({"error": "Email already in use by another visitor"}), 409
 
         # If password update is requested
@@ -3558,6 +5264,7 @@ def update_visitor_profile(current_user_id):
                 current_user_id
             ))
 
+        update_identity_email(connection, 'visitors', current_user_id, data['email'])
         connection.commit()
         
         return jsonify({
@@ -3566,7 +5273,7 @@ def update_visitor_profile(current_user_id):
         }), 200
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         return jsonify({"error": f"Failed to update visitor profile: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3585,73 +5292,48 @@ def update_visitor_profile(current_user_id):
 def get_visitor_data(current_user_id):
     """Retrieve all donations, tours, and services for the logged-in visitor."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor()
         # Get visitor's email
         cursor.execute("SELECT email FROM visitors WHERE id = %s", (current_user_id,))
         visitor = cursor.fetchone()
         if not visitor:
             return jsonify({"error": "Visitor not found"}), 404
-        email = visitor['email']
+        email = visitor[0]
 
         # Fetch donations
-        cursor.execute("""
-            SELECT 
-                id, donation_type AS donationType, amount, park_name AS parkName,
-                first_name AS firstName, last_name AS lastName, email,
-                message, is_anonymous AS isAnonymous, created_at AS createdAt
+        cursor.execute(f"""
+            SELECT {VISITOR_DONATIONS.select_list}
             FROM donations
             WHERE email = %s
             ORDER BY created_at DESC
         """, (email,))
-        donations = cursor.fetchall()
-        for donation in donations:
-            donation['createdAt'] = donation['createdAt'].strftime('%Y-%m-%d %H:%M:%S')
-            donation['amount'] = float(donation['amount'])
-
+        donations = VISITOR_DONATIONS.map(cursor.fetchall())
         # Fetch tours
-        cursor.execute("""
-            SELECT 
-                id, park_name AS parkName, tour_name AS tourName, date, time,
-                guests, amount, first_name AS firstName, last_name AS lastName,
-                email, special_requests AS specialRequests, created_at AS createdAt
+        cursor.execute(f"""
+            SELECT {VISITOR_TOURS.select_list}
             FROM tours
             WHERE email = %s
             ORDER BY created_at DESC
         """, (email,))
-        tours = cursor.fetchall()
-        for tour in tours:
-            tour['createdAt'] = tour['createdAt'].strftime('%Y-%m-%d %H:%M:%S')
-            tour['date'] = tour['date'].strftime('%Y-%m-%d')
-            tour['time'] = str(tour['time'])
-            tour['amount'] = float(tour['amount'])
-
+        tours = VISITOR_TOURS.map(cursor.fetchall())
         # Fetch services
-        cursor.execute("""
-            SELECT 
-                id, first_name AS firstName, last_name AS lastName, email, phone,
-                company_type AS companyType, provided_service AS providedService,
-                company_name AS companyName, tax_id AS taxId, status,
-                created_at AS createdAt
+        cursor.execute(f"""
+            SELECT {VISITOR_SERVICES.select_list}
             FROM services
             WHERE email = %s
             ORDER BY created_at DESC
         """, (email,))
-        services = cursor.fetchall()
-        for service in services:
-            service['createdAt'] = service['createdAt'].strftime('%Y-%m-%d %H:%M:%S')
-
+        services = VISITOR_SERVICES.map(cursor.fetchall())
         return jsonify({
             "donations": donations,
             "tours": tours,
             "services": services
         }), 200
 
-    except Exception as e:
-        print(f"Database error: {e}")
+    except Exception:
+        logger.exception("Database error")
         return jsonify({"error": "Failed to retrieve visitor data"}), 500
     finally:
         if connection.is_connected():
@@ -3662,8 +5344,6 @@ def get_visitor_data(current_user_id):
 def visitor_register():
     """Register a new visitor."""
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3685,8 +5365,7 @@ def visitor_register():
 
         cursor = connection.cursor()
         # Check if email already exists
-        cursor.execute("SELECT id FROM visitors WHERE email = %s", (data['email'],))
-        if cursor.fetchone():
+        if email_in_use(connection, data['email'], 'visitors'):
             return jsonify({"error": "Email already exists"}), 409
 
         # Generate salt and hash password
@@ -3707,17 +5386,21 @@ def visitor_register():
             data['email'],
             stored_password
         ))
-        connection.commit()
-        
         new_visitor_id = cursor.lastrowid
+        add_identity(connection, 'visitors', new_visitor_id, data['email'])
+        connection.commit()
         
         return jsonify({
             "message": "Visitor registered successfully",
             "id": new_visitor_id
         }), 201
 
+    except mysql.connector.IntegrityError:
+        # A concurrent sign-up claimed the email between email_in_use and add_identity
+        connection.rollback()
+        return jsonify({"error": "Email already exists"}), 409
     except Exception as e:
-        print(f"Visitor registration error: {str(e)}")
+        logger.exception("Visitor registration error")
         return jsonify({"error": f"Failed to register visitor: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3728,8 +5411,6 @@ def visitor_register():
 def visitor_login():
     """Authenticate a visitor using email and password."""
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3795,7 +5476,7 @@ def visitor_login():
         }), 200
 
     except Exception as e:
-        print(f"Visitor login error: {str(e)}")
+        logger.exception("Visitor login error")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     finally:
         if connection.is_connected():
@@ -3810,8 +5491,6 @@ def visitor_login():
 def update_extra_funds_request(current_user_id, request_id):
     """Update an existing extra funds request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3841,6 +5520,7 @@ def update_extra_funds_request(current_user_id, request_id):
             return jsonify({"error": "Extra funds request not found or unauthorized"}), 404
 
         # Update the request
+        before = lock_request_contribution(connection, 'extra_funds_requests', request_id)
         cursor.execute("""
             UPDATE extra_funds_requests SET
                 title = %s,
@@ -3862,6 +5542,8 @@ def update_extra_funds_request(current_user_id, request_id):
             request_id,
             current_user_id
         ))
+        after = lock_request_contribution(connection, 'extra_funds_requests', request_id)
+        move_request_contribution(connection, 'extra_funds_requests', before, after)
         
         connection.commit()
         
@@ -3900,7 +5582,7 @@ def update_extra_funds_request(current_user_id, request_id):
             return jsonify({"error": "Failed to retrieve updated request"}), 500
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         connection.rollback()
         return jsonify({"error": f"Failed to update extra funds request: {str(e)}"}), 500
     finally:
@@ -3913,8 +5595,6 @@ def update_extra_funds_request(current_user_id, request_id):
 def update_emergency_request(current_user_id, request_id):
     """Update an existing emergency request."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -3944,6 +5624,7 @@ def update_emergency_request(current_user_id, request_id):
             return jsonify({"error": "Emergency request not found or unauthorized"}), 404
 
         # Update the request
+        before = lock_request_contribution(connection, 'emergency_requests', request_id)
         cursor.execute("""
             UPDATE emergency_requests SET
                 title = %s,
@@ -3965,6 +5646,8 @@ def update_emergency_request(current_user_id, request_id):
             request_id,
             current_user_id
         ))
+        after = lock_request_contribution(connection, 'emergency_requests', request_id)
+        move_request_contribution(connection, 'emergency_requests', before, after)
         
         connection.commit()
         
@@ -4002,7 +5685,7 @@ def update_emergency_request(current_user_id, request_id):
             return jsonify({"error": "Failed to retrieve updated request"}), 500
         
     except Exception as e:
-        print(f"Database error: {e}")
+        logger.exception("Database error")
         connection.rollback()
         return jsonify({"error": f"Failed to update emergency request: {str(e)}"}), 500
     finally:
@@ -4014,41 +5697,43 @@ def update_emergency_request(current_user_id, request_id):
 @token_required
 def get_government_dashboard_stats(current_user_id):
     """Get statistics for government dashboard."""
+    try:
+        return jsonify({"stats": stats_cache.get('government_stats', load_government_stats)}), 200
+    except Exception:
+        logger.exception("Error fetching government stats")
+        return jsonify({"error": "Failed to fetch statistics"}), 500
+
+
+# One single-row query per government dashboard total; shared with asgi.py
+GOVERNMENT_STATS_SQL = [
+    "SELECT SUM(amount) as total_donations FROM donations",
+    "SELECT SUM(amount) as total_bookings FROM tours",
+    "SELECT SUM(total_amount) as total_approved FROM budgets WHERE status = 'approved'",
+    "SELECT COUNT(*) as total_emergency FROM emergency_requests",
+]
+
+
+def government_stats_cards(totals):
+    """Dashboard cards from the merged GOVERNMENT_STATS_SQL rows."""
+    return [
+        {"title": "Total Revenue From Donations", "value": float(totals['total_donations'] or 0), "icon": "DollarSign", "trend": "up"},
+        {"title": "Total Revenue From  Tours", "value": totals['total_bookings'], "icon": "Calendar", "trend": "up"},
+        {"title": "Total Approved Budgets", "value": float(totals['total_approved'] or 0), "icon": "PiggyBank", "trend": "up"},
+        {"title": "Emergency Requests", "value": totals['total_emergency'], "icon": "AlertTriangle", "trend": "up"}
+    ]
+
+
+def load_government_stats():
+    """Compute the government dashboard stats (cached under government_stats)."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        
-        # Get total donations
-        cursor.execute("SELECT SUM(amount) as total_donations FROM donations")
-        total_donations = cursor.fetchone()['total_donations'] or 0
-        
-        # Get total tour bookings
-        cursor.execute("SELECT SUM(amount) as total_bookings FROM tours")
-        total_bookings = cursor.fetchone()['total_bookings']
-        
-        # Get total approved budgets
-        cursor.execute("SELECT SUM(total_amount) as total_approved FROM budgets WHERE status = 'approved'")
-        total_approved = cursor.fetchone()['total_approved'] or 0
-        
-        # Get total emergency requests
-        cursor.execute("SELECT COUNT(*) as total_emergency FROM emergency_requests")
-        total_emergency = cursor.fetchone()['total_emergency']
-
-        stats = [
-            {"title": "Total Revenue From Donations", "value": float(total_donations), "icon": "DollarSign", "trend": "up"},
-            {"title": "Total Revenue From  Tours", "value": total_bookings, "icon": "Calendar", "trend": "up"},
-            {"title": "Total Approved Budgets", "value": float(total_approved), "icon": "PiggyBank", "trend": "up"},
-            {"title": "Emergency Requests", "value": total_emergency, "icon": "AlertTriangle", "trend": "up"}
-        ]
-        
-        return jsonify({"stats": stats}), 200
-        
-    except Exception as e:
-        print(f"Error fetching government stats: {e}")
-        return jsonify({"error": "Failed to fetch statistics"}), 500
+        totals = {}
+        for sql in GOVERNMENT_STATS_SQL:
+            cursor.execute(sql)
+            totals.update(cursor.fetchone())
+        return government_stats_cards(totals)
     finally:
         if connection.is_connected():
             cursor.close()
@@ -4057,22 +5742,22 @@ def get_government_dashboard_stats(current_user_id):
 @app.route('/api/government/tour-bookings', methods=['GET'])
 @token_required
 def get_government_tour_bookings(current_user_id):
-    """Get all tour bookings for government dashboard."""
+    """Get all tour bookings for government dashboard; ?year= limits it to one year."""
+    condition, condition_params = year_range('date', request.args.get('year', type=int))
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 DATE_FORMAT(date, '%b') as month,
                 COUNT(*) as bookings,
                 SUM(amount) as revenue
             FROM tours
+            WHERE {condition}
             GROUP BY YEAR(date), MONTH(date)
             ORDER BY YEAR(date), MONTH(date)
-        """)
+        """, condition_params)
         bookings = cursor.fetchall()
         
         for booking in bookings:
@@ -4080,8 +5765,8 @@ def get_government_tour_bookings(current_user_id):
             
         return jsonify(bookings), 200
         
-    except Exception as e:
-        print(f"Error fetching government tour bookings: {e}")
+    except Exception:
+        logger.exception("Error fetching government tour bookings")
         return jsonify({"error": "Failed to fetch tour bookings"}), 500
     finally:
         if connection.is_connected():
@@ -4093,8 +5778,6 @@ def get_government_tour_bookings(current_user_id):
 def get_all_government_budgets(current_user_id):
     """Get all budgets regardless of status."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -4110,29 +5793,12 @@ def get_all_government_budgets(current_user_id):
             LEFT JOIN government_officers go ON b.approved_by = go.id
             ORDER BY b.created_at DESC
         """)
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall())
         
-        for budget in budgets:
-            budget['total_amount'] = float(budget['total_amount'])
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
-                
-            # Fetch budget items
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-            budget['items'] = items
-            
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Error fetching all government budgets: {e}")
+    except Exception:
+        logger.exception("Error fetching all government budgets")
         return jsonify({"error": "Failed to fetch budgets"}), 500
     finally:
         if connection.is_connected():
@@ -4144,8 +5810,6 @@ def get_all_government_budgets(current_user_id):
 def get_all_approved_budgets(current_user_id):
     """Get all approved budgets across all parks."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -4161,29 +5825,12 @@ def get_all_approved_budgets(current_user_id):
             WHERE b.status = 'approved'
             ORDER BY b.approved_at DESC
         """)
-        budgets = cursor.fetchall()
+        budgets = attach_budget_items(connection, cursor.fetchall())
         
-        for budget in budgets:
-            budget['total_amount'] = float(budget['total_amount'])
-            budget['created_at'] = budget['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if budget['approved_at']:
-                budget['approved_at'] = budget['approved_at'].strftime('%Y-%m-%d %H:%M:%S')
-                
-            # Fetch budget items
-            cursor.execute("""
-                SELECT id, category, description, amount, type
-                FROM budget_items
-                WHERE budget_id = %s
-            """, (budget['id'],))
-            items = cursor.fetchall()
-            for item in items:
-                item['amount'] = float(item['amount'])
-            budget['items'] = items
-            
         return jsonify(budgets), 200
         
-    except Exception as e:
-        print(f"Error fetching all approved budgets: {e}")
+    except Exception:
+        logger.exception("Error fetching all approved budgets")
         return jsonify({"error": "Failed to fetch approved budgets"}), 500
     finally:
         if connection.is_connected():
@@ -4195,8 +5842,6 @@ def get_all_approved_budgets(current_user_id):
 def get_all_emergency_requests_gov(current_user_id):
     """Get all emergency requests across all parks."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -4217,16 +5862,12 @@ def get_all_emergency_requests_gov(current_user_id):
         requests = cursor.fetchall()
         
         for req in requests:
-            req['amount'] = float(req['amount'])
-            req['created_at'] = req['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if req['reviewed_date']:
-                req['reviewed_date'] = req['reviewed_date'].strftime('%Y-%m-%d %H:%M:%S')
             req['id'] = str(req['id'])
             
         return jsonify(requests), 200
         
-    except Exception as e:
-        print(f"Error fetching all emergency requests: {e}")
+    except Exception:
+        logger.exception("Error fetching all emergency requests")
         return jsonify({"error": "Failed to fetch emergency requests"}), 500
     finally:
         if connection.is_connected():
@@ -4237,13 +5878,14 @@ def get_all_emergency_requests_gov(current_user_id):
 @token_required
 def get_government_services(current_user_id):
     """Get all service applications with detailed status information."""
+    page = KeysetPage.from_request()
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
+        condition, condition_params = page.where()
+        order_limit, limit_params = page.order_limit()
+        cursor.execute(f"""
             SELECT 
                 id,
                 first_name,
@@ -4257,21 +5899,21 @@ def get_government_services(current_user_id):
                 status,
                 created_at
             FROM services
-            ORDER BY created_at DESC
-        """)
-        services = cursor.fetchall()
+            WHERE {condition}
+            {order_limit}
+        """, (*condition_params, *limit_params))
+        services, next_cursor = page.paginate(cursor.fetchall())
         
-        # Process services to get counts by status
+        # Count by status across all applications, not just the returned page
         status_counts = {
             'pending': 0,
             'approved': 0,
             'rejected': 0
         }
-        
-        for service in services:
-            service['created_at'] = service['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            status = service['status'] or 'pending'  # Default to pending if status is NULL
-            status_counts[status] = status_counts.get(status, 0) + 1
+        cursor.execute("SELECT status, COUNT(*) AS count FROM services GROUP BY status")
+        for row in cursor.fetchall():
+            status = row['status'] or 'pending'  # Default to pending if status is NULL
+            status_counts[status] = status_counts.get(status, 0) + row['count']
         
         # Format data for chart
         chart_data = [
@@ -4280,15 +5922,18 @@ def get_government_services(current_user_id):
             {'status': 'Rejected', 'count': status_counts['rejected']}
         ]
         
-        return jsonify({
+        response = {
             'services': services,
             'chartData': chart_data,
-            'totalApplications': len(services),
+            'totalApplications': sum(status_counts.values()),
             'statusCounts': status_counts
-        }), 200
+        }
+        if page.enabled:
+            response['next_cursor'] = next_cursor
+        return jsonify(response), 200
         
-    except Exception as e:
-        print(f"Error fetching government services: {e}")
+    except Exception:
+        logger.exception("Error fetching government services")
         return jsonify({"error": "Failed to fetch services"}), 500
     finally:
         if connection.is_connected():
@@ -4298,22 +5943,22 @@ def get_government_services(current_user_id):
 @app.route('/api/government/donations', methods=['GET'])
 @token_required
 def get_government_donations(current_user_id):
-    """Get all donations grouped by month for government dashboard."""
+    """Get all donations grouped by month for government dashboard; ?year= limits it to one year."""
+    condition, condition_params = year_range('created_at', request.args.get('year', type=int))
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 DATE_FORMAT(created_at, '%b') as month,
                 COUNT(*) as count,
                 SUM(amount) as amount
             FROM donations
+            WHERE {condition}
             GROUP BY YEAR(created_at), MONTH(created_at)
             ORDER BY YEAR(created_at), MONTH(created_at)
-        """)
+        """, condition_params)
         donations = cursor.fetchall()
         
         # Format amounts as float
@@ -4322,8 +5967,8 @@ def get_government_donations(current_user_id):
             
         return jsonify(donations), 200
         
-    except Exception as e:
-        print(f"Error fetching government donations: {e}")
+    except Exception:
+        logger.exception("Error fetching government donations")
         return jsonify({"error": "Failed to fetch donations"}), 500
     finally:
         if connection.is_connected():
@@ -4391,7 +6036,7 @@ def get_government_donations(current_user_id):
 #         return jsonify(budgets), 200
         
 #     except Exception as e:
-#         print(f"Error fetching approved budgets: {e}")
+#         logger.exception("Error fetching approved budgets")
 #         return jsonify({"error": "Failed to fetch approved budgets"}), 500
 #     finally:
 #         if connection.is_connected():
@@ -4457,7 +6102,7 @@ def get_government_donations(current_user_id):
 #         return jsonify(budgets), 200
         
 #     except Exception as e:
-#         print(f"Error fetching rejected budgets: {e}")
+#         logger.exception("Error fetching rejected budgets")
 #         return jsonify({"error": "Failed to fetch rejected budgets"}), 500
 #     finally:
 #         if connection.is_connected():
@@ -4469,8 +6114,6 @@ def get_government_donations(current_user_id):
 @token_required
 def update_auditor_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -4480,6 +6123,9 @@ def update_auditor_profile(current_user_id):
             return jsonify({"error": "Missing required fields"}), 400
 
         cursor = connection.cursor()
+        if email_in_use(connection, data['email'], 'auditors', current_user_id):
+            return jsonify({"error": "Email already in use"}), 409
+
         cursor.execute('''
             UPDATE auditors SET
                 first_name = %s,
@@ -4492,12 +6138,13 @@ def update_auditor_profile(current_user_id):
             data['email'],
             current_user_id
         ))
+        update_identity_email(connection, 'auditors', current_user_id, data['email'])
         connection.commit()
 
         return jsonify({"message": "Profile updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error")
         return jsonify({"error": "Failed to update profile"}), 500
     finally:
         if connection.is_connected():
@@ -4507,49 +6154,12 @@ def update_auditor_profile(current_user_id):
 @app.route('/api/auditor/avatar', methods=['POST'])
 @token_required
 def update_auditor_avatar(current_user_id):
-    connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
-    
-    try:
-        if 'avatar' not in request.files:
-            return jsonify({"error": "No avatar file provided"}), 400
-
-        avatar = request.files['avatar']
-        if avatar.filename == '':
-            return jsonify({"error": "No selected file"}), 400
-
-        # Save the file
-        filename = f"avatar_{current_user_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        avatar.save(filepath)
-
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE auditors SET avatar_url = %s WHERE id = %s",
-            (f"/uploads/{filename}", current_user_id)
-        )
-        connection.commit()
-
-        return jsonify({
-            "message": "Avatar updated successfully",
-            "avatarUrl": f"/uploads/{filename}"
-        }), 200
-
-    except Exception as e:
-        print(f"Avatar update error: {e}")
-        return jsonify({"error": "Failed to update avatar"}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    return update_avatar('auditors', current_user_id)
 
 @app.route('/api/auditor/password', methods=['PUT'])
 @token_required
 def update_auditor_password(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -4579,8 +6189,8 @@ def update_auditor_password(current_user_id):
 
         return jsonify({"message": "Password updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Password update error: {e}")
+    except Exception:
+        logger.exception("Password update error")
         return jsonify({"error": "Failed to update password"}), 500
     finally:
         if connection.is_connected():
@@ -4591,16 +6201,16 @@ def update_auditor_password(current_user_id):
 @token_required
 def delete_auditor_account(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         cursor = connection.cursor()
         cursor.execute("DELETE FROM auditors WHERE id = %s", (current_user_id,))
+        remove_identity(connection, 'auditors', current_user_id)
         connection.commit()
+        stats_cache.invalidate_tables('auditors')
         return jsonify({"message": "Account deleted successfully"}), 200
-    except Exception as e:
-        print(f"Account deletion error: {e}")
+    except Exception:
+        logger.exception("Account deletion error")
         return jsonify({"error": "Failed to delete account"}), 500
     finally:
         if connection.is_connected():
@@ -4614,8 +6224,6 @@ def delete_auditor_account(current_user_id):
 @token_required
 def update_finance_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -4625,6 +6233,9 @@ def update_finance_profile(current_user_id):
             return jsonify({"error": "Missing required fields"}), 400
 
         cursor = connection.cursor()
+        if email_in_use(connection, data['email'], 'finance_officers', current_user_id):
+            return jsonify({"error": "Email already in use"}), 409
+
         cursor.execute('''
             UPDATE finance_officers SET
                 first_name = %s,
@@ -4637,12 +6248,13 @@ def update_finance_profile(current_user_id):
             data['email'],
             current_user_id
         ))
+        update_identity_email(connection, 'finance_officers', current_user_id, data['email'])
         connection.commit()
 
         return jsonify({"message": "Profile updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error")
         return jsonify({"error": "Failed to update profile"}), 500
     finally:
         if connection.is_connected():
@@ -4652,49 +6264,12 @@ def update_finance_profile(current_user_id):
 @app.route('/api/finance/avatar', methods=['POST'])
 @token_required
 def update_finance_avatar(current_user_id):
-    connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
-    
-    try:
-        if 'avatar' not in request.files:
-            return jsonify({"error": "No avatar file provided"}), 400
-
-        avatar = request.files['avatar']
-        if avatar.filename == '':
-            return jsonify({"error": "No selected file"}), 400
-
-        # Save the file
-        filename = f"avatar_{current_user_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        avatar.save(filepath)
-
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE finance_officers SET avatar_url = %s WHERE id = %s",
-            (f"/uploads/{filename}", current_user_id)
-        )
-        connection.commit()
-
-        return jsonify({
-            "message": "Avatar updated successfully",
-            "avatarUrl": f"/Uploads/{filename}"
-        }), 200
-
-    except Exception as e:
-        print(f"Avatar update error: {e}")
-        return jsonify({"error": "Failed to update avatar"}), 500
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+    return update_avatar('finance_officers', current_user_id)
 
 @app.route('/api/finance/password', methods=['PUT'])
 @token_required
 def update_finance_password(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -4724,8 +6299,8 @@ def update_finance_password(current_user_id):
 
         return jsonify({"message": "Password updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Password update error: {e}")
+    except Exception:
+        logger.exception("Password update error")
         return jsonify({"error": "Failed to update password"}), 500
     finally:
         if connection.is_connected():
@@ -4736,16 +6311,16 @@ def update_finance_password(current_user_id):
 @token_required
 def delete_finance_account(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         cursor = connection.cursor()
         cursor.execute("DELETE FROM finance_officers WHERE id = %s", (current_user_id,))
+        remove_identity(connection, 'finance_officers', current_user_id)
         connection.commit()
+        stats_cache.invalidate_tables('finance_officers')
         return jsonify({"message": "Account deleted successfully"}), 200
-    except Exception as e:
-        print(f"Account deletion error: {e}")
+    except Exception:
+        logger.exception("Account deletion error")
         return jsonify({"error": "Failed to delete account"}), 500
     finally:
         if connection.is_connected():
@@ -4772,14 +6347,18 @@ def get_profile(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Update government officer avatar
+@app.route('/api/government/avatar', methods=['POST'])
+@token_required
+def update_government_avatar(current_user_id):
+    return update_avatar('government_officers', current_user_id)
+
 # Update government officer profile
 @app.route('/api/government/profile', methods=['PUT'])
 @token_required
 def update_profile(current_user_id):
     """Update government officer profile."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -4792,13 +6371,8 @@ def update_profile(current_user_id):
 
         cursor = connection.cursor(dictionary=True)
         
-        # Check if email is already in use by another officer
-        cursor.execute("""
-            SELECT id FROM government_officers 
-            WHERE email = %s AND id != %s
-        """, (data['email'], current_user_id))
-        
-        if cursor.fetchone():
+        # Check if email is already in use by another account
+        if email_in_use(connection, data['email'], 'government_officers', current_user_id):
             return jsonify({"error": "Email already in use"}), 409
 
         # Update profile
@@ -4818,6 +6392,7 @@ def update_profile(current_user_id):
         if cursor.rowcount == 0:
             return jsonify({"error": "Officer not found"}), 404
 
+        update_identity_email(connection, 'government_officers', current_user_id, data['email'])
         connection.commit()
 
         # Fetch updated profile
@@ -4841,8 +6416,8 @@ def update_profile(current_user_id):
             }
         }), 200
 
-    except Exception as e:
-        print(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error")
         connection.rollback()
         return jsonify({"error": "Failed to update profile"}), 500
     finally:
@@ -4856,8 +6431,6 @@ def update_profile(current_user_id):
 def change_password(current_user_id):
     """Update government officer password."""
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -4903,8 +6476,8 @@ def change_password(current_user_id):
         
         return jsonify({"message": "Password updated successfully"}), 200
 
-    except Exception as e:
-        print(f"Password update error: {e}")
+    except Exception:
+        logger.exception("Password update error")
         connection.rollback()
         return jsonify({"error": "Failed to update password"}), 500
     finally:
@@ -4927,7 +6500,9 @@ def delete_account(current_user):
             conn.close()
             return jsonify({'error': 'Account not found'}), 404
             
+        remove_identity(conn, 'government_officers', current_user['id'])
         conn.commit()
+        stats_cache.invalidate_tables('government_officers')
         cursor.close()
         conn.close()
         
@@ -4966,8 +6541,6 @@ def delete_account(current_user):
 @token_required
 def update_parkstaff_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         data = request.json
@@ -4980,11 +6553,7 @@ def update_parkstaff_profile(current_user_id):
         cursor = connection.cursor(dictionary=True)
         
         # Check for email uniqueness
-        cursor.execute(
-            "SELECT id FROM parkstaff WHERE email = %s AND id != %s",
-            (data['email'], current_user_id)
-        )
-        if cursor.fetchone():
+        if email_in_use(connection, data['email'], 'parkstaff', current_user_id):
             return jsonify({"error": "Email already in use by another staff member"}), 409
 
         # Update profile without phone field
@@ -5004,6 +6573,7 @@ def update_parkstaff_profile(current_user_id):
         if cursor.rowcount == 0:
             return jsonify({"error": "Staff member not found"}), 404
 
+        update_identity_email(connection, 'parkstaff', current_user_id, data['email'])
         connection.commit()
 
         # Retrieve updated profile
@@ -5025,67 +6595,24 @@ def update_parkstaff_profile(current_user_id):
             }
         }), 200
 
-    except Exception as e:
-        print(f"Profile update error: {e}")
+    except Exception:
+        logger.exception("Profile update error")
         return jsonify({"error": "Failed to update profile"}), 500
     finally:
         if connection.is_connected():
             cursor.close()
             connection.close()
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
-    
-    try:
-        if 'avatar' not in request.files:
-            return jsonify({"error": "No avatar file provided"}), 400
-
-        avatar = request.files['avatar']
-        if avatar.filename == '':
-            return jsonify({"error": "No selected file"}), 400
-
-        # Validate file type
-        allowed_extensions = {'.jpg', '.jpeg', '.png'}
-        file_ext = os.path.splitext(avatar.filename)[1].lower()
-        if file_ext not in allowed_extensions:
-            return jsonify({"error": "Invalid file type. Only JPG, JPEG, PNG allowed"}), 400
-
-        # Generate unique filename
-        filename = f"avatar_{current_user_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}{file_ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        avatar.save(filepath)
-
-        cursor = connection.cursor()
-        cursor.execute(
-            "UPDATE parkstaff SET avatar_url = %s WHERE id = %s",
-            (f"/Uploads/{filename}", current_user_id)
-        )
-
-        if cursor.rowcount == 0:
-            return jsonify({"error": "Staff member not found"}), 404
-
-        connection.commit()
-
-        return jsonify({
-            "message": "Avatar updated successfully",
-            "avatarUrl": f"/Uploads/{filename}"
-        }), 200
 
-    except Exception as e:
-        print(f"Avatar update error: {e}")
-        return jsonify({"error": f"Failed to update avatar: {str(e)}"}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+@app.route('/api/parkstaff/avatar', methods=['POST'])
+@token_required
+def update_parkstaff_avatar(current_user_id):
+    return update_avatar('parkstaff', current_user_id)
 
 @app.route('/api/parkstaff/password', methods=['PUT'])
 @token_required
 def update_parkstaff_password(current_user_id):
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         data = request.json
@@ -5123,7 +6650,7 @@ def update_parkstaff_password(current_user_id):
         return jsonify({"message": "Password updated successfully"}), 200
 
     except Exception as e:
-        print(f"Password update error: {e}")
+        logger.exception("Password update error")
         return jsonify({"error": f"Failed to update password: {str(e)}"}), 500
     finally:
         if connection and connection.is_connected():
@@ -5134,8 +6661,6 @@ def update_parkstaff_password(current_user_id):
 @token_required
 def delete_parkstaff_account(current_user_id):
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor()
@@ -5150,12 +6675,14 @@ def delete_parkstaff_account(current_user_id):
             "DELETE FROM parkstaff WHERE id = %s",
             (current_user_id,)
         )
+        remove_identity(connection, 'parkstaff', current_user_id)
         connection.commit()
+        stats_cache.invalidate_tables('parkstaff')
 
         return jsonify({"message": "Account deleted successfully"}), 200
 
     except Exception as e:
-        print(f"Account deletion error: {e}")
+        logger.exception("Account deletion error")
         return jsonify({"error": f"Failed to delete account: {str(e)}"}), 500
     finally:
         if connection and connection.is_connected():
@@ -5166,8 +6693,6 @@ def delete_parkstaff_account(current_user_id):
 @token_required
 def get_parkstaff_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -5192,8 +6717,8 @@ def get_parkstaff_profile(current_user_id):
             "role": "park-staff"
         }), 200
 
-    except Exception as e:
-        print(f"Profile retrieval error: {e}")
+    except Exception:
+        logger.exception("Profile retrieval error")
         return jsonify({"error": "Failed to retrieve profile"}), 500
     finally:
         if connection.is_connected():
@@ -5204,8 +6729,6 @@ def get_parkstaff_profile(current_user_id):
 @token_required
 def get_auditor_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -5229,8 +6752,8 @@ def get_auditor_profile(current_user_id):
             "role": "auditor"
         }), 200
         
-    except Exception as e:
-        print(f"Profile retrieval error: {e}")
+    except Exception:
+        logger.exception("Profile retrieval error")
         return jsonify({"error": "Failed to retrieve profile"}), 500
     finally:
         if connection.is_connected():
@@ -5241,8 +6764,6 @@ def get_auditor_profile(current_user_id):
 @token_required
 def get_finance_profile(current_user_id):
     connection = get_db_connection()
-    if isinstance(connection, tuple):
-        return connection
     
     try:
         cursor = connection.cursor(dictionary=True)
@@ -5266,8 +6787,8 @@ def get_finance_profile(current_user_id):
             "role": "finance"
         }), 200
         
-    except Exception as e:
-        print(f"Profile retrieval error: {e}")
+    except Exception:
+        logger.exception("Profile retrieval error")
         return jsonify({"error": "Failed to retrieve profile"}), 500
     finally:
         if connection.is_connected():
@@ -5290,50 +6811,51 @@ def get_finance_profile(current_user_id):
 
 
 
+def park_income_data(totals):
+    """Income breakdown from a park's summed donations/tours summary row."""
+    total_donations = float(totals['total_donations'] or 0)
+    total_tours = float(totals['total_tours'] or 0)
+    base_income = total_donations + total_tours
+    gov_support = base_income * 0.15 / (1 - 0.15)  # Government support is 15% of total income
+    return {
+        "donations": total_donations,
+        "tours": total_tours,
+        "government_support": gov_support,
+        "total_income": base_income + gov_support
+    }
+
+
+def park_expense_data(totals):
+    """Expense breakdown from a park's summed request-type summary row."""
+    expense_data = {
+        "fund_requests": float(totals['total_fund_requests'] or 0),
+        "extra_funds": float(totals['total_extra_funds'] or 0),
+        "emergency": float(totals['total_emergency'] or 0),
+    }
+    expense_data["total_expenses"] = sum(expense_data.values())
+    return expense_data
+
+
 @app.route('/api/government/park-income/<park_name>', methods=['GET'])
 @token_required
 def get_park_income(current_user_id, park_name):
-    """Get detailed income data for a specific park."""
+    """Get detailed income data for a specific park, optionally for one ?year=."""
+    year = request.args.get('year', type=int)
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
         
-        # Get donations for the park
-        cursor.execute("""
-            SELECT SUM(amount) as total_donations
-            FROM donations
-            WHERE park_name = %s
-        """, (park_name,))
-        donations = cursor.fetchone()
-        
-        # Get tour bookings for the park
+        # Donation and tour totals come from the park's summary rows
         cursor.execute("""
-            SELECT SUM(amount) as total_tours
-            FROM tours
-            WHERE park_name = %s
-        """, (park_name,))
-        tours = cursor.fetchone()
-        
-        # Calculate totals
-        total_donations = float(donations['total_donations'] or 0)
-        total_tours = float(tours['total_tours'] or 0)
-        base_income = total_donations + total_tours
-        gov_support = base_income * 0.15 / (1 - 0.15)  # Government support is 15% of total income
-        
-        income_data = {
-            "donations": total_donations,
-            "tours": total_tours,
-            "government_support": gov_support,
-            "total_income": base_income + gov_support
-        }
-        
-        return jsonify(income_data), 200
-        
-    except Exception as e:
-        print(f"Error fetching park income: {e}")
+            SELECT SUM(donations) as total_donations, SUM(tours) as total_tours
+            FROM park_financial_summary
+            WHERE park_name = %s AND (%s IS NULL OR period_year = %s)
+        """, (park_name, year, year))
+        return jsonify(park_income_data(cursor.fetchone())), 200
+        
+    except Exception:
+        logger.exception("Error fetching park income")
         return jsonify({"error": "Failed to fetch park income data"}), 500
     finally:
         if connection.is_connected():
@@ -5343,51 +6865,25 @@ def get_park_income(current_user_id, park_name):
 @app.route('/api/government/park-expenses/<park_name>', methods=['GET'])
 @token_required
 def get_park_expenses(current_user_id, park_name):
-    """Get detailed expense data for a specific park."""
+    """Get detailed expense data for a specific park, optionally for one ?year=."""
+    year = request.args.get('year', type=int)
     connection = get_db_connection()
-    if not connection:
-        return jsonify({"error": "Database connection failed"}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
         
-        # Get approved fund requests
-        cursor.execute("""
-            SELECT SUM(amount) as total_fund_requests
-            FROM fund_requests
-            WHERE parkname = %s AND status = 'approved'
-        """, (park_name,))
-        fund_requests = cursor.fetchone()
-        
-        # Get approved extra funds requests
-        cursor.execute("""
-            SELECT SUM(amount) as total_extra_funds
-            FROM extra_funds_requests
-            WHERE park_name = %s AND status = 'approved'
-        """, (park_name,))
-        extra_funds = cursor.fetchone()
-        
-        # Get approved emergency requests
+        # Approved request totals come from the park's summary rows
         cursor.execute("""
-            SELECT SUM(amount) as total_emergency
-            FROM emergency_requests
-            WHERE park_name = %s AND status = 'approved'
-        """, (park_name,))
-        emergency = cursor.fetchone()
-        
-        expense_data = {
-            "fund_requests": float(fund_requests['total_fund_requests'] or 0),
-            "extra_funds": float(extra_funds['total_extra_funds'] or 0),
-            "emergency": float(emergency['total_emergency'] or 0),
-            "total_expenses": float(fund_requests['total_fund_requests'] or 0) +
-                            float(extra_funds['total_extra_funds'] or 0) +
-                            float(emergency['total_emergency'] or 0)
-        }
-        
-        return jsonify(expense_data), 200
-        
-    except Exception as e:
-        print(f"Error fetching park expenses: {e}")
+            SELECT SUM(fund_requests) as total_fund_requests,
+                   SUM(extra_funds) as total_extra_funds,
+                   SUM(emergency) as total_emergency
+            FROM park_financial_summary
+            WHERE park_name = %s AND (%s IS NULL OR period_year = %s)
+        """, (park_name, year, year))
+        return jsonify(park_expense_data(cursor.fetchone())), 200
+        
+    except Exception:
+        logger.exception("Error fetching park expenses")
         return jsonify({"error": "Failed to fetch park expense data"}), 500
     finally:
         if connection.is_connected():
@@ -5457,7 +6953,7 @@ def get_park_expenses(current_user_id, park_name):
 #         return jsonify(budgets), 200
         
 #     except Exception as e:
-#         print(f"Error fetching budgets: {e}")
+#         logger.exception("Error fetching budgets")
 #         return jsonify({"error": "Failed to fetch budgets"}), 500
 #     finally:
 #         if connection.is_connected():
@@ -5526,7 +7022,7 @@ def get_park_expenses(current_user_id, park_name):
 #         return jsonify(budgets), 200
         
 #     except Exception as e:
-#         print(f"Error fetching approved budgets: {e}")
+#         logger.exception("Error fetching approved budgets")
 #         return jsonify({"error": "Failed to fetch approved budgets"}), 500
 #     finally:
 #         if connection.is_connected():
@@ -5595,32 +7091,103 @@ def get_park_expenses(current_user_id, park_name):
 #         return jsonify(budgets), 200
         
 #     except Exception as e:
-#         print(f"Error fetching rejected budgets: {e}")
+#         logger.exception("Error fetching rejected budgets")
 #         return jsonify({"error": "Failed to fetch rejected budgets"}), 500
 #     finally:
 #         if connection.is_connected():
 #             cursor.close()
 #             connection.close()
 
+# Production launcher: `python server.py serve` or `flask serve`
+SERVE_HOST = os.getenv('SERVE_HOST', '0.0.0.0')
+SERVE_PORT = int(os.getenv('SERVE_PORT', 5000))
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', 0)) or os.cpu_count() or 1
+SERVE_THREADS = int(os.getenv('SERVE_THREADS', 8))
+SERVE_KEEPALIVE_TIMEOUT = float(os.getenv('SERVE_KEEPALIVE_TIMEOUT', 5))
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv('SERVE_GRACEFUL_TIMEOUT', 30))
 
 
+def close_db_pool():
+    """Drop this process's pool so a forked worker never shares the master's sockets."""
+    global _db_pool
+    if _db_pool is not None:
+        _db_pool.dispose()
+        _db_pool = None
 
 
+def warm_db_pool():
+    """Open a worker's connections before it accepts its first request."""
+    connections = []
+    try:
+        for _ in range(min(SERVE_THREADS, DB_POOL_SIZE)):
+            connections.append(get_db_pool().connect())
+    except DatabaseUnavailable as e:
+        prefork.logger.warning("Could not warm the database pool: %s", e)
+    finally:
+        for connection in connections:
+            connection.close()
 
 
+def shutdown_worker():
+    close_db_pool()
+    # Workers leave through os._exit, which skips atexit; flush queued log records first
+    applog.stop_logging()
 
 
+def serve():
+    """Pre-fork SERVE_WORKERS processes of SERVE_THREADS threads each; see prefork.py for signals."""
+    prefork.serve(
+        app,
+        host=SERVE_HOST,
+        port=SERVE_PORT,
+        workers=SERVE_WORKERS,
+        threads=SERVE_THREADS,
+        keepalive_timeout=SERVE_KEEPALIVE_TIMEOUT,
+        graceful_timeout=SERVE_GRACEFUL_TIMEOUT,
+        pre_fork=close_db_pool,
+        post_fork=warm_db_pool,
+        worker_exit=shutdown_worker,
+        # A reload only re-execs the master once the new code imports cleanly
+        reload_check=[sys.executable, '-c', f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import server"],
+    )
 
 
-
-
-
-
+@app.cli.command('serve')
+def serve_command():
+    """Run the pre-forking production server."""
+    # Same as `python server.py serve`: migrate once in the master, before workers fork
+    if os.getenv('DB_MIGRATE_ON_STARTUP', '1') == '1':
+        run_migrations()
+    serve()
 
 
 if __name__ == '__main__':
-    if os.getenv('FLASK_ENV') == 'production':
-    # Use Gunicorn or similar in production
-        pass
+    if len(sys.argv) > 1 and sys.argv[1] == 'migrate':
+        applied = run_migrations()
+        print(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-financial-summary':
+        drifted = rebuild_park_financial_summary()
+        print(f"Rebuilt park_financial_summary; corrected {len(drifted)} drifted rows: {drifted}"
+              if drifted else "Rebuilt park_financial_summary; no drift found")
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-login-daily':
+        drifted = rebuild_login_daily()
+        print(f"Rebuilt login_daily; corrected {len(drifted)} drifted days"
+              if drifted else "Rebuilt login_daily; no drift found")
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'maintain-partitions':
+        print_partition_changes(maintain_partitions())
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'purge-idempotency-keys':
+        print(f"Purged {idempotency_store.purge_expired()} expired idempotency keys")
+        sys.exit(0)
+
+    # Bring the schema up to date once, before any request is served
+    if os.getenv('DB_MIGRATE_ON_STARTUP', '1') == '1':
+        run_migrations()
+
+    if (len(sys.argv) > 1 and sys.argv[1] == 'serve') or os.getenv('FLASK_ENV') == 'production':
+        serve()
     else:
         app.run(debug=True, port=5000)
\ No newline at end of file
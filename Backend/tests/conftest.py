@@ -0,0 +1,133 @@
+"""Shared fixtures: the Flask test client, bearer tokens per role and a scripted database.
+
+No MySQL server is needed. The `database` fixture replaces mysql.connector.connect,
+so connections from get_db_connection() answer statements with rows the test
+registers and go through the real pool and instrumented cursor.
+
+Run from Backend/:  python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+import jwt
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DB_MIGRATE_ON_STARTUP', '0')
+
+import server  # noqa: E402
+
+
+class FakeDatabase:
+    """Answers statements from canned results and keeps the statements it was sent."""
+
+    def __init__(self):
+        self.results = []  # (fragment, columns, rows); later registrations win
+        self.statements = []
+
+    def returns(self, fragment, columns, rows):
+        """Answer statements containing fragment with rows, given as tuples in columns order."""
+        self.results.insert(0, (fragment, list(columns), [tuple(row) for row in rows]))
+
+    def result_for(self, sql):
+        for fragment, columns, rows in self.results:
+            if fragment in sql:
+                return columns, rows
+        return [], []
+
+    def connect(self, **config):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, dictionary=False, buffered=False, **kwargs):
+        return FakeCursor(self.database, dictionary)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, database, dictionary):
+        self.database = database
+        self.dictionary = dictionary
+        self.rows = []
+        self.column_names = ()
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, operation, params=None, **kwargs):
+        self.database.statements.append(operation)
+        columns, rows = self.database.result_for(operation)
+        self.column_names = tuple(columns)
+        self.rows = [dict(zip(columns, row)) if self.dictionary else row for row in rows]
+        self.rowcount = len(self.rows)
+        self.lastrowid = 1
+
+    def executemany(self, operation, seq_params, **kwargs):
+        self.database.statements.append(operation)
+        self.rows = []
+        self.rowcount = len(seq_params)
+        self.lastrowid = 1
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(server.mysql.connector, 'connect', database.connect)
+    monkeypatch.setattr(server, '_db_pool', None)
+    yield database
+    if server._db_pool is not None:
+        server._db_pool.dispose()
+
+
+@pytest.fixture
+def client():
+    server.app.config['TESTING'] = True
+    return server.app.test_client()
+
+
+@pytest.fixture
+def auth():
+    """auth(role, user_id=1) -> Authorization header for a token issued to that role."""
+    def headers(role, user_id=1):
+        token = jwt.encode({
+            'user_id': str(user_id),
+            'email': f'{role}@example.com',
+            'role': role,
+            'exp': int(datetime.now(timezone.utc).timestamp() + 600),
+        }, server.app.config['SECRET_KEY'], algorithm='HS256')
+        return {'Authorization': f'Bearer {token}'}
+    return headers
@@ -0,0 +1,116 @@
+"""The natively async routes get the request id and metrics the Flask hooks give other routes."""
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+
+import asgi
+import server
+
+
+class FakeAsyncCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.pool.statements.append(sql)
+
+    async def fetchall(self):
+        return list(self.pool.rows)
+
+
+class FakeAsyncConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def cursor(self, *cursor_classes):
+        return FakeAsyncCursor(self.pool)
+
+
+class FakeAsyncPool:
+    """Answers every statement with the same rows, like the aiomysql pool asgi.py uses."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def acquire(self):
+        return FakeAsyncConnection(self)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakeAsyncPool([{'total_donations': Decimal('850.00'), 'total_tours': Decimal('150.00')}])
+
+    async def get_pool():
+        return pool
+    monkeypatch.setattr(asgi, 'get_pool', get_pool)
+    return pool
+
+
+def call(path, headers):
+    """Run one GET through asgi.app; return (status, headers, JSON body)."""
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    start, body = messages
+    return start['status'], dict(start['headers']), json.loads(body['body'])
+
+
+def responses(endpoint, status):
+    return server.request_metrics.responses.get((endpoint, 'GET', status), 0)
+
+
+def test_async_route_is_counted_under_its_flask_endpoint(auth, pool):
+    before = responses('get_park_income', 200)
+    queries = server.request_metrics.queries.get('get_park_income')
+    queries_before = queries.sum if queries else 0
+
+    status, _, body = call('/api/government/park-income/Akagera', auth('government'))
+
+    assert status == 200
+    assert body['donations'] == 850.0
+    assert responses('get_park_income', 200) == before + 1
+    assert server.request_metrics.queries['get_park_income'].sum == queries_before + len(pool.statements) == queries_before + 1
+
+
+def test_async_route_echoes_or_assigns_a_request_id(auth, pool):
+    _, headers, _ = call('/api/government/park-income/Akagera', {**auth('government'), 'X-Request-ID': 'trace-42'})
+    assert headers[b'x-request-id'] == b'trace-42'
+
+    _, headers, _ = call('/api/government/park-income/Akagera', {**auth('government'), 'X-Request-ID': 'bad id!'})
+    assert headers[b'x-request-id'] not in (b'', b'bad id!')
+
+
+def test_async_route_rejections_are_counted(pool):
+    before = responses('get_park_income', 401)
+
+    status, headers, _ = call('/api/government/park-income/Akagera', {})
+
+    assert status == 401
+    assert b'x-request-id' in headers
+    assert responses('get_park_income', 401) == before + 1
+    assert pool.statements == []
@@ -0,0 +1,24 @@
+"""The statements explain_check.py finds all resolve or are allowlisted, and every allowlist entry is live."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import explain_check  # noqa: E402
+
+
+def test_statements_resolve_and_allowlist_entries_match():
+    statements = list(explain_check.scan())
+
+    assert explain_check.static_failures(statements, explain_check.load_allowlist()) == []
+
+
+def test_asgi_queries_and_staff_union_are_resolved():
+    resolved = {}
+    for path, _, function, sqls in explain_check.scan():
+        resolved.setdefault((path, function), []).extend(sqls or [])
+
+    assert any('FROM tours' in sql for sql in resolved[('asgi.py', 'finance_tours')])
+    [union] = [sql for sql in resolved[('server.py', 'get_staff')] if 'UNION ALL' in sql]
+    assert union.count('UNION ALL') == 3
+    assert 'ORDER BY created_at DESC, role DESC, id DESC LIMIT 51' in union
@@ -0,0 +1,80 @@
+"""Listings that used to run a query per row must run a fixed number of statements."""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+import server
+
+BUDGET_COLUMNS = [
+    'id', 'title', 'fiscal_year', 'total_amount', 'park_name', 'description', 'status',
+    'created_at', 'created_by', 'approved_by', 'approved_at', 'reason',
+    'created_by_name', 'created_by_lastname', 'approved_by_name', 'approved_by_lastname',
+]
+STAFF_COLUMNS = ['id', 'first_name', 'last_name', 'email', 'park_name', 'role', 'last_login', 'created_at']
+
+
+def budget(budget_id):
+    return {
+        'id': budget_id, 'title': f'Budget {budget_id}', 'fiscal_year': 2026,
+        'total_amount': Decimal('1500.00'), 'park_name': 'Akagera', 'description': None,
+        'status': 'submitted', 'created_at': datetime(2026, 1, 1, 9, 0), 'created_by': 7,
+        'approved_by': None, 'approved_at': None, 'reason': None,
+        'created_by_name': 'Ana', 'created_by_lastname': 'Uwase', 'approved_by_name': None, 'approved_by_lastname': None,
+    }
+
+
+def add_budgets(database, count):
+    budgets = [budget(budget_id) for budget_id in range(1, count + 1)]
+    database.returns('FROM budgets b', BUDGET_COLUMNS, [[row[c] for c in BUDGET_COLUMNS] for row in budgets])
+    # Plain-cursor listings read budgets through BUDGET_ROWS / OFFICER_BUDGETS, by position
+    database.returns("b.park_name = %s AND b.status = 'submitted'", [c.name for c in server.BUDGET_ROWS.columns],
+                     [[row.get(c.name) for c in server.BUDGET_ROWS.columns] for row in budgets])
+    database.returns("b.created_by = %s AND b.status = 'approved'", [c.name for c in server.OFFICER_BUDGETS.columns],
+                     [[row.get(c.name) for c in server.OFFICER_BUDGETS.columns] for row in budgets])
+    item_columns = [c.name for c in server.BUDGET_ITEM_ROWS.columns]
+    database.returns('FROM budget_items', item_columns, [
+        (budget_id * 10 + n, budget_id, 'Operations', 'Fuel', Decimal('250.00'), 'expense')
+        for budget_id in range(1, count + 1) for n in range(2)
+    ])
+
+
+@pytest.mark.parametrize('path, role, statements', [
+    ('/api/finance/budgets', 'finance', 2),
+    ('/api/government/budgets', 'government', 2),
+    ('/api/government/budgets/allapproved', 'government', 2),
+    ('/api/finance/budgets/pending', 'finance', 3),
+    ('/api/finance/budgets/newlyapproved', 'finance', 2),
+])
+@pytest.mark.parametrize('budgets', [1, 30])
+def test_budget_listings_load_items_in_one_query(client, auth, database, path, role, statements, budgets):
+    add_budgets(database, budgets)
+    database.returns('SELECT park_name FROM finance_officers', ['park_name'], [('Akagera',)])
+
+    with server.record_queries() as queries:
+        response = client.get(path, headers=auth(role))
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body) == budgets
+    assert all(len(row['items']) == 2 for row in body)
+    assert queries.count() == statements
+    assert queries.count('FROM budget_items') == 1
+    assert queries.repeated(threshold=1) == {}
+
+
+@pytest.mark.parametrize('members', [1, 40])
+@pytest.mark.parametrize('query_string', ['', '?limit=20'])
+def test_staff_listing_is_one_union_query(client, auth, database, members, query_string):
+    database.returns('FROM admintable WHERE id', ['id'], [(1,)])
+    database.returns('UNION ALL', STAFF_COLUMNS, [
+        (n, 'Staff', str(n), f'staff{n}@example.com', 'Akagera', 'park-staff', None, datetime(2026, 1, 1))
+        for n in range(members, 0, -1)
+    ])
+
+    with server.record_queries() as queries:
+        response = client.get(f'/api/staff{query_string}', headers=auth('admin'))
+
+    assert response.status_code == 200
+    assert queries.count() == 2
+    assert queries.count('UNION ALL') == 1
@@ -0,0 +1,24 @@
+import pytest
+
+ATTACHMENT_URL = '/api/services/1/attachments/company-registration'
+
+
+@pytest.mark.parametrize('role', ['visitor', 'park-staff', 'auditor'])
+def test_attachment_download_is_refused_to_other_roles(client, auth, database, role):
+    response = client.get(ATTACHMENT_URL, headers=auth(role))
+
+    assert response.status_code == 403
+    assert database.statements == []
+
+
+@pytest.mark.parametrize('role', ['finance', 'government', 'admin'])
+def test_attachment_download_is_allowed_to_reviewers(client, auth, database, role):
+    # No such service in the empty database: the request gets past the role check
+    response = client.get(ATTACHMENT_URL, headers=auth(role))
+
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Attachment not found"}
+
+
+def test_attachment_download_needs_a_token(client, database):
+    assert client.get(ATTACHMENT_URL).status_code == 401
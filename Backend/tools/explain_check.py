@@ -0,0 +1,389 @@
+"""Run EXPLAIN on every SQL statement in server.py and asgi.py and fail on full scans or filesorts.
+
+Statements are found by parsing the modules for cursor.execute(...) calls and
+asgi.py's fetch_all/fetch_rows/fetch_one(...) helpers. The SQL may be a string
+literal or an f-string, written at the call or held in a module-level constant
+(a string, or a list, tuple or dict of them, in which case every value is
+explained; asgi.py may name server.py's as server.NAME), a subscript of such a
+constant, a loop variable over one, a local variable assigned one of these, a
+list comprehension over a literal list of names (one statement per name), or
+" SEP ".join(...) and + of resolvable parts. f-string placeholders may be
+listed in FSTRING_DEFAULTS, name a module-level SQL constant, or be a row
+mapper's {MAPPER.select_list} (explained as *); {order_limit} follows the
+columns the function passes to KeysetPage.from_request. Calls passing on a
+parameter of the enclosing function are wrappers and are checked where they
+are called. Parameters are bound to a neutral literal so the statement can be
+explained without data. SELECT, UPDATE and DELETE are explained; EXPLAIN never
+executes them.
+
+A statement fails when it filters (WHERE/JOIN) but reads a table with a full
+scan, or when it sorts (ORDER BY/GROUP BY) with a filesort. Scans of a whole
+table without a filter are not reported: there is no index that could help.
+A SELECT, UPDATE or DELETE whose SQL can't be resolved statically fails too.
+Accepted exceptions go in explain_allowlist.txt as "function:table" lines, or
+"function:dynamic" for a function's unresolved statements. Entries that match
+no statement, or no plan, fail so they get removed.
+
+Run from Backend/ against a local database with the migrations applied:
+
+    python tools/explain_check.py [--host localhost] [--user root] [--password ...] [--database park_conservation]
+
+With --static no database is needed: only unresolved statements and allowlist
+entries naming a function or table that no statement has are checked.
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+
+import mysql.connector
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_PATH = os.path.join(BACKEND_DIR, 'server.py')
+ASGI_PATH = os.path.join(BACKEND_DIR, 'asgi.py')
+ALLOWLIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'explain_allowlist.txt')
+
+# Values substituted for f-string placeholders; others leave the statement unresolved
+FSTRING_DEFAULTS = {
+    'condition': '1=1',
+    'order_limit': 'ORDER BY created_at DESC, id DESC LIMIT 51',
+    'placeholders': '%s, %s',
+}
+# Helpers in asgi.py that take the SQL as their first argument
+QUERY_HELPERS = ('fetch_all', 'fetch_rows', 'fetch_one')
+EXPLAINABLE = re.compile(r'^\s*\(?\s*(SELECT|UPDATE|DELETE)\b', re.I)
+LEADING_WORD = re.compile(r'^\s*\(?\s*[A-Za-z]+')
+FILTERS = re.compile(r'\b(WHERE|JOIN)\b', re.I)
+SORTS = re.compile(r'\b(ORDER|GROUP)\s+BY\b', re.I)
+
+
+def constant_name(node):
+    """NAME for a Name node and module.NAME for an attribute of an imported module, else None."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        return f"{node.value.id}.{node.attr}"
+    return None
+
+
+def sql_text(node, constants, defaults=FSTRING_DEFAULTS, names=None):
+    """The SQL of a string or f-string node, or None when it can't be known statically.
+
+    names maps comprehension variables to the value they stand for.
+    """
+    names = names or {}
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+                continue
+            name = constant_name(value.value)
+            if name in names:
+                parts.append(names[name])
+            elif name in defaults:
+                parts.append(defaults[name])
+            elif len(constants.get(name, ())) == 1:
+                parts.append(constants[name][0])
+            elif isinstance(value.value, ast.Attribute) and value.value.attr == 'select_list':
+                # The column list doesn't change the access path
+                parts.append('*')
+            else:
+                return None
+        return ''.join(parts)
+    return None
+
+
+def sql_values(node, constants, defaults=FSTRING_DEFAULTS):
+    """Statements a string, or a list, tuple or dict of strings, holds; None if any is unknown."""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = node.elts
+    elif isinstance(node, ast.Dict):
+        values = node.values
+    else:
+        values = [node]
+    statements = [sql_text(value, constants, defaults) for value in values]
+    return statements if statements and None not in statements else None
+
+
+def module_constants(tree, constants=None):
+    """Module-level NAME = <SQL> assignments, as name -> list of statements, added to constants."""
+    constants = dict(constants or {})
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            statements = sql_values(node.value, constants)
+            if statements is not None:
+                constants[node.targets[0].id] = statements
+    return constants
+
+
+def collection_values(node, constants):
+    """Statements of a module constant iterated as X, X.values() or X.items()."""
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr in ('values', 'items') and not node.args):
+        node = node.func.value
+    return constants.get(constant_name(node))
+
+
+def comprehension_values(node, constants, defaults):
+    """[f"...{name}..." for name in ['a', 'b']]: one statement per name; None otherwise."""
+    if len(node.generators) != 1:
+        return None
+    generator = node.generators[0]
+    if (not isinstance(generator.target, ast.Name) or generator.ifs
+            or not isinstance(generator.iter, (ast.List, ast.Tuple))):
+        return None
+    values = [elt.value for elt in generator.iter.elts if isinstance(elt, ast.Constant)]
+    if len(values) != len(generator.iter.elts) or not all(isinstance(value, str) for value in values):
+        return None
+    statements = [sql_text(node.elt, constants, defaults, {generator.target.id: value}) for value in values]
+    return statements if None not in statements else None
+
+
+def own_nodes(function):
+    """Nodes of the function's body, leaving out nested functions, which are scanned on their own."""
+    nested = (ast.FunctionDef, ast.AsyncFunctionDef)
+    stack = [node for node in function.body if not isinstance(node, nested)]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(child for child in ast.iter_child_nodes(node) if not isinstance(child, nested))
+
+
+def fstring_defaults(function):
+    """FSTRING_DEFAULTS with {order_limit} sorting by the function's KeysetPage columns."""
+    defaults = dict(FSTRING_DEFAULTS)
+    for node in ast.walk(function):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == 'from_request' and node.args
+                and isinstance(node.args[0], ast.Tuple)):
+            columns = [elt.value for elt in node.args[0].elts if isinstance(elt, ast.Constant)]
+            defaults['order_limit'] = "ORDER BY " + ", ".join(f"{column} DESC" for column in columns) + " LIMIT 51"
+    return defaults
+
+
+def local_statements(function, constants, defaults):
+    """name -> statements for the function's variables bound to SQL; None for names bound to anything else."""
+    bindings = {}
+
+    def bind(name, statements):
+        if statements is None or bindings.get(name, []) is None:
+            bindings[name] = None
+        else:
+            bindings[name] = bindings.get(name, []) + statements
+
+    # Assignments are resolved in source order so later ones can use earlier ones
+    assignments = sorted(
+        (node for node in own_nodes(function)
+         if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)),
+        key=lambda node: node.lineno)
+    for node in own_nodes(function):
+        if isinstance(node, (ast.For, ast.comprehension)):
+            target = node.target
+            if isinstance(target, ast.Tuple) and len(target.elts) == 2 and isinstance(target.elts[1], ast.Name):
+                target = target.elts[1]  # for key, sql in X.items()
+            if isinstance(target, ast.Name):
+                bind(target.id, collection_values(node.iter, constants))
+    for node in assignments:
+        bind(node.targets[0].id, resolve(node.value, constants, bindings, defaults))
+    return bindings
+
+
+def resolve(node, constants, local, defaults=FSTRING_DEFAULTS):
+    """Statements an execute() argument can be, or None when they can't be known statically."""
+    if isinstance(node, ast.Name) and node.id in local:
+        return local[node.id]
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        return constants.get(constant_name(node))
+    if isinstance(node, ast.Subscript):
+        # SECTIONS[name]: any of the collection's statements
+        return constants.get(constant_name(node.value))
+    if isinstance(node, (ast.Constant, ast.JoinedStr)):
+        return sql_values(node, constants, defaults)
+    if isinstance(node, (ast.ListComp, ast.GeneratorExp)):
+        return comprehension_values(node, constants, defaults)
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'join'
+            and isinstance(node.func.value, ast.Constant) and len(node.args) == 1):
+        # " UNION ALL ".join(branches): one statement of all the parts
+        parts = resolve(node.args[0], constants, local, defaults)
+        return [node.func.value.value.join(parts)] if parts else None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = resolve(node.left, constants, local, defaults)
+        right = resolve(node.right, constants, local, defaults)
+        if left and right and len(left) == len(right) == 1:
+            return [left[0] + right[0]]
+    return None
+
+
+def leading_text(node, constants):
+    """Known start of an unresolved statement's SQL, to tell an INSERT from a query; None if unknown."""
+    if isinstance(node, ast.JoinedStr) and node.values and isinstance(node.values[0], ast.Constant):
+        return node.values[0].value
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'format':
+        # TEMPLATE.format(table=...)
+        statements = constants.get(constant_name(node.func.value))
+        return statements[0] if statements else None
+    return None
+
+
+def statement_calls(function):
+    """execute(...) and query helper calls in the function."""
+    for node in own_nodes(function):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        if isinstance(node.func, ast.Attribute) and node.func.attr == 'execute':
+            yield node
+        elif isinstance(node.func, ast.Name) and node.func.id in QUERY_HELPERS:
+            yield node
+
+
+def find_statements(path, constants=None):
+    """Yield (line, function, statements or None) for every statement the module runs.
+
+    constants are the SQL constants of imported modules, as 'module.NAME'.
+    """
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    constants = module_constants(tree, constants)
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        defaults = fstring_defaults(function)
+        local = local_statements(function, constants, defaults)
+        parameters = {arg.arg for arg in function.args.args + function.args.kwonlyargs}
+        for node in sorted(statement_calls(function), key=lambda node: node.lineno):
+            sql = node.args[0]
+            if isinstance(sql, ast.Name) and sql.id in parameters and sql.id not in local:
+                continue  # a wrapper passing its caller's SQL on
+            statements = resolve(sql, constants, local, defaults)
+            if statements is None:
+                text = leading_text(sql, constants)
+                if text is not None and LEADING_WORD.match(text) and not EXPLAINABLE.match(text):
+                    continue  # INSERT and friends aren't explained
+            yield node.lineno, function.name, statements
+
+
+def scan():
+    """Yield (file, line, function, statements or None) for server.py and asgi.py."""
+    with open(SERVER_PATH, encoding='utf-8') as f:
+        server_constants = module_constants(ast.parse(f.read(), SERVER_PATH))
+    for line, function, statements in find_statements(SERVER_PATH):
+        yield 'server.py', line, function, statements
+    imported = {f"server.{name}": statements for name, statements in server_constants.items()}
+    for line, function, statements in find_statements(ASGI_PATH, imported):
+        yield 'asgi.py', line, function, statements
+
+
+def bind_placeholders(sql):
+    sql = re.sub(r'LIMIT\s+%s', 'LIMIT 50', sql, flags=re.I)
+    # asgi.py's queries are %-formatted by aiomysql, so literal % is written %%
+    return sql.replace('%s', "'1'").replace('%%', '%')
+
+
+def load_allowlist():
+    if not os.path.exists(ALLOWLIST_PATH):
+        return set()
+    with open(ALLOWLIST_PATH, encoding='utf-8') as f:
+        return {line.split('#')[0].strip() for line in f if line.split('#')[0].strip()}
+
+
+def static_failures(statements, allowlist):
+    """Unresolved statements not allowlisted, and entries that name no statement of the function."""
+    failures = []
+    mentioned = set()
+    for path, line, function, sqls in statements:
+        if sqls is None:
+            mentioned.add(f"{function}:dynamic")
+            if f"{function}:dynamic" not in allowlist:
+                failures.append(f"{path}:{line} {function}: SQL not resolvable statically")
+            continue
+        for sql in sqls:
+            if EXPLAINABLE.match(sql):
+                mentioned.update(f"{function}:{table}" for table in re.findall(r'\w+', sql))
+    for entry in sorted(allowlist - mentioned):
+        failures.append(f"explain_allowlist.txt: {entry} matches no statement")
+    return failures
+
+
+def check(cursor, function, sql, allowlist, used):
+    """Return a list of problems with the statement's plan; allowlist entries applied are added to used."""
+    cursor.execute(f"EXPLAIN {bind_placeholders(sql)}")
+    plan = cursor.fetchall()
+    problems = []
+    for row in plan:
+        table = row.get('table') or ''
+        if table.startswith('<'):
+            continue
+        extra = row.get('Extra') or ''
+        scan = row.get('type') == 'ALL' and FILTERS.search(sql)
+        sort = 'Using filesort' in extra and SORTS.search(sql)
+        if (scan or sort) and f"{function}:{table}" in allowlist:
+            used.add(f"{function}:{table}")
+            continue
+        if scan:
+            problems.append(f"full scan of {table} (possible keys: {row.get('possible_keys')})")
+        if sort:
+            problems.append(f"filesort on {table}")
+    return problems
+
+
+def plan_failures(cursor, statements, allowlist):
+    """Plans with full scans or filesorts, and function:table entries no plan needed."""
+    used = set()
+    checked = 0
+    failures = []
+    for path, line, function, sqls in statements:
+        for sql in sqls or ():
+            if not EXPLAINABLE.match(sql):
+                continue
+            try:
+                problems = check(cursor, function, sql, allowlist, used)
+            except mysql.connector.Error as e:
+                problems = [f"EXPLAIN failed: {e.msg}"]
+            checked += 1
+            failures.extend(f"{path}:{line} {function}: {problem}" for problem in problems)
+    for entry in sorted(allowlist - used):
+        if not entry.endswith(':dynamic'):
+            failures.append(f"explain_allowlist.txt: {entry} matches no plan")
+    return checked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='park_conservation')
+    parser.add_argument('--static', action='store_true', help="check without a database, no EXPLAIN")
+    args = parser.parse_args()
+
+    allowlist = load_allowlist()
+    statements = list(scan())
+    failures = static_failures(statements, allowlist)
+    checked = 0
+    if not args.static:
+        connection = mysql.connector.connect(
+            host=args.host, port=args.port, user=args.user,
+            password=args.password, database=args.database
+        )
+        cursor = connection.cursor(dictionary=True)
+        # Dev databases are tiny, where a table scan is always cheapest; make the
+        # optimizer cost plans as it would for large tables
+        cursor.execute("SET SESSION max_seeks_for_key = 1")
+        checked, problems = plan_failures(cursor, statements, allowlist)
+        failures.extend(problems)
+        cursor.close()
+        connection.close()
+
+    for failure in failures:
+        print(failure)
+    print(f"{len(statements)} statements found, {checked} explained, {len(failures)} failing")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
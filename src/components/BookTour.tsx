@@ -122,6 +122,7 @@ const BookTour = () => {
             type: 'tour',
             amount,
             details: {
+              bookingReference: result.bookingReference,
               park: parkTours.find(p => p.id.toString() === selectedPark)?.name,
               tour: selectedTour,
               date,
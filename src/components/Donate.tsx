@@ -114,6 +114,7 @@ const Donate = () => {
       });
 
       if (response.ok) {
+        const result = await response.json();
         toast({
           title: 'Thank you for your donation!',
           description: "You'll receive an email confirmation shortly.",
@@ -123,6 +124,7 @@ const Donate = () => {
             type: 'donation',
             amount: donationAmount,
             details: {
+              bookingReference: result.bookingReference,
               donationType,
               parkName: selectedPark,
               email,
@@ -90,6 +90,7 @@ const Payment = () => {
         expiryDate: expiryDate,
         cvv: cvv,
         customerEmail: details.email || '',
+        bookingReference: details.bookingReference,
         parkName: details.park || details.parkName // Handle both formats
       };
 